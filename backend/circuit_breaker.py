@@ -0,0 +1,142 @@
+import os
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for a remote dependency.
+
+    Closed: calls go through and their outcomes fill a sliding window. Once the
+    window holds at least `min_calls` outcomes and the failure rate reaches
+    `failure_rate`, the breaker opens and calls fail fast with CircuitOpenError.
+    After `reset_timeout` seconds it goes half-open and lets `half_open_probes`
+    calls through; a success closes it again, a failure re-opens it.
+
+    `is_failure` decides which exceptions count against the dependency, so a
+    bad request or a busy signal does not trip the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 failure_rate: float = 0.5,
+                 window: int = 20,
+                 min_calls: int = 5,
+                 reset_timeout: float = 30.0,
+                 half_open_probes: int = 1,
+                 is_failure: Callable[[Exception], bool] = lambda e: True):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, int(min_calls))
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, int(half_open_probes))
+        self.is_failure = is_failure
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._probing = 0
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.min_calls, int(window)))
+
+    @classmethod
+    def from_env(cls, name: str, **kwargs) -> "CircuitBreaker":
+        return cls(
+            name,
+            failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+            window=int(os.getenv("BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", "30")),
+            **kwargs,
+        )
+
+    def _failures(self) -> int:
+        return sum(1 for ok in self._outcomes if not ok)
+
+    def acquire(self) -> None:
+        """Admit a call or raise CircuitOpenError. Every admitted call must be recorded or released."""
+        if self.state == self.OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probing >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probing += 1
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+            self.state = self.CLOSED
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+            self._open()
+            return
+        self._outcomes.append(False)
+        if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls \
+                and self._failures() / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def record(self, error: Exception | None) -> None:
+        if error is not None and self.is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release(self) -> None:
+        """End an admitted call without an outcome, e.g. one its caller abandoned."""
+        if self.state == self.HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.acquire()
+        try:
+            result = await fn()
+        except Exception as e:
+            self.record(e)
+            raise
+        except BaseException:
+            # Cancelled: no outcome, but a half-open probe must give back its slot
+            self.release()
+            raise
+        self.record(None)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        # Report an open breaker whose timeout has passed as half-open
+        state = self.state
+        if state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            state = self.HALF_OPEN
+        return {
+            "state": state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._failures(),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import asyncio
+import logging
+import argparse
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Modules shared between services live in <repo>/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared.singleflight import canonical_request_key
+
+logger = logging.getLogger(__name__)
+
+EXPLANATION_DB = os.getenv("EXPLANATION_DB", "../renders/explanations.sqlite3")
+EXPLANATION_TEMPLATES = os.getenv("EXPLANATION_TEMPLATES", "true").lower() == "true"
+# Bump when the explanation prompt changes, so old answers stop matching
+EXPLANATION_VERSION = 1
+
+
+def explanation_key(visualization_type: Optional[str], parameters: Optional[Dict[str, Any]]) -> str:
+    """
+    What an explanation is stored under. The refined description is left out:
+    it is the LLM's paraphrase of the user's prompt, different on every call,
+    while type and parameters are what the video actually shows. Parameters
+    should be the rendered ones the MCP server reports (defaults filled in,
+    clamped to its budget), so equivalent requests share one entry.
+    """
+    return f"v{EXPLANATION_VERSION}:{canonical_request_key(visualization_type, parameters)}"
+
+
+# -----------------
+# Templates: scenes whose explanation follows from their parameters alone
+# -----------------
+
+def _num(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+
+def _fourier(p: Dict[str, Any]) -> str:
+    terms = p.get("terms") or [1, 3, 5, 7, 9]
+    return (
+        f"This animation builds a square wave out of {len(terms)} sine waves, the harmonics {', '.join(map(_num, terms))}. "
+        "Each harmonic k is a sine wave k times faster than the fundamental with amplitude 4/(k·π), and the curve on "
+        "screen is their running sum. Every term added sharpens the jumps, but a small overshoot next to each jump never "
+        "goes away (the Gibbs phenomenon): the partial sums get closer to a square wave everywhere except right at the edges."
+    )
+
+
+def _linear_transform(p: Dict[str, Any]) -> str:
+    sequence = p.get("matrices") or [p.get("matrix") or [[1, 0], [0, 1]]]
+    (a, b), (c, d) = sequence[0]
+    for (e, f), (g, h) in sequence[1:]:
+        # Applying the next matrix after the ones so far: its product with them
+        (a, b), (c, d) = (e * a + f * c, e * b + f * d), (g * a + h * c, g * b + h * d)
+    det = a * d - b * c
+    # Eigenvalues of a 2x2 matrix: roots of λ² - trace·λ + det
+    half_trace = (a + d) / 2
+    disc = half_trace ** 2 - det
+    steps = f"{len(sequence)} matrices applied one after another, which together act as " if len(sequence) > 1 else ""
+    text = (
+        f"This shows the plane being transformed by {steps}the matrix [[{_num(a)}, {_num(b)}], [{_num(c)}, {_num(d)}]]. "
+        f"The first column, ({_num(a)}, {_num(c)}), is where the basis vector î lands and the second, ({_num(b)}, {_num(d)}), "
+        "is where ĵ lands; every other point moves to the same combination of those two columns, so grid lines stay "
+        "straight, parallel and evenly spaced. "
+    )
+    if abs(det) < 1e-9:
+        text += "The determinant is 0, so the whole plane is squashed onto a line (or a point) and the matrix has no inverse. "
+    else:
+        flip = " and the negative sign means orientation is flipped" if det < 0 else ""
+        text += f"The determinant is {det:.3g}: every area is scaled by {abs(det):.3g}{flip}. "
+    if disc >= 0:
+        eig = (half_trace + math.sqrt(disc), half_trace - math.sqrt(disc))
+        text += (
+            f"Its eigenvalues are {' and '.join(f'{v:.3g}' for v in eig)}: vectors along the eigenvectors stay on "
+            "their own line and are only stretched by those factors."
+        )
+    else:
+        text += "Its eigenvalues are complex, so no direction stays on its own line: the transformation includes a rotation."
+    return text
+
+
+def _gradient_descent(p: Dict[str, Any]) -> str:
+    start = p.get("start_point") or [3, 3]
+    return (
+        f"This runs gradient descent on f(x, y) = {p.get('function', '(x-1)**2 + (y+2)**2')}, starting at "
+        f"({_num(start[0])}, {_num(start[1])}). At each of the {_num(p.get('steps', 20))} steps the point moves against the "
+        f"gradient, the direction in which f decreases fastest, by the gradient times the learning rate "
+        f"{_num(p.get('learning_rate', 0.1))}. Steep regions give big steps and flat ones small steps, so the path slows "
+        "as it approaches a minimum. Too large a learning rate overshoots and can bounce or diverge; too small a one crawls."
+    )
+
+
+def _plot_function(p: Dict[str, Any]) -> str:
+    return (
+        f"This plots y = {p.get('expression', 'sin(x)')} for x from {_num(p.get('x_min', 0.0))} to "
+        f"{_num(p.get('x_max', 2 * math.pi))}. Follow the curve from left to right: where it rises the function is increasing, "
+        "where it falls it is decreasing, and the peaks, valleys and crossings of the x-axis are where its most interesting "
+        "behavior happens."
+    )
+
+
+def _parametric_curve(p: Dict[str, Any]) -> str:
+    return (
+        f"This traces the curve (x, y) = ({p.get('x_of_t', 'cos(t)')}, {p.get('y_of_t', 'sin(t)')}) as t runs from "
+        f"{_num(p.get('t_min', 0.0))} to {_num(p.get('t_max', 2 * math.pi))}. Think of t as time: the two formulas give the "
+        "position of a moving point, and the curve is the path it leaves behind. Unlike y = f(x), the path can loop, cross "
+        "itself or double back."
+    )
+
+
+def _normal(p: Dict[str, Any]) -> str:
+    mean, std = p.get("mean", 0.0), p.get("std", 1.0)
+    return (
+        f"This shows the probability density of a normal distribution with mean {_num(mean)} and standard deviation "
+        f"{_num(std)}. The bell curve peaks at the mean and its width is set by the standard deviation: about 68% of values "
+        f"fall within one standard deviation ({_num(mean - std)} to {_num(mean + std)}) and about 95% within two. The area "
+        "under the curve over an interval is the probability of landing in it, and the total area is 1."
+    )
+
+
+def _histogram(p: Dict[str, Any]) -> str:
+    if p.get("data"):
+        source = f"{len(p['data'])} given values"
+    else:
+        source = f"{_num(p.get('n', 500))} samples from a normal distribution (mean {_num(p.get('mean', 0.0))}, std {_num(p.get('std', 1.0))})"
+    return (
+        f"This histogram sorts {source} into {_num(p.get('bins', 20))} bins; each bar's height counts the values that "
+        "landed in it. With enough samples the bars take on the shape of the distribution they were drawn from, and "
+        "the randomness that remains shrinks as the number of samples grows."
+    )
+
+
+ACTIVATIONS = {
+    "sigmoid": "σ(x) = 1 / (1 + e^(-x)) squashes any input into (0, 1), which makes it read like a probability, but it flattens out for large |x| and its gradients vanish there",
+    "relu": "ReLU(x) = max(0, x) passes positive inputs through unchanged and zeroes out negative ones; it is cheap and its gradient doesn't vanish for positive inputs, which is why it is the default in deep networks",
+    "tanh": "tanh(x) squashes inputs into (-1, 1) and is centered at zero, which often makes training easier than with the sigmoid, though it too saturates for large |x|",
+}
+
+
+def _activation(p: Dict[str, Any]) -> str:
+    name = str(p.get("function", "sigmoid")).lower()
+    return (
+        f"This plots the {name} activation function. {ACTIVATIONS.get(name, ACTIVATIONS['sigmoid'])}. A neuron applies it "
+        "to its weighted input; without a nonlinearity like this, any stack of layers would collapse into a single linear map."
+    )
+
+
+def _feedforward(p: Dict[str, Any]) -> str:
+    layers = p.get("layers") or [3, 4, 2]
+    return (
+        f"This shows a feedforward network with layers of {', '.join(map(_num, layers))} neurons. Every neuron is "
+        f"connected to each neuron in the next layer; a signal flows left to right, each neuron summing its weighted inputs "
+        f"and applying the {p.get('activation', 'relu')} activation. The input layer takes the data, the hidden layers build "
+        "up intermediate features, and the output layer gives the prediction."
+    )
+
+
+def _vector(p: Dict[str, Any]) -> str:
+    vectors = p.get("vectors") or [[2, 1], [-1, 2]]
+    shown = ", ".join("(" + ", ".join(map(_num, v)) + ")" for v in vectors[:6])
+    more = f" and {len(vectors) - 6} more" if len(vectors) > 6 else ""
+    total = [sum(v[0] for v in vectors), sum(v[1] for v in vectors)]
+    return (
+        f"This draws the vectors {shown}{more} as arrows from the origin. A vector is a direction and a length; its "
+        "coordinates say how far to go along x and along y. Adding vectors means placing them tip to tail, which here "
+        f"lands at ({_num(round(total[0], 3))}, {_num(round(total[1], 3))})."
+    )
+
+
+TEMPLATES: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "fourier_series": _fourier,
+    "linear_transform": _linear_transform,
+    "gradient_descent": _gradient_descent,
+    "plot_function": _plot_function,
+    "parametric_curve": _parametric_curve,
+    "normal_distribution": _normal,
+    "histogram_sampling": _histogram,
+    "activation_function": _activation,
+    "feedforward_nn": _feedforward,
+    "vector": _vector,
+}
+
+
+def templated_explanation(visualization_type: Optional[str], parameters: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The template's explanation, or None if the scene has none or its parameters don't fit it."""
+    template = TEMPLATES.get(visualization_type or "")
+    if template is None:
+        return None
+    try:
+        return template(parameters or {})
+    except Exception as e:
+        # Parameters the MCP schema would reject or coerce; leave those to the LLM
+        logger.info(f"No templated explanation for {visualization_type}: {e!r}")
+        return None
+
+
+# -----------------
+# Persistent store
+# -----------------
+
+class ExplanationStore:
+    """
+    SQLite table of LLM explanations keyed by explanation_key(). Lookups are a
+    primary-key read of a local file, well under a millisecond; explanations
+    survive restarts and are shared by every backend process pointed at it.
+    """
+
+    def __init__(self, path: str = EXPLANATION_DB):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS explanations ("
+            " key TEXT PRIMARY KEY, visualization_type TEXT, parameters TEXT,"
+            " explanation TEXT NOT NULL, source TEXT, created REAL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT explanation FROM explanations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, visualization_type: str, parameters: Dict[str, Any], explanation: str, source: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?, ?)",
+                (key, visualization_type, json.dumps(parameters, sort_keys=True), explanation, source, time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+# ---------------
+# CLI: generate explanations ahead of time for the requests we see most
+# ---------------
+
+def preset_requests(presets_file: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Refined requests worth having explanations for: what the intent fast path
+    produces for its training prompts (those exact requests recur, since the
+    fast path is deterministic), each scene with its default parameters, and
+    any refined requests listed one per line in `presets_file`.
+    """
+    from intent import DEFAULT_TRAINING_FILE, DESCRIPTIONS, IntentRouter
+
+    router = IntentRouter()
+    requests = []
+    with open(DEFAULT_TRAINING_FILE) as f:
+        for line in f:
+            if line.strip():
+                match = router.route(json.loads(line)["prompt"])
+                if match is not None:
+                    requests.append(match.to_request())
+    requests += [{"visualization_type": t, "parameters": {}, "description": d} for t, d in DESCRIPTIONS.items()]
+    if presets_file:
+        with open(presets_file) as f:
+            requests += [json.loads(line) for line in f if line.strip()]
+
+    unique = {}
+    for r in requests:
+        unique.setdefault(explanation_key(r.get("visualization_type"), r.get("parameters")), r)
+    return list(unique.values())
+
+
+async def prepared_requests(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The requests with the parameters the MCP server would render (its
+    POST /prepare), which is what live explanations are keyed on. Requests it
+    rejects are dropped.
+    """
+    import httpx
+    from render_farm import RenderFarm
+
+    farm = RenderFarm.from_env()
+    if not farm:
+        raise SystemExit("Set MANIM_MCP_URL: prewarming needs the MCP server to normalize requests")
+    url = f"{farm.nodes[0].url}/prepare"
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def one(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            body = {"type": request.get("visualization_type"), "parameters": request.get("parameters", {})}
+            resp = await client.post(url, json=body)
+            if resp.status_code == 422:
+                logger.warning(f"MCP server rejected preset {body}: {resp.text}")
+                return None
+            resp.raise_for_status()
+            return {**request, "parameters": resp.json()["parameters"]}
+
+        prepared = await asyncio.gather(*(one(r) for r in requests))
+
+    unique = {}
+    for r in prepared:
+        if r is not None:
+            unique.setdefault(explanation_key(r.get("visualization_type"), r.get("parameters")), r)
+    return list(unique.values())
+
+
+async def prewarm(requests: List[Dict[str, Any]], force: bool = False) -> Dict[str, Any]:
+    from llm import LLMService
+
+    requests = await prepared_requests(requests)
+    service = LLMService()
+    if service.use_mock:
+        raise SystemExit("No LLM configured (set OPENAI_API_KEY or USE_OLLAMA); nothing to prewarm with")
+    if service.explanations is None:
+        raise SystemExit("EXPLANATION_DB is empty; there is no store to prewarm")
+    counts = {"requests": len(requests), "templated": 0, "cached": 0, "generated": 0, "failed": 0}
+
+    async def one(request: Dict[str, Any]) -> None:
+        vis_type, params = request.get("visualization_type"), request.get("parameters", {})
+        if service.explain_templates and templated_explanation(vis_type, params) is not None:
+            counts["templated"] += 1
+            return
+        key = explanation_key(vis_type, params)
+        if not force and service.explanations.get(key) is not None:
+            counts["cached"] += 1
+            return
+        try:
+            text = await service.explain_with_llm(request, request.get("description") or vis_type)
+        except Exception as e:
+            logger.warning(f"Prewarm failed for {vis_type} {params}: {e!r}")
+            counts["failed"] += 1
+            return
+        service.explanations.put(key, vis_type, params, text, "prewarm")
+        counts["generated"] += 1
+
+    # LLM_CONCURRENCY bounds how many of these are in flight at once
+    await asyncio.gather(*(one(r) for r in requests))
+    return {**counts, "store": service.explanations.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and store explanations for common refined requests")
+    parser.add_argument("--presets", help="JSONL of extra refined requests ({visualization_type, parameters, description})")
+    parser.add_argument("--force", action="store_true", help="Regenerate explanations that are already stored")
+    parser.add_argument("--list", action="store_true", help="Print the requests that would be prewarmed and exit")
+    args = parser.parse_args()
+
+    requests = preset_requests(args.presets)
+    if args.list:
+        for r in requests:
+            print(json.dumps(r))
+        return
+    result = asyncio.run(prewarm(requests, force=args.force))
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
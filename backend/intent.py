@@ -0,0 +1,417 @@
+import os
+import re
+import ast
+import json
+import math
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.singleflight import canonical_request_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRAINING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_prompts.jsonl")
+
+STOPWORDS = {
+    "a", "an", "the", "me", "show", "visualize", "visualise", "animate", "draw", "display", "please",
+    "how", "what", "of", "for", "to", "with", "and", "in", "on", "is", "it", "can", "you", "i", "want",
+    "see", "make", "create", "some", "this", "that", "using", "use", "by", "as", "at", "from", "my",
+}
+
+DESCRIPTIONS = {
+    "fourier_series": "Fourier series approximation of a square wave using odd harmonics",
+    "activation_function": "Plot of a neural network activation function",
+    "backpropagation": "Forward and backward pass through a small neural network",
+    "convolution": "2D convolution of an input matrix with a sliding kernel",
+    "feedforward_nn": "Structure of a feedforward neural network",
+    "gradient_descent": "Gradient descent steps on a 2D function",
+    "histogram_sampling": "Histogram of samples drawn from a normal distribution",
+    "linear_transform": "Linear transformation of the plane by a 2x2 matrix",
+    "linear_transform_3d": "Linear transformation of 3D space by a 3x3 matrix",
+    "loss_landscape": "3D surface of a loss function",
+    "normal_distribution": "Probability density of a normal distribution",
+    "parametric_curve": "Parametric curve traced in the plane",
+    "plot_function": "Plot of a function of x",
+    "pooling": "Pooling over an input matrix with a sliding window",
+    "vector": "2D vectors and their sum on a coordinate plane",
+}
+
+# Only these names may appear in an extracted expression (mirrors the scenes' SAFE_NS)
+SAFE_NAMES = {"sin", "cos", "tan", "exp", "log", "sqrt", "pi", "e", "abs"}
+NUMBER = r"-?\d+(?:\.\d+)?"
+
+# Text that carries a parameter value: if any is left once extraction is done, the prompt asked for
+# something the fast path did not read, and it goes to the LLM
+PARAMETER_TEXT = re.compile(
+    r"\d|[\[\]()=^*/+]|\b(?:sin|cos|tan|exp|log|sqrt|pi|abs|squared|cubed|minus|plus|times|divided|power)\b",
+    re.IGNORECASE,
+)
+# Dimensions such as "2D" or "3x3" name the kind of scene, not a value
+SHAPE_TEXT = re.compile(r"\b\d+\s*d\b|\b\d+\s*x\s*\d+\b", re.IGNORECASE)
+
+Span = Tuple[int, int]
+# A value read off a prompt and the span it was read from
+Found = Tuple[Any, Span]
+
+
+def tokenize(text: str) -> List[str]:
+    words = [w for w in re.findall(r"[a-z]{2,}", text.lower()) if w not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+@dataclass
+class IntentMatch:
+    visualization_type: str
+    confidence: float
+    parameters: Dict[str, Any] = field(default_factory=dict)
+
+    def to_request(self) -> Dict[str, Any]:
+        return {
+            "visualization_type": self.visualization_type,
+            "parameters": self.parameters,
+            "description": DESCRIPTIONS.get(self.visualization_type, "Visualization"),
+        }
+
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams, trained from a
+    JSONL file of {"prompt", "label"} rows whose labels are the MCP SCENE_KEYs.
+    Runs in a few microseconds per prompt, so it can sit in front of the LLM.
+    predict() only answers when the prompt's parameters were read in full.
+    """
+
+    def __init__(self, training_file: str = DEFAULT_TRAINING_FILE, alpha: float = 0.5):
+        self.alpha = alpha
+        self.class_counts: Counter = Counter()
+        self.token_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.vocab: set = set()
+        self._load(training_file)
+
+    @property
+    def labels(self) -> List[str]:
+        return sorted(self.class_counts)
+
+    def _load(self, path: str) -> None:
+        if not os.path.exists(path):
+            logger.warning(f"Intent training file not found: {path}; fast path disabled")
+            return
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                self.train(row["prompt"], row["label"])
+
+    def train(self, prompt: str, label: str) -> None:
+        tokens = tokenize(prompt)
+        self.class_counts[label] += 1
+        self.token_counts[label].update(tokens)
+        self.vocab.update(tokens)
+
+    def predict(self, prompt: str) -> Optional[IntentMatch]:
+        tokens = [t for t in tokenize(prompt) if t in self.vocab]
+        if not tokens or not self.class_counts:
+            return None
+
+        total_docs = sum(self.class_counts.values())
+        vocab_size = len(self.vocab)
+        scores: Dict[str, float] = {}
+        for label, n_docs in self.class_counts.items():
+            counts = self.token_counts[label]
+            denom = sum(counts.values()) + self.alpha * vocab_size
+            score = math.log(n_docs / total_docs)
+            for t in tokens:
+                score += math.log((counts[t] + self.alpha) / denom)
+            scores[label] = score
+
+        best = max(scores, key=scores.get)
+        # Softmax over the log scores gives a posterior-style confidence
+        top = scores[best]
+        norm = sum(math.exp(s - top) for s in scores.values())
+        spans: List[Span] = []
+        parameters = extract_parameters(best, prompt, spans)
+        if not fully_read(prompt, spans):
+            # Numbers or maths the extractor could not place: a fast answer would render the wrong values
+            return None
+        return IntentMatch(best, 1.0 / norm, parameters)
+
+
+# -----------------
+# Parameter extraction
+# -----------------
+
+def _literal(text: str) -> Any:
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+
+
+def _matrices(prompt: str) -> List[Found]:
+    found = []
+    for m in re.finditer(r"\[\s*\[[^\[\]]*\](?:\s*,\s*\[[^\[\]]*\])*\s*\]", prompt):
+        value = _literal(m.group(0))
+        if isinstance(value, list) and value and all(isinstance(r, list) and r for r in value):
+            if len({len(r) for r in value}) == 1:
+                found.append((value, m.span()))
+    return found
+
+
+def _flat_lists(prompt: str) -> List[Found]:
+    # Blank out nested lists without shifting the rest, so spans still index the prompt
+    stripped = re.sub(r"\[\s*\[.*?\]\s*\]", lambda m: " " * len(m.group(0)), prompt)
+    lists = []
+    for m in re.finditer(rf"[\[(]\s*{NUMBER}(?:\s*,\s*{NUMBER})+\s*[\])]", stripped):
+        value = _literal(m.group(0).replace("(", "[").replace(")", "]"))
+        if isinstance(value, list):
+            lists.append((value, m.span()))
+    return lists
+
+
+def _number_after(prompt: str, *names: str) -> Optional[Found]:
+    pattern = rf"(?:{'|'.join(names)})\s*(?:=|:|of|is)?\s*({NUMBER})"
+    m = re.search(pattern, prompt, re.IGNORECASE)
+    return (float(m.group(1)), m.span()) if m else None
+
+
+def _count_before(prompt: str, *nouns: str) -> Optional[Found]:
+    m = re.search(rf"(\d+)\s*(?:{'|'.join(nouns)})", prompt)
+    return (int(m.group(1)), m.span()) if m else None
+
+
+def _expression(prompt: str, variables: str) -> Optional[Found]:
+    # Rewritten in place (padded to the same length) so spans still index the prompt
+    for word, power in (("squared", 2), ("cubed", 3)):
+        prompt = re.sub(rf"\b([a-z])\s+{word}\b", lambda m: f"{m.group(1)}**{power}".ljust(len(m.group(0))),
+                        prompt, flags=re.IGNORECASE)
+    m = re.search(r"(?:f\s*\([a-z, ]+\)|y|z)\s*=\s*([^,;]+)", prompt, re.IGNORECASE)
+    if m:
+        return _expression_at(m, variables)
+    # Otherwise take the longest run of expression-like text that mentions a variable
+    names = "|".join(sorted(SAFE_NAMES) + list(variables))
+    runs = re.finditer(rf"(?:\b(?:{names})\b|\d+(?:\.\d+)?|\*\*|[+\-*/^(). ])+", prompt, re.IGNORECASE)
+    for run in sorted(runs, key=lambda r: len(r.group(0)), reverse=True):
+        found = _expression_at(run, variables, group=0)
+        if found:
+            return found
+    return None
+
+
+def _expression_at(m: re.Match, variables: str, group: int = 1) -> Optional[Found]:
+    """The safe expression in `m.group(group)`, spanning from the start of the match to the end of the expression."""
+    expr = _safe_expression(m.group(group), variables)
+    if not expr:
+        return None
+    raw = m.group(group)
+    kept = _trim(raw)
+    return expr, (m.start(), m.start(group) + raw.find(kept) + len(kept))
+
+
+def _trim(expr: str) -> str:
+    expr = re.sub(r"\b(from|over|between|for|on|with|using|and|where)\b.*$", "", expr)
+    return expr.strip().rstrip(".").strip()
+
+
+def _safe_expression(expr: str, variables: str) -> Optional[str]:
+    expr = re.sub(r"\s+", " ", _trim(expr).replace("^", "**"))
+    if not expr or not re.fullmatch(r"[a-z0-9_+\-*/(). ]+", expr, re.IGNORECASE):
+        return None
+    names = set(re.findall(r"[a-z_]+", expr, re.IGNORECASE))
+    if not names <= SAFE_NAMES | set(variables) or not names & set(variables):
+        return None
+    try:
+        compile(expr, "<expr>", "eval")
+    except SyntaxError:
+        return None
+    return expr
+
+
+def unread_text(prompt: str, spans: List[Span]) -> str:
+    """`prompt` with the spans that were read into parameters blanked out."""
+    chars = list(prompt)
+    for start, end in spans:
+        chars[start:end] = " " * (end - start)
+    return "".join(chars)
+
+
+def fully_read(prompt: str, spans: List[Span]) -> bool:
+    """True when nothing that looks like a parameter value is left outside `spans`."""
+    return not PARAMETER_TEXT.search(SHAPE_TEXT.sub(" ", unread_text(prompt, spans)))
+
+
+def extract_parameters(scene: str, prompt: str, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+    """
+    Pull the parameters that are easy to read off a prompt; the scene defaults
+    cover the rest. The spans of `prompt` each parameter was read from are
+    appended to `spans`, so the caller can tell what was left unread.
+    """
+    text = prompt.lower()
+    params: Dict[str, Any] = {}
+    matrices = _matrices(prompt)
+    lists = _flat_lists(prompt)
+    spans = [] if spans is None else spans
+
+    def take(found: Found) -> Any:
+        spans.append(found[1])
+        return found[0]
+
+    if scene in ("linear_transform", "linear_transform_3d"):
+        side = 2 if scene == "linear_transform" else 3
+        square = [f for f in matrices if len(f[0]) == side and len(f[0][0]) == side]
+        if len(square) > 1:
+            params["matrices"] = [take(f) for f in square[:6]]
+        elif square:
+            params["matrix"] = take(square[0])
+        if "eigen" in text:
+            params["show_eigenvectors"] = True
+    elif scene == "convolution":
+        if matrices:
+            params["input_matrix"] = take(matrices[0])
+        if len(matrices) > 1:
+            params["kernel"] = take(matrices[1])
+        stride = _number_after(text, "stride")
+        if stride and int(stride[0]):
+            params["stride"] = int(take(stride))
+    elif scene == "pooling":
+        if matrices:
+            params["input_matrix"] = take(matrices[0])
+        if "avg" in text or "average" in text or "mean" in text:
+            params["pool_type"] = "avg"
+        elif "max" in text:
+            params["pool_type"] = "max"
+        size = _number_after(text, "kernel size", "window size", "kernel", "window", "size")
+        if size and int(size[0]):
+            params["kernel_size"] = int(take(size))
+        stride = _number_after(text, "stride")
+        if stride and int(stride[0]):
+            params["stride"] = int(take(stride))
+    elif scene in ("feedforward_nn", "backpropagation"):
+        layers = next((f for f in lists if all(float(n).is_integer() and n > 0 for n in f[0])), None)
+        if layers is None:
+            m = re.search(r"\b(\d+(?:\s*-\s*\d+)+)\b", text)
+            layers = ([int(n) for n in re.split(r"\s*-\s*", m.group(1))], m.span()) if m else None
+        if layers:
+            params["layers"] = [int(n) for n in take(layers)]
+        if scene == "feedforward_nn":
+            act = next((a for a in ("relu", "sigmoid", "tanh", "linear") if a in text), None)
+            if act:
+                params["activation"] = act
+        else:
+            lr = _number_after(text, "learning rate", "lr", "eta")
+            if lr is not None:
+                params["learning_rate"] = take(lr)
+    elif scene == "activation_function":
+        act = next((a for a in ("relu", "sigmoid", "tanh") if a in text), None)
+        if act:
+            params["function"] = act
+    elif scene in ("gradient_descent", "loss_landscape"):
+        expr = _expression(prompt, "xy")
+        if expr:
+            params["function"] = take(expr)
+        if scene == "gradient_descent":
+            lr = _number_after(text, "learning rate", "lr", "step size", "eta")
+            if lr is not None:
+                params["learning_rate"] = take(lr)
+            steps = _count_before(text, "steps", "iterations") or _number_after(text, "steps", "iterations")
+            if steps and int(steps[0]):
+                params["steps"] = int(take(steps))
+            start = next((f for f in lists if len(f[0]) == 2), None)
+            if start:
+                params["start_point"] = [float(v) for v in take(start)]
+    elif scene in ("normal_distribution", "histogram_sampling"):
+        mean = _number_after(text, "mean", "mu", "centered at", "centred at")
+        std = _number_after(text, "standard deviation", "std", "sigma", "stddev")
+        if mean is not None:
+            params["mean"] = take(mean)
+        if std is not None and std[0] > 0:
+            params["std"] = take(std)
+        if scene == "histogram_sampling":
+            n = _count_before(text, "samples") or _number_after(text, r"\bn")
+            if n and int(n[0]):
+                params["n"] = int(take(n))
+            bins = _count_before(text, "bins") or _number_after(text, "bins")
+            if bins and int(bins[0]):
+                params["bins"] = int(take(bins))
+    elif scene == "plot_function":
+        expr = _expression(prompt, "x")
+        if expr:
+            params["expression"] = take(expr)
+    elif scene == "parametric_curve":
+        mx = re.search(r"x\s*\(\s*t\s*\)\s*=\s*([^,;]+)", prompt, re.IGNORECASE)
+        my = re.search(r"y\s*\(\s*t\s*\)\s*=\s*([^,;]+)", prompt, re.IGNORECASE)
+        x_expr = _expression_at(mx, "t") if mx else None
+        y_expr = _expression_at(my, "t") if my else None
+        if x_expr and y_expr:
+            params["x_of_t"] = take(x_expr)
+            params["y_of_t"] = take(y_expr)
+    elif scene == "vector":
+        vectors = [f for f in lists if len(f[0]) == 2]
+        if vectors:
+            params["vectors"] = [take(f) for f in vectors]
+    elif scene == "fourier_series":
+        terms = _count_before(text, "terms", "harmonics")
+        if terms:
+            params["terms"] = [2 * k + 1 for k in range(min(take(terms), 50))]
+        elif lists:
+            params["terms"] = [int(k) for k in take(lists[0]) if float(k).is_integer() and k > 0]
+
+    return params
+
+
+class IntentRouter:
+    """
+    Decides whether a prompt can skip the LLM and keeps the numbers that tell
+    us how often it does (coverage) and how often it agrees with the LLM when
+    both run (shadow mode).
+    """
+
+    def __init__(self, classifier: Optional[IntentClassifier] = None):
+        self.classifier = classifier or IntentClassifier()
+        self.threshold = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.9"))
+        self.shadow = os.getenv("INTENT_SHADOW_MODE", "false").lower() == "true"
+        self.enabled = os.getenv("INTENT_FAST_PATH", "true").lower() == "true"
+        self.total = 0
+        self.fast_path = 0
+        self.shadow_compared = 0
+        self.shadow_agreed = 0
+
+    def route(self, prompt: str) -> Optional[IntentMatch]:
+        """Return a confident match, or None when the prompt should go to the LLM."""
+        self.total += 1
+        if not self.enabled:
+            return None
+        match = self.classifier.predict(prompt)
+        if match is None or match.confidence < self.threshold:
+            return None
+        self.fast_path += 1
+        return match
+
+    def record_shadow(self, match: IntentMatch, llm_request: Dict[str, Any]) -> None:
+        """Agreement means the same render: same type and the same parameters, not just the same scene."""
+        self.shadow_compared += 1
+        llm_type, llm_params = llm_request.get("visualization_type"), llm_request.get("parameters", {})
+        agreed = canonical_request_key(match.visualization_type, match.parameters) == \
+            canonical_request_key(llm_type, llm_params)
+        if agreed:
+            self.shadow_agreed += 1
+        else:
+            logger.info(
+                f"Intent shadow disagreement: fast path {match.visualization_type} {match.parameters} "
+                f"({match.confidence:.2f}) vs LLM {llm_type} {llm_params}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "shadow_mode": self.shadow,
+            "threshold": self.threshold,
+            "prompts": self.total,
+            "fast_path": self.fast_path,
+            "coverage": round(self.fast_path / self.total, 3) if self.total else 0.0,
+            "shadow_compared": self.shadow_compared,
+            "shadow_agreement": round(self.shadow_agreed / self.shadow_compared, 3) if self.shadow_compared else None,
+        }
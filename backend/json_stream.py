@@ -0,0 +1,92 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
+
+class JSONStreamParser:
+    """
+    Finds the first complete top-level JSON object or array in text that
+    arrives in pieces, such as a streamed LLM answer. Text before it (a code
+    fence, "Here is the JSON:") and anything after it is ignored, so the
+    caller can stop reading as soon as `feed` returns True.
+
+    For an object, `on_member` is called with the top-level members parsed so
+    far each time another one completes, before the closing brace arrives.
+    """
+
+    def __init__(self, on_member: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_member = on_member
+        self.text = ""
+        self.done = False
+        self.value: Any = None
+        self.members: Dict[str, Any] = {}
+        self._pos = 0
+        self._reset(-1)
+
+    def _reset(self, start: int) -> None:
+        self._start = start
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object = False
+
+    def _complete_members(self, end: int) -> None:
+        try:
+            members = json.loads(self.text[self._start:end] + "}")
+        except ValueError:
+            return
+        if isinstance(members, dict) and len(members) > len(self.members):
+            self.members = members
+            if self.on_member:
+                self.on_member(members)
+
+    def feed(self, chunk: str) -> bool:
+        """Add text; True once a complete value has been parsed (it is in `value`)."""
+        if self.done:
+            return True
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text):
+            c = text[self._pos]
+            if self._start < 0:
+                if c in "{[":
+                    self._reset(self._pos)
+                    self._depth = 1
+                    self._object = c == "{"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        self.value = json.loads(text[self._start:self._pos + 1])
+                    except ValueError:
+                        # A brace in the preamble, not the answer; look again after it
+                        self._pos = self._start + 1
+                        self.members = {}
+                        self._reset(-1)
+                        continue
+                    self.done = True
+                    if self._object and len(self.value) > len(self.members):
+                        self.members = self.value
+                        if self.on_member:
+                            self.on_member(self.value)
+                    return True
+            elif c == "," and self._depth == 1 and self._object:
+                self._complete_members(self._pos)
+            self._pos += 1
+        return False
+
+    def result(self) -> Any:
+        """The parsed value; raises JSONDecodeError when the text held no complete JSON value."""
+        if not self.done:
+            raise json.JSONDecodeError("No complete JSON value in response", self.text, len(self.text))
+        return self.value
@@ -1,12 +1,64 @@
 import os
 import json
+import asyncio
 import httpx
-from typing import Dict, Any
-from openai import OpenAI
+from typing import Callable, Dict, Any, List, Optional
+from openai import AsyncOpenAI
 import logging
+from intent import DESCRIPTIONS, IntentMatch, IntentRouter
+from circuit_breaker import CircuitBreaker
+from json_stream import JSONStreamParser
+from explanations import EXPLANATION_DB, EXPLANATION_TEMPLATES, ExplanationStore, explanation_key, templated_explanation
+from shared import tracing
+from shared.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+REFINE_SYSTEM_PROMPT = """You are an expert at converting natural language descriptions into structured requests for mathematical visualizations using Manim.
+
+            Given a user's natural language prompt, convert it into a JSON object with the following structure:
+            {
+                "visualization_type": one of the types listed below,
+                "parameters": {
+                    // specific parameters for the visualization type
+                },
+                "description": "A clear description of what will be visualized"
+            }
+
+            Visualization types and their parameters:
+            1. fourier_series: {"terms": [1,3,5,7,9]}
+            2. linear_transform: {"matrix": [[2,1],[1,2]], "show_basis": true, "show_eigenvectors": false}
+               (or "matrices": [[[0,-1],[1,0]], [[2,0],[0,1]]] to apply several in order; "show_inverse": true to undo them;
+               "eigenbasis": true to first change to the matrix's eigenbasis)
+            3. plot_function: {"expression": "sin(x)", "x_min": 0, "x_max": 6.28}
+            4. parametric_curve: {"x_of_t": "cos(t)", "y_of_t": "sin(t)", "t_min": 0, "t_max": 6.28}
+            5. vector: {"vectors": [[2,1],[-1,2]]}
+            6. normal_distribution: {"mean": 0, "std": 1}
+            7. histogram_sampling: {"mean": 0, "std": 1, "n": 500, "bins": 20}
+            8. activation_function: {"function": "sigmoid" | "relu" | "tanh"}
+            9. feedforward_nn: {"layers": [3,4,2], "activation": "relu"}
+            10. backpropagation: {"layers": [3,4,2], "learning_rate": 0.1}
+            11. gradient_descent: {"function": "(x-1)**2 + (y+2)**2", "start_point": [3,3], "learning_rate": 0.1, "steps": 20}
+            12. loss_landscape: {"function": "(x-1)**2 + (y+2)**2"}
+            13. convolution: {"input_matrix": [[1,2,3],[4,5,6],[7,8,9]], "kernel": [[1,0],[0,-1]], "stride": 1}
+            14. pooling: {"pool_type": "max" | "avg", "kernel_size": 2, "input_matrix": [[1,2],[3,4]]}
+            15. linear_transform_3d: {"matrix": [[1,1,0],[0,1,0],[0,0,2]], "show_basis": true} (same options as linear_transform, with 3x3 matrices)
+
+            Examples:
+            - "Show me how a Fourier series builds a square wave" → fourier_series
+            - "Visualize a 2x2 matrix transformation" → linear_transform
+            - "Plot the function x squared" → plot_function with expression "x**2"
+
+            Respond only with valid JSON."""
+
+# A streamed refinement can start its render once these are complete, before "description"
+EARLY_START_TYPES = set(DESCRIPTIONS)
+
+BATCH_INSTRUCTION = (
+    "You will receive a JSON array of {n} prompts. Convert each one as described above and "
+    "respond only with a JSON array of {n} objects, in the same order as the prompts."
+)
+
 class LLMService:
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -19,58 +71,209 @@ class LLMService:
         else:
             self.use_mock = False
             
+        # Per-call timeout so a dead provider cannot hold requests open
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
         if not self.use_ollama and self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = AsyncOpenAI(api_key=self.openai_api_key, timeout=self.llm_timeout)
+
+        # Fails LLM calls fast while the provider is down; unparseable answers don't count
+        self.llm_breaker = CircuitBreaker.from_env(
+            "ollama" if self.use_ollama else "openai",
+            is_failure=lambda e: not isinstance(e, json.JSONDecodeError),
+        )
+
+        # Caps concurrent LLM calls; batch refinement also packs prompts per call
+        self.llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "4")))
+        self.batch_size = int(os.getenv("LLM_BATCH_SIZE", "8"))
 
-    async def refine_prompt(self, user_prompt: str) -> Dict[str, Any]:
+        # Local classifier that answers obvious prompts without an LLM round trip
+        self.intent_router = IntentRouter()
+
+        # Refinements answered from a streamed prefix: renders started before the
+        # answer was complete, and streams closed before the model stopped talking
+        self.early_starts = 0
+        self.streams_cut_off = 0
+
+        # Explanations depend only on what is rendered: common scenes are filled in
+        # from templates, the rest are kept in a persistent store (EXPLANATION_DB="" disables it)
+        self.explain_templates = EXPLANATION_TEMPLATES
+        self.explanations = ExplanationStore(EXPLANATION_DB) if EXPLANATION_DB else None
+        self.explain_inflight = SingleFlight()
+        self.templated_explanations = 0
+
+    async def refine_prompt(self, user_prompt: str,
+                            on_ready: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Refine a natural language prompt into a structured request for Manim visualization.
+
+        The LLM answer is streamed; `on_ready` is called with the request's
+        visualization_type and parameters as soon as both have arrived (and the
+        type is a known scene), so the caller can start rendering while the
+        description is still being generated. Not called on the fast path.
         """
-        system_prompt = """You are an expert at converting natural language descriptions into structured requests for mathematical visualizations using Manim.
+        fast = self.intent_router.route(user_prompt)
+        if fast is not None and (self.use_mock or not self.intent_router.shadow):
+            logger.info(f"Intent fast path: {fast.visualization_type} ({fast.confidence:.2f})")
+            return fast.to_request()
 
-            Given a user's natural language prompt, convert it into a JSON object with the following structure:
-            {
-                "visualization_type": "fourier_series" | "linear_transform" | "function_plot" | "taylor_series" | "eigenvalue_demo",
-                "parameters": {
-                    // specific parameters for the visualization type
-                },
-                "description": "A clear description of what will be visualized"
-            }
+        if self.use_mock:
+            return self._get_mock_response(user_prompt)
+        return await self._refine_with_llm(user_prompt, fast, on_ready)
 
-            Visualization types and their parameters:
-            1. fourier_series: {"terms": [1,3,5,7,9], "target_function": "square_wave"}
-            2. linear_transform: {"matrix": [[2,1],[1,2]], "show_eigenvectors": true}
-            3. function_plot: {"expression": "x**2", "x_range": [-3,3]}
-            4. taylor_series: {"function": "exp(x)", "center": 0, "terms": 5}
-            5. eigenvalue_demo: {"matrix": [[2,1],[1,2]]}
+    def _early_start(self, on_ready: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], None]:
+        """Member callback for the stream parser that fires `on_ready` once."""
+        fired = [False]
 
-            Examples:
-            - "Show me how a Fourier series builds a square wave" → fourier_series with square_wave
-            - "Visualize a 2x2 matrix transformation" → linear_transform
-            - "Plot the function x squared" → function_plot
+        def on_member(members: Dict[str, Any]) -> None:
+            if fired[0] or "parameters" not in members:
+                return
+            fired[0] = True
+            if members.get("visualization_type") in EARLY_START_TYPES and isinstance(members["parameters"], dict):
+                self.early_starts += 1
+                on_ready({"visualization_type": members["visualization_type"], "parameters": members["parameters"]})
 
-            Respond only with valid JSON."""
+        return on_member
 
-        if self.use_mock:
-            return self._get_mock_response(user_prompt)
-        
+    async def _refine_with_llm(self, user_prompt: str, fast: IntentMatch | None,
+                               on_ready: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         try:
-            if self.use_ollama:
-                return await self._call_ollama(system_prompt, user_prompt)
-            else:
-                return await self._call_openai(system_prompt, user_prompt)
+            refined = await self._call_llm(
+                REFINE_SYSTEM_PROMPT, user_prompt,
+                on_member=self._early_start(on_ready) if on_ready else None,
+            )
         except Exception as e:
             logger.error(f"Error calling LLM service: {e}")
-            return self._get_mock_response(user_prompt)
+            return fast.to_request() if fast is not None else self._get_mock_response(user_prompt)
+
+        if fast is not None:
+            # Shadow mode: the LLM answer is served, the fast path is only scored
+            self.intent_router.record_shadow(fast, refined)
+        return refined
+
+    async def refine_prompts(self, user_prompts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Refine many prompts at once. Fast-path prompts are answered locally; the
+        rest are packed `batch_size` to an LLM call and the calls run concurrently
+        under the LLM semaphore. A chunk whose answer cannot be matched back to
+        its prompts is retried one prompt at a time.
+        """
+        results: List[Dict[str, Any] | None] = [None] * len(user_prompts)
+        fast_matches: Dict[int, IntentMatch] = {}
+        pending: List[int] = []
+        for i, prompt in enumerate(user_prompts):
+            fast = self.intent_router.route(prompt)
+            if fast is not None and (self.use_mock or not self.intent_router.shadow):
+                results[i] = fast.to_request()
+            elif self.use_mock:
+                results[i] = self._get_mock_response(prompt)
+            else:
+                if fast is not None:
+                    fast_matches[i] = fast
+                pending.append(i)
+
+        async def refine_chunk(indices: List[int]) -> None:
+            prompts = [user_prompts[i] for i in indices]
+            try:
+                refined = await self._call_llm(
+                    REFINE_SYSTEM_PROMPT + "\n\n" + BATCH_INSTRUCTION.format(n=len(prompts)),
+                    json.dumps(prompts),
+                )
+                if isinstance(refined, dict) and len(prompts) == 1:
+                    refined = [refined]
+                if not isinstance(refined, list) or len(refined) != len(prompts) \
+                        or not all(isinstance(r, dict) for r in refined):
+                    raise ValueError("batched LLM response does not match the prompts")
+                for i, r in zip(indices, refined):
+                    results[i] = r
+                    if i in fast_matches:
+                        self.intent_router.record_shadow(fast_matches[i], r)
+            except Exception as e:
+                logger.warning(f"Batched refinement failed ({e}); refining {len(indices)} prompts individually")
+                singles = await asyncio.gather(*(
+                    self._refine_with_llm(user_prompts[i], fast_matches.get(i)) for i in indices
+                ))
+                for i, r in zip(indices, singles):
+                    results[i] = r
+
+        chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        await asyncio.gather(*(refine_chunk(c) for c in chunks))
+        return results
+
+    async def _call_llm(self, system_prompt: str, user_prompt: str,
+                        on_member: Optional[Callable[[Dict[str, Any]], None]] = None) -> Any:
+        """
+        Structured LLM call under the concurrency cap and the provider's circuit
+        breaker. The answer is streamed and parsed as it arrives; the stream is
+        closed as soon as the first JSON value is complete, and anything the
+        model says before or after it is ignored.
+        """
+        async def call():
+            async with self.llm_semaphore:
+                with tracing.span("llm.call", provider=self.llm_breaker.name, kind="json") as span:
+                    parser = JSONStreamParser(on_member)
+                    if self.use_ollama:
+                        cut_off = await self._call_ollama(system_prompt, user_prompt, parser)
+                    else:
+                        cut_off = await self._call_openai(system_prompt, user_prompt, parser)
+                    if cut_off:
+                        self.streams_cut_off += 1
+                    if span is not None:
+                        span["cut_off"] = cut_off
+                    return parser.result()
+        return await self.llm_breaker.call(call)
+
+    async def _call_llm_for_text(self, system_prompt: str, user_prompt: str) -> str:
+        async def call():
+            async with self.llm_semaphore:
+                with tracing.span("llm.call", provider=self.llm_breaker.name, kind="text"):
+                    if self.use_ollama:
+                        return await self._call_ollama_for_text(system_prompt, user_prompt)
+                    return await self._call_openai_for_text(system_prompt, user_prompt)
+        return await self.llm_breaker.call(call)
 
     async def generate_explanation(self, refined_request: Dict[str, Any], user_prompt: str) -> str:
         """
         Generate a concise, educational explanation for the visualization and topic.
+        Pass the parameters as rendered (see main._as_rendered): they are what
+        templates describe and what stored explanations are keyed on.
         """
         vis_type = refined_request.get("visualization_type", "unknown")
         params = refined_request.get("parameters", {})
         description = refined_request.get("description") or user_prompt
 
+        if self.explain_templates:
+            templated = templated_explanation(vis_type, params)
+            if templated is not None:
+                self.templated_explanations += 1
+                return templated
+        if self.use_mock:
+            return self._mock_explanation(vis_type, params, description)
+
+        key = explanation_key(vis_type, params)
+        if self.explanations is not None:
+            stored = await asyncio.to_thread(self.explanations.get, key)
+            if stored is not None:
+                return stored
+
+        async def generate() -> str:
+            text = await self.explain_with_llm(refined_request, user_prompt)
+            if self.explanations is not None:
+                await asyncio.to_thread(self.explanations.put, key, vis_type, params, text, "llm")
+            return text
+
+        try:
+            # Identical requests arriving together share one LLM call
+            return await self.explain_inflight.do(key, generate)
+        except Exception as e:
+            logger.error(f"Error generating explanation: {e}")
+            return self._mock_explanation(vis_type, params, description)
+
+    async def explain_with_llm(self, refined_request: Dict[str, Any], user_prompt: str) -> str:
+        """One LLM call for an explanation, bypassing templates and the store."""
+        vis_type = refined_request.get("visualization_type", "unknown")
+        params = refined_request.get("parameters", {})
+        description = refined_request.get("description") or user_prompt
+
         system_prompt = (
             "You are an expert math tutor. Explain clearly and concisely what the visualization shows, "
             "including the underlying math and how to interpret the animation. Use approachable language and "
@@ -82,21 +285,18 @@ class LLMService:
             "parameters": params,
             "description": description,
         })
+        return await self._call_llm_for_text(system_prompt, user_instruction)
 
-        if self.use_mock:
-            return self._mock_explanation(vis_type, params, description)
-
-        try:
-            if self.use_ollama:
-                return await self._call_ollama_for_text(system_prompt, user_instruction)
-            else:
-                return await self._call_openai_for_text(system_prompt, user_instruction)
-        except Exception as e:
-            logger.error(f"Error generating explanation: {e}")
-            return self._mock_explanation(vis_type, params, description)
+    def explanation_stats(self) -> Dict[str, Any]:
+        return {
+            "templates": self.explain_templates,
+            "templated": self.templated_explanations,
+            "coalesced": self.explain_inflight.coalesced,
+            "store": self.explanations.stats() if self.explanations is not None else None,
+        }
 
     async def _call_openai_for_text(self, system_prompt: str, user_prompt: str) -> str:
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -107,7 +307,7 @@ class LLMService:
         return response.choices[0].message.content.strip()
 
     async def _call_ollama_for_text(self, system_prompt: str, user_prompt: str) -> str:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=self.llm_timeout) as client:
             response = await client.post(
                 f"{self.ollama_url}/api/generate",
                 json={
@@ -153,34 +353,49 @@ class LLMService:
                 "as a simple scaling by the corresponding eigenvalue."
             )
         return description or "This animation visualizes the requested concept."
-    async def _call_openai(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
-        """Call OpenAI API"""
-        response = self.client.chat.completions.create(
+    async def _call_openai(self, system_prompt: str, user_prompt: str, parser: JSONStreamParser) -> bool:
+        """Stream from the OpenAI API into `parser`. True when the stream was closed before the model finished."""
+        stream = await self.client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            temperature=0.1
+            temperature=0.1,
+            stream=True,
         )
-        
-        content = response.choices[0].message.content
-        return json.loads(content)
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if parser.feed(choice.delta.content or ""):
+                    return choice.finish_reason is None
+            return False
+        finally:
+            # Closing the connection stops generation (and billing) for the rest
+            await stream.response.aclose()
 
-    async def _call_ollama(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
-        """Call local Ollama API"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+    async def _call_ollama(self, system_prompt: str, user_prompt: str, parser: JSONStreamParser) -> bool:
+        """Stream from the local Ollama API into `parser`. True when the stream was closed before the model finished."""
+        async with httpx.AsyncClient(timeout=self.llm_timeout) as client:
+            async with client.stream(
+                "POST",
                 f"{self.ollama_url}/api/generate",
                 json={
                     "model": "llama3.1:8b",
                     "prompt": f"{system_prompt}\n\nUser: {user_prompt}\nAssistant:",
-                    "stream": False
+                    "stream": True
                 }
-            )
-            response.raise_for_status()
-            content = response.json()["response"]
-            return json.loads(content)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    part = json.loads(line)
+                    if parser.feed(part.get("response", "")):
+                        return not part.get("done", False)
+        return False
 
     def _get_mock_response(self, user_prompt: str) -> Dict[str, Any]:
         """Generate mock responses for testing"""
@@ -1,11 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import os
+import sys
+import json
+import asyncio
 import logging
+
+# Modules shared between services live in <repo>/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
 from llm import LLMService
-from mcp_client import MCPClient
+from mcp_client import MCPClient, RenderBusyError
+from shared.singleflight import canonical_request_key
+from shared.artifact_store import artifact_store_from_env
+from video_delivery import poster_for, serve_render
+from shared import tracing
+from shared.loop_monitor import LoopLagMonitor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,13 +35,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for serving rendered videos
-os.makedirs("../renders", exist_ok=True)
-app.mount("/renders", StaticFiles(directory="../renders"), name="renders")
+# Rendered videos are served by serve_render (ranges, ETags, immutable caching)
+RENDERS_DIR = "../renders"
+os.makedirs(RENDERS_DIR, exist_ok=True)
+artifact_store = artifact_store_from_env(RENDERS_DIR)
+tracing.configure("backend", os.path.join(RENDERS_DIR, "traces_backend.jsonl"))
+
+# The MCP server's own lesson limit (MCP_MAX_LESSON_ITEMS); checked here before any prompt is refined
+MAX_LESSON_ITEMS = int(os.getenv("MCP_MAX_LESSON_ITEMS", "20"))
 
 # Initialize services
 llm_service = LLMService()
 mcp_client = MCPClient()
+# Anything blocking the event loop delays every request; /health reports how much
+loop_lag = LoopLagMonitor()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_lag.start()
 
 class PromptRequest(BaseModel):
     prompt: str
@@ -38,44 +62,243 @@ class VisualizationResponse(BaseModel):
     refined_prompt: str
     visualization_type: str
     explanation: str
+    poster_url: Optional[str] = None
+
+class BatchPromptRequest(BaseModel):
+    prompts: List[str]
+
+class LessonItemRequest(BaseModel):
+    prompt: str
+    # Shown on a title card before this item
+    title: Optional[str] = None
+
+class LessonPromptRequest(BaseModel):
+    items: List[LessonItemRequest] = Field(min_length=1, max_length=MAX_LESSON_ITEMS)
+    title: Optional[str] = None
+    subtitle: Optional[str] = None
+
+class LessonSegment(BaseModel):
+    prompt: str
+    refined_prompt: str
+    visualization_type: str
+
+class LessonResponse(BaseModel):
+    video_url: str
+    poster_url: Optional[str] = None
+    segments: List[LessonSegment]
 
 @app.get("/")
 async def root():
     return {"message": "Manim Visualizer API is running"}
 
 @app.post("/api/generate", response_model=VisualizationResponse)
-async def generate_visualization(request: PromptRequest):
+async def generate_visualization(request: PromptRequest, http_request: Request, response: Response):
+    with tracing.resume(http_request.headers.get(tracing.HEADER)) as trace, tracing.span("api.generate"):
+        if trace.sampled:
+            response.headers["X-Trace-Id"] = trace.trace_id
+        return await _generate(request, http_request)
+
+async def _generate(request: PromptRequest, http_request: Request) -> VisualizationResponse:
     try:
         logger.info(f"Received prompt: {request.prompt}")
         
-        # Step 1: Refine the prompt using LLM
-        refined_request = await llm_service.refine_prompt(request.prompt)
+        client_id = http_request.client.host if http_request.client else None
+
+        async def render(refined: dict) -> dict:
+            with tracing.span("render", type=refined.get("visualization_type")):
+                return await mcp_client.generate_visualization(refined, client_id=client_id)
+
+        # Step 1: Refine the prompt using LLM. The render starts as soon as the
+        # streamed answer has its type and parameters, while the description
+        # is still being generated
+        early: dict = {}
+
+        def on_ready(partial: dict) -> None:
+            early["request"] = partial
+            early["task"] = asyncio.ensure_future(render(partial))
+
+        try:
+            with tracing.span("refine"):
+                refined_request = await llm_service.refine_prompt(request.prompt, on_ready=on_ready)
+        except BaseException:
+            if "task" in early:
+                _abandon(early["task"])
+            raise
         logger.info(f"Refined request: {refined_request}")
         
-        # Step 2: Generate visualization using MCP
-        video_path = await mcp_client.generate_visualization(refined_request)
+        # Step 2: Generate visualization using MCP, unless the early start already is
+        render_task = early.get("task")
+        if render_task is not None and _request_key(early["request"]) != _request_key(refined_request):
+            # The final answer was normalized or fell back to something else
+            logger.info("Refined request differs from its streamed prefix; restarting render")
+            _abandon(render_task)
+            render_task = None
+        if render_task is None:
+            render_task = asyncio.ensure_future(render(refined_request))
+        rendered = await render_task
+        video_path = rendered["video_path"]
         logger.info(f"Generated video at: {video_path}")
         
-        # Step 2.5: Generate an educational explanation
-        explanation = await llm_service.generate_explanation(refined_request, request.prompt)
+        # Step 2.5: Generate an educational explanation of what was rendered
+        with tracing.span("explain"):
+            explanation = await llm_service.generate_explanation(_as_rendered(refined_request, rendered), request.prompt)
         
         # Step 3: Return the response
-        video_url = f"/renders/{os.path.basename(video_path)}"
+        video_name = os.path.basename(video_path)
+        video_url = f"/renders/{video_name}"
+        with tracing.span("poster"):
+            poster = await poster_for(artifact_store, RENDERS_DIR, video_name)
         
         return VisualizationResponse(
             video_url=video_url,
+            poster_url=f"/renders/{poster}" if poster else None,
             refined_prompt=refined_request.get("description", request.prompt),
             visualization_type=refined_request.get("visualization_type", "unknown"),
             explanation=explanation,
         )
         
+    except RenderBusyError as e:
+        logger.warning(f"Renderer busy, retry after {e.retry_after}s")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"Error generating visualization: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _request_key(refined: dict) -> str:
+    return canonical_request_key(refined.get("visualization_type"), refined.get("parameters", {}))
+
+def _as_rendered(refined: dict, rendered: dict) -> dict:
+    """
+    The refined request with the parameters the MCP server rendered: defaults
+    filled in and clamped to its budget, so equivalent requests share one
+    explanation and templates describe what the video shows.
+    """
+    if rendered.get("parameters") is None:
+        return refined
+    return {**refined, "parameters": rendered["parameters"]}
+
+def _abandon(task: asyncio.Task) -> None:
+    """Cancel a render nobody will wait for, without logging its outcome as unretrieved."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+@app.post("/api/generate/batch")
+async def generate_visualization_batch(request: BatchPromptRequest, http_request: Request):
+    """
+    Generate visualizations for a list of prompts. Streams NDJSON, one line per
+    prompt as its render completes, each carrying the prompt's index and status.
+    """
+    logger.info(f"Received batch of {len(request.prompts)} prompts")
+    refined_requests = await llm_service.refine_prompts(request.prompts)
+
+    # Prompts that refine to the same request share a single render
+    unique_keys: List[str] = []
+    unique_requests: List[dict] = []
+    prompts_by_key: dict = {}
+    for index, refined in enumerate(refined_requests):
+        key = canonical_request_key(refined.get("visualization_type"), refined.get("parameters", {}))
+        if key not in prompts_by_key:
+            prompts_by_key[key] = []
+            unique_keys.append(key)
+            unique_requests.append(refined)
+        prompts_by_key[key].append(index)
+    logger.info(f"Batch collapsed to {len(unique_requests)} unique renders")
+
+    client_id = http_request.client.host if http_request.client else None
+
+    async def results():
+        async for u, outcome in mcp_client.generate_batch(unique_requests, client_id=client_id):
+            refined = unique_requests[u]
+            item = {
+                "status": outcome["status"],
+                "refined_prompt": refined.get("description", ""),
+                "visualization_type": refined.get("visualization_type", "unknown"),
+            }
+            if outcome["status"] == "ok":
+                video_name = os.path.basename(outcome["video_path"])
+                # Explained once rendered, from the parameters the MCP server actually used
+                prompt = request.prompts[prompts_by_key[unique_keys[u]][0]]
+                poster, item["explanation"] = await asyncio.gather(
+                    poster_for(artifact_store, RENDERS_DIR, video_name),
+                    llm_service.generate_explanation(_as_rendered(refined, outcome), prompt),
+                )
+                item["video_url"] = f"/renders/{video_name}"
+                item["poster_url"] = f"/renders/{poster}" if poster else None
+            else:
+                item["error"] = outcome.get("error", "")
+                if "retry_after" in outcome:
+                    item["retry_after"] = outcome["retry_after"]
+            for index in prompts_by_key[unique_keys[u]]:
+                yield json.dumps({"index": index, "prompt": request.prompts[index], **item}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/api/generate/lesson", response_model=LessonResponse)
+async def generate_lesson(request: LessonPromptRequest, http_request: Request):
+    """
+    Refine each prompt and render them, in order and with optional title
+    cards, as one video. Segments are cached individually by the MCP server,
+    so editing one prompt of a lesson only re-renders that segment.
+    """
+    logger.info(f"Received lesson of {len(request.items)} prompts")
+    prompts = [item.prompt for item in request.items]
+    refined_requests = await llm_service.refine_prompts(prompts)
+    client_id = http_request.client.host if http_request.client else None
+    try:
+        result = await mcp_client.generate_lesson(
+            refined_requests,
+            [item.title for item in request.items],
+            title=request.title,
+            subtitle=request.subtitle,
+            client_id=client_id,
+        )
+    except RenderBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.error(f"Error generating lesson: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    video_name = result["artifact"]
+    poster = await poster_for(artifact_store, RENDERS_DIR, video_name)
+    return LessonResponse(
+        video_url=f"/renders/{video_name}",
+        poster_url=f"/renders/{poster}" if poster else None,
+        segments=[
+            LessonSegment(
+                prompt=prompt,
+                refined_prompt=refined.get("description", prompt),
+                visualization_type=refined.get("visualization_type", "unknown"),
+            )
+            for prompt, refined in zip(prompts, refined_requests)
+        ],
+    )
+
+@app.api_route("/renders/{name}", methods=["GET", "HEAD"])
+async def get_render(name: str, request: Request):
+    return await serve_render(artifact_store, RENDERS_DIR, name, request)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "coalesced_requests": mcp_client.coalesced_requests,
+        "intent": llm_service.intent_router.stats(),
+        "explanations": llm_service.explanation_stats(),
+        "llm_stream": {
+            "early_starts": llm_service.early_starts,
+            "cut_off": llm_service.streams_cut_off,
+        },
+        "breakers": {
+            "llm": llm_service.llm_breaker.stats(),
+            "mcp": mcp_client.breaker.stats(),
+        },
+        "render_farm": mcp_client.farm.stats() if mcp_client.farm else None,
+        "event_loop_lag": loop_lag.stats(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
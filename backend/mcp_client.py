@@ -1,58 +1,259 @@
 import os
+import re
 import json
 import asyncio
 import subprocess
-from typing import Dict, Any
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Tuple
 import logging
 import httpx
+from shared.singleflight import SingleFlight, canonical_request_key
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from render_farm import RenderFarm, RenderNode
+from shared import tracing
 
 logger = logging.getLogger(__name__)
 
+class RenderBusyError(Exception):
+    """The MCP server refused the render because its queue is full."""
+
+    def __init__(self, retry_after: int, detail: str = "Renderer is busy"):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+def counts_against_mcp(error: Exception) -> bool:
+    """Backpressure and rejected requests mean the renderer is up; only outages trip the breaker."""
+    if isinstance(error, RenderBusyError):
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+def marks_node_failed(error: Exception) -> bool:
+    """Down or crashed: take the node out of rotation. A render timeout doesn't, the node is only slow."""
+    return isinstance(error, (httpx.ConnectError, httpx.HTTPStatusError)) and counts_against_mcp(error)
+
 class MCPClient:
     def __init__(self):
         self.mcp_server_path = "../manim_mcp"
         self.renders_dir = "../renders"
         os.makedirs(self.renders_dir, exist_ok=True)
-        self.mcp_http_url = os.getenv("MANIM_MCP_URL")  # e.g., http://manim_mcp:9000
+        # MANIM_MCP_URLS=http://a:9000,http://b:9000 (or one MANIM_MCP_URL); unset means CLI mode
+        self.farm = RenderFarm.from_env()
+        # Covers queue wait on the MCP server as well as the render itself
+        self.mcp_timeout = float(os.getenv("MANIM_MCP_TIMEOUT", "300"))
+        # Identical requests that arrive while a render is running share it
+        self._inflight = SingleFlight()
+        # Fails renders fast (straight to a placeholder) while the MCP server is down
+        self.breaker = CircuitBreaker.from_env("manim_mcp", is_failure=counts_against_mcp)
+        # Placeholders are encoded once per type; concurrent first uses share the encode
+        self._placeholders = SingleFlight()
+
+    @property
+    def coalesced_requests(self) -> int:
+        return self._inflight.coalesced
 
-    async def generate_visualization(self, refined_request: Dict[str, Any]) -> str:
+    async def generate_visualization(self, refined_request: Dict[str, Any], client_id: str | None = None) -> Dict[str, Any]:
         """
         Generate a visualization using the Manim MCP server.
-        Returns the path to the generated video file.
+        Returns {"video_path"}, plus the "parameters" the MCP HTTP server
+        rendered (schema defaults filled in, clamped to its budget) when it
+        reports them; placeholders and CLI renders don't.
+        Raises RenderBusyError when the MCP server sheds load.
         """
         visualization_type = refined_request.get("visualization_type")
         parameters = refined_request.get("parameters", {})
-        
+        key = canonical_request_key(visualization_type, parameters)
+        return await self._inflight.do(key, lambda: self._generate(visualization_type, parameters, client_id))
+
+    async def _generate(self, visualization_type: str, parameters: Dict[str, Any], client_id: str | None = None) -> Dict[str, Any]:
         logger.info(f"Generating {visualization_type} with parameters: {parameters}")
         
         try:
-            if self.mcp_http_url:
-                video_path = await self._call_mcp_http(visualization_type, parameters)
-            else:
-                # CLI fallback
-                video_path = await self._call_mcp_server(visualization_type, parameters)
-            return video_path
+            if self.farm:
+                return await self.breaker.call(
+                    lambda: self._call_mcp_http(visualization_type, parameters, client_id)
+                )
+            # CLI fallback
+            video_path = await self.breaker.call(
+                lambda: self._call_mcp_server(visualization_type, parameters)
+            )
+            return {"video_path": video_path}
+        except CircuitOpenError as e:
+            logger.warning(f"{e}; serving placeholder")
+            return {"video_path": await self._create_placeholder_video(visualization_type)}
+        except RenderBusyError:
+            # Backpressure is the caller's to handle; a placeholder would hide it
+            raise
         except Exception as e:
             logger.error(f"Error generating visualization: {e}")
             # Return a placeholder video path for demo purposes
-            return await self._create_placeholder_video(visualization_type)
+            return {"video_path": await self._create_placeholder_video(visualization_type)}
+
+    async def generate_batch(self, refined_requests: List[Dict[str, Any]], client_id: str | None = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Render several refined requests as one batch. Yields (index, outcome) in
+        completion order, where outcome has a "status" of "ok" (with
+        "video_path" and, when the MCP server reports them, the rendered
+        "parameters"), "busy" (with "retry_after") or "error" (with "error").
+        """
+        if not self.farm:
+            # CLI mode has no batch entrypoint; run the renders side by side instead
+            async def one(index: int, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+                try:
+                    rendered = await self.generate_visualization(request, client_id=client_id)
+                    return index, {"status": "ok", **rendered}
+                except RenderBusyError as e:
+                    return index, {"status": "busy", "retry_after": e.retry_after, "error": str(e)}
+            for done in asyncio.as_completed([one(i, r) for i, r in enumerate(refined_requests)]):
+                yield await done
+            return
+
+        items = [
+            {"type": r.get("visualization_type"), "parameters": r.get("parameters", {})}
+            for r in refined_requests
+        ]
+        headers = tracing.inject({"X-Client-Id": client_id} if client_id else {})
+        try:
+            self.breaker.acquire()
+        except CircuitOpenError as e:
+            for index in range(len(refined_requests)):
+                yield index, {"status": "error", "error": str(e)}
+            return
+
+        # Each item goes to the node that owns its key; every node gets one sub-batch
+        groups: Dict[RenderNode, List[int]] = {}
+        for index, item in enumerate(items):
+            key = canonical_request_key(item["type"], item["parameters"])
+            groups.setdefault(self.farm.candidates(key)[0], []).append(index)
 
-    async def _call_mcp_http(self, visualization_type: str, parameters: Dict[str, Any]) -> str:
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def stream(client: httpx.AsyncClient, node: RenderNode, indices: List[int]) -> None:
+            try:
+                with self.farm.track(node):
+                    body = {"items": [items[i] for i in indices]}
+                    async with client.stream("POST", f"{node.url}/render/batch", json=body, headers=headers) as resp:
+                        resp.raise_for_status()
+                        async for line in resp.aiter_lines():
+                            if not line.strip():
+                                continue
+                            outcome = json.loads(line)
+                            await results.put((indices[outcome.pop("index")], outcome))
+            except Exception as e:
+                if marks_node_failed(e):
+                    self.farm.mark_failed(node)
+                await results.put((None, (indices, e)))
+            else:
+                await results.put((None, None))
+
+        reported = set()
+        error = None
+        tasks = []
+        try:
+            async with httpx.AsyncClient(timeout=self.mcp_timeout) as client:
+                tasks = [asyncio.ensure_future(stream(client, node, indices)) for node, indices in groups.items()]
+                pending = len(tasks)
+                while pending:
+                    index, outcome = await results.get()
+                    if index is not None:
+                        reported.add(index)
+                        yield index, outcome
+                        continue
+                    pending -= 1
+                    if outcome is None:
+                        continue
+                    indices, e = outcome
+                    error = error or e
+                    logger.error(f"Batch render failed: {e}")
+                    for index in indices:
+                        if index not in reported:
+                            yield index, {"status": "error", "error": f"Batch render failed: {e}"}
+        except Exception as e:
+            self.breaker.record(error or e)
+            raise
+        except BaseException:
+            # Closed by a disconnecting caller (GeneratorExit) or cancelled: no verdict on the MCP server
+            self.breaker.release()
+            raise
+        else:
+            self.breaker.record(error)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def generate_lesson(self, refined_requests: List[Dict[str, Any]], titles: List[str | None],
+                              title: str | None = None, subtitle: str | None = None,
+                              client_id: str | None = None) -> Dict[str, Any]:
+        """
+        Render refined requests as one lesson video, each optionally preceded by
+        a title card. Returns the MCP response (artifact, poster, segments).
+        Raises RenderBusyError when the MCP server sheds load; failures are not
+        papered over with a placeholder.
+        """
+        if not self.farm:
+            raise RuntimeError("Lessons need the MCP HTTP server (MANIM_MCP_URL)")
+        body = {
+            "items": [
+                {"type": r.get("visualization_type"), "parameters": r.get("parameters", {}), "title": t}
+                for r, t in zip(refined_requests, titles)
+            ],
+            "title": title,
+            "subtitle": subtitle,
+        }
+        key = canonical_request_key("lesson", body)
+        # Segments render one after another per slot, so allow each its own render time
+        timeout = self.mcp_timeout * len(refined_requests)
+        return await self.breaker.call(lambda: self._on_farm(
+            key, lambda url: self._post(url, "/render/lesson", body, client_id, timeout)
+        ))
+
+    async def _call_mcp_http(self, visualization_type: str, parameters: Dict[str, Any], client_id: str | None = None) -> Dict[str, Any]:
         """Call the MCP FastAPI server"""
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            resp = await client.post(
-                f"{self.mcp_http_url}/render",
-                json={
-                    "type": visualization_type,
-                    "parameters": parameters,
-                },
-            )
+        key = canonical_request_key(visualization_type, parameters)
+        body = {
+            "type": visualization_type,
+            "parameters": parameters,
+        }
+        data = await self._on_farm(key, lambda url: self._post(url, "/render", body, client_id))
+        # The artifact name is all the backend needs to serve the video from the store
+        path = data.get("artifact") or data.get("video_path")
+        if not path:
+            raise RuntimeError("MCP HTTP response missing video_path")
+        return {"video_path": path, **({"parameters": data["parameters"]} if data.get("parameters") is not None else {})}
+
+    async def _on_farm(self, key: str, send: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Send to the node that owns `key`, moving on to the least-loaded other
+        node when it is busy or unreachable.
+        """
+        busy, error = None, None
+        for node in self.farm.candidates(key):
+            try:
+                with self.farm.track(node), tracing.span("mcp.call", node=node.url):
+                    data = await send(node.url)
+                self.farm.mark_ok(node)
+                return data
+            except RenderBusyError as e:
+                self.farm.mark_saturated(node, e.retry_after)
+                busy = e
+            except (httpx.ConnectError, httpx.HTTPStatusError) as e:
+                if not marks_node_failed(e):
+                    raise
+                # A render timeout is not retried either, it would only double the wait
+                self.farm.mark_failed(node)
+                error = e
+        raise busy or error
+
+    async def _post(self, url: str, path: str, body: Dict[str, Any], client_id: str | None = None,
+                    timeout: float | None = None) -> Dict[str, Any]:
+        headers = tracing.inject({"X-Client-Id": client_id} if client_id else {})
+        async with httpx.AsyncClient(timeout=timeout or self.mcp_timeout) as client:
+            resp = await client.post(f"{url}{path}", json=body, headers=headers)
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", "1"))
+                raise RenderBusyError(retry_after, resp.json().get("detail", "Renderer is busy"))
             resp.raise_for_status()
-            data = resp.json()
-            path = data.get("video_path")
-            if not path:
-                raise RuntimeError("MCP HTTP response missing video_path")
-            return path
+            return resp.json()
 
     async def _call_mcp_server(self, visualization_type: str, parameters: Dict[str, Any]) -> str:
         """Call the MCP server to generate the visualization"""
@@ -96,14 +297,21 @@ class MCPClient:
             return os.path.join(self.renders_dir, output)
 
     async def _create_placeholder_video(self, visualization_type: str) -> str:
-        """Create a placeholder video for demo purposes"""
-        import uuid
-        
-        # Generate a unique filename
-        video_id = str(uuid.uuid4())[:8]
-        video_filename = f"{visualization_type}_{video_id}.mp4"
-        video_path = os.path.join(self.renders_dir, video_filename)
-        
+        """
+        Placeholder video for when rendering fails. Each type is encoded once and
+        reused, so an outage does not turn into an ffmpeg encode per request.
+        """
+        name = visualization_type if re.fullmatch(r"[a-z0-9_]{1,64}", visualization_type or "") else "visualization"
+        video_path = os.path.join(self.renders_dir, f"placeholder_{name}.mp4")
+        if os.path.exists(video_path):
+            return video_path
+        return await self._placeholders.do(name, lambda: self._encode_placeholder(video_path))
+
+    async def _encode_placeholder(self, video_path: str) -> str:
+        if os.path.exists(video_path):
+            return video_path
+        tmp_path = f"{video_path}.tmp.mp4"
+
         # Create a simple placeholder video using ffmpeg if available
         try:
             cmd = [
@@ -115,7 +323,8 @@ class MCPClient:
                 "-c:v", "libx264",
                 "-c:a", "aac",
                 "-shortest",
-                video_path
+                "-movflags", "+faststart",
+                tmp_path
             ]
             
             process = await asyncio.create_subprocess_exec(
@@ -127,14 +336,19 @@ class MCPClient:
             await process.communicate()
             
             if process.returncode == 0:
+                os.replace(tmp_path, video_path)
                 logger.info(f"Created placeholder video: {video_path}")
                 return video_path
                 
         except FileNotFoundError:
             logger.warning("ffmpeg not found, creating empty placeholder file")
         
-        # If ffmpeg is not available, create an empty file as placeholder
-        with open(video_path, "w") as f:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # If ffmpeg is not available, return a stand-in file. It is not a video, so it
+        # never takes the cached name: the next placeholder tries ffmpeg again
+        fallback_path = video_path.replace(".mp4", ".unencoded.mp4")
+        with open(fallback_path, "w") as f:
             f.write("placeholder")
         
-        return video_path
+        return fallback_path
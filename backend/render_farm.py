@@ -0,0 +1,216 @@
+import os
+import sys
+import time
+import json
+import bisect
+import asyncio
+import hashlib
+import logging
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class RenderNode:
+    """One MCP server, and what we last learned about its load."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.running = 0
+        self.queued = 0
+        self.concurrency = 1
+        self.max_depth = 16
+        # Requests we sent that haven't answered; covers the gap between health polls
+        self.inflight = 0
+        self.saturated_until = 0.0
+        self.routed = 0
+        self.failures = 0
+        self.last_seen: Optional[float] = None
+
+    @property
+    def load(self) -> float:
+        """Work per render slot: the last reported queue plus anything sent since."""
+        return (self.running + self.queued + self.inflight) / max(1, self.concurrency)
+
+    @property
+    def saturated(self) -> bool:
+        if time.monotonic() < self.saturated_until:
+            return True
+        return self.queued + self.inflight >= self.max_depth + self.concurrency
+
+    def update(self, health: Dict[str, Any]) -> None:
+        queue = health.get("queue") or {}
+        self.running = int(queue.get("running", 0))
+        self.queued = int(queue.get("queued", 0))
+        self.concurrency = int(queue.get("concurrency", self.concurrency))
+        self.max_depth = int(queue.get("max_depth", self.max_depth))
+        self.healthy = True
+        self.last_seen = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "saturated": self.saturated,
+            "running": self.running,
+            "queued": self.queued,
+            "inflight": self.inflight,
+            "concurrency": self.concurrency,
+            "routed": self.routed,
+            "failures": self.failures,
+        }
+
+
+class RenderFarm:
+    """
+    Routes renders across several MCP servers.
+
+    Each request goes to the node that owns its canonical key on a consistent
+    hash ring, so repeats of a request land where it was rendered (and where
+    identical in-flight requests coalesce), and adding or removing a node only
+    moves about 1/N of the keys. When that node is down or saturated, the
+    least-loaded healthy node takes the request instead. Health and queue depth
+    come from polling each node's /health every `poll_interval` seconds.
+
+    The key is the request as the LLM wrote it. The MCP servers coalesce and
+    cache on the normalized request (schema defaults filled in, clamped to
+    the budget), which the backend can't compute, so equivalent requests
+    written differently can land on different nodes. The shared artifact
+    store still serves each one's render, wherever it was made.
+    """
+
+    def __init__(self, urls: List[str], replicas: int = 160, poll_interval: float = 5.0, timeout: float = 2.0):
+        if not urls:
+            raise ValueError("RenderFarm needs at least one MCP URL")
+        self.nodes = [RenderNode(url) for url in urls]
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.fallbacks = 0
+        points = sorted(
+            (_ring_hash(f"{node.url}#{i}"), idx)
+            for idx, node in enumerate(self.nodes) for i in range(replicas)
+        )
+        self._ring = [point for point, _ in points]
+        self._owners = [self.nodes[idx] for _, idx in points]
+        self._poller: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["RenderFarm"]:
+        """MANIM_MCP_URLS (comma separated), else the single MANIM_MCP_URL; None means CLI mode."""
+        raw = os.getenv("MANIM_MCP_URLS") or os.getenv("MANIM_MCP_URL") or ""
+        urls = [u.strip() for u in raw.split(",") if u.strip()]
+        if not urls:
+            return None
+        return cls(urls, poll_interval=float(os.getenv("MANIM_MCP_POLL_SECONDS", "5")))
+
+    def owner(self, key: str) -> RenderNode:
+        """The node the ring assigns `key` to, whatever its state."""
+        idx = bisect.bisect(self._ring, _ring_hash(key)) % len(self._ring)
+        return self._owners[idx]
+
+    def _ring_order(self, key: str) -> List[RenderNode]:
+        """Distinct nodes in the order they follow `key` around the ring."""
+        start = bisect.bisect(self._ring, _ring_hash(key))
+        order: List[RenderNode] = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in order:
+                order.append(node)
+                if len(order) == len(self.nodes):
+                    break
+        return order
+
+    def candidates(self, key: str) -> List[RenderNode]:
+        """Nodes to try for `key`, in order: its owner if usable, then the rest by load."""
+        self.ensure_polling()
+        preferred, *rest = self._ring_order(key)
+        # Stable sort: equally loaded nodes keep ring order, so fallbacks spread out too
+        others = sorted(rest, key=lambda n: (not n.healthy, n.saturated, n.load))
+        if preferred.healthy and not preferred.saturated:
+            return [preferred] + others
+        self.fallbacks += 1
+        # Still worth a try if nothing else is better off
+        return others + [preferred]
+
+    @contextmanager
+    def track(self, node: RenderNode):
+        node.inflight += 1
+        node.routed += 1
+        try:
+            yield node
+        finally:
+            node.inflight -= 1
+
+    def mark_saturated(self, node: RenderNode, retry_after: float) -> None:
+        node.saturated_until = time.monotonic() + retry_after
+
+    def mark_ok(self, node: RenderNode) -> None:
+        node.healthy = True
+
+    def mark_failed(self, node: RenderNode) -> None:
+        # Stays out of rotation until the next successful health poll
+        node.healthy = False
+        node.failures += 1
+
+    async def poll_once(self) -> None:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async def check(node: RenderNode):
+                try:
+                    resp = await client.get(f"{node.url}/health")
+                    resp.raise_for_status()
+                    node.update(resp.json())
+                except Exception as e:
+                    if node.healthy:
+                        logger.warning(f"MCP node {node.url} is unhealthy: {e}")
+                    node.healthy = False
+            await asyncio.gather(*(check(node) for node in self.nodes))
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.poll_interval)
+
+    def ensure_polling(self) -> None:
+        """Start the background health poller on first use (needs a running loop)."""
+        if len(self.nodes) > 1 and (self._poller is None or self._poller.done()):
+            self._poller = asyncio.ensure_future(self._poll_forever())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": [node.stats() for node in self.nodes],
+            "fallbacks": self.fallbacks,
+        }
+
+
+# ---------------
+# CLI: check a set of (e.g. local) MCP servers and how keys spread over them
+# ---------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Show health, load and key placement for a set of MCP servers")
+    parser.add_argument("urls", nargs="+", help="MCP server URLs, e.g. http://localhost:9001")
+    parser.add_argument("--keys", type=int, default=10000, help="Sample keys used to show the ring's balance")
+    args = parser.parse_args()
+
+    farm = RenderFarm(args.urls)
+    asyncio.run(farm.poll_once())
+    spread = Counter(farm.owner(f"sample-{i}").url for i in range(args.keys))
+    print(json.dumps({
+        **farm.stats(),
+        "key_share": {url: round(count / args.keys, 3) for url, count in sorted(spread.items())},
+    }, indent=2))
+    sys.exit(0 if all(node.healthy for node in farm.nodes) else 1)
+
+
+if __name__ == "__main__":
+    main()
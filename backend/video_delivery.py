@@ -0,0 +1,76 @@
+import os
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from shared.artifact_store import ArtifactStore, HTTPArtifactStore, derived_name, is_artifact_name
+from shared.file_serving import serve_file
+
+POSTER_EXTENSIONS = (".webp", ".jpg")
+# Headers that must reach the blob service for ranges and revalidation to work
+PROXY_REQUEST_HEADERS = ("range", "if-range", "if-none-match")
+PROXY_RESPONSE_HEADERS = (
+    "content-type", "content-length", "content-range", "accept-ranges", "etag", "cache-control",
+)
+
+
+async def poster_for(store: ArtifactStore, renders_dir: str, video_name: str) -> Optional[str]:
+    """Name of the poster image rendered alongside a video, if there is one."""
+    stem = os.path.splitext(video_name)[0]
+    for ext in POSTER_EXTENSIONS:
+        if is_artifact_name(video_name):
+            name = derived_name(video_name, "poster", ext)
+            if await run_in_threadpool(store.exists, name):
+                return name
+        elif os.path.exists(os.path.join(renders_dir, stem + ext)):
+            return stem + ext
+    return None
+
+
+async def proxy_blob(url: str, request: Request) -> Response:
+    """Stream a blob from the blob service, passing range and cache headers through untouched."""
+    client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None))
+    headers = {h: request.headers[h] for h in PROXY_REQUEST_HEADERS if h in request.headers}
+    upstream = await client.send(client.build_request(request.method, url, headers=headers), stream=True)
+    out_headers = {h: upstream.headers[h] for h in PROXY_RESPONSE_HEADERS if h in upstream.headers}
+
+    if upstream.status_code >= 400 or request.method == "HEAD" or upstream.status_code == 304:
+        await upstream.aclose()
+        await client.aclose()
+        if upstream.status_code == 404:
+            raise HTTPException(status_code=404, detail="Not found")
+        return Response(status_code=upstream.status_code, headers=out_headers)
+
+    async def close():
+        await upstream.aclose()
+        await client.aclose()
+
+    # aiter_raw hands over the bytes as received, with no decoding or re-buffering
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=out_headers,
+        background=BackgroundTask(close),
+    )
+
+
+async def serve_render(store: ArtifactStore, renders_dir: str, name: str, request: Request) -> Response:
+    """
+    Serve a render by name. Content-addressed artifacts come from the artifact
+    store, straight off disk or proxied from the blob service; anything else
+    (e.g. placeholders) comes from the local renders directory.
+    """
+    if os.path.basename(name) != name or name.startswith("."):
+        raise HTTPException(status_code=404, detail="Not found")
+    if is_artifact_name(name):
+        path = await run_in_threadpool(store.local_path, name)
+        if path:
+            return serve_file(path, name, request)
+        if isinstance(store, HTTPArtifactStore):
+            return await proxy_blob(store.blob_url(name), request)
+        raise HTTPException(status_code=404, detail="Not found")
+    return serve_file(os.path.join(renders_dir, name), name, request)
@@ -0,0 +1,108 @@
+import os
+import sys
+import logging
+
+import anyio
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from shared.artifact_store import LocalArtifactStore, is_artifact_name
+from shared.file_serving import serve_file
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOBSTORE_DIR = os.getenv("BLOBSTORE_DIR", os.path.join(os.path.dirname(__file__), "data"))
+
+app = FastAPI(title="Render Blob Store", version="1.0.0")
+store = LocalArtifactStore(BLOBSTORE_DIR)
+
+
+class RefBody(BaseModel):
+    name: str
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.put("/blobs/{name}")
+async def put_blob(name: str, request: Request):
+    """Chunked upload. The body is hashed as it streams in and must match the name."""
+    if not is_artifact_name(name):
+        raise HTTPException(status_code=400, detail="Blob names must be <sha256><ext>")
+    if await run_in_threadpool(store.exists, name):
+        # Blobs are immutable; drain nothing and report success
+        return Response(status_code=200)
+
+    # Bridge the async request body to the blocking writer without buffering it all
+    send, receive = anyio.create_memory_object_stream(16)
+
+    def chunks():
+        while True:
+            chunk = anyio.from_thread.run(receive.receive)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def pump():
+        async with send:
+            try:
+                async for chunk in request.stream():
+                    if chunk:
+                        await send.send(chunk)
+                await send.send(None)
+            except anyio.BrokenResourceError:
+                # The writer gave up early; its error is reported below
+                pass
+
+    def write():
+        try:
+            return store.put_stream(chunks(), name)
+        finally:
+            receive.close()
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(pump)
+            await anyio.to_thread.run_sync(write)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Stored blob {name}")
+    return Response(status_code=201)
+
+
+@app.api_route("/blobs/{name}", methods=["GET", "HEAD"])
+async def get_blob(name: str, request: Request):
+    if not is_artifact_name(name):
+        raise HTTPException(status_code=404, detail="Not found")
+    path = await run_in_threadpool(store.local_path, name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Not found")
+    return serve_file(path, name, request)
+
+
+@app.get("/refs/{key}")
+async def get_ref(key: str):
+    name = await run_in_threadpool(store.get_ref, key)
+    if not name:
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"name": name}
+
+
+@app.put("/refs/{key}")
+async def put_ref(key: str, body: RefBody):
+    try:
+        await run_in_threadpool(store.set_ref, key, body.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"name": body.name}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("BLOBSTORE_PORT", "9100")))
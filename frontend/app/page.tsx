@@ -11,6 +11,7 @@ interface VisualizationResult {
   refined_prompt: string
   visualization_type: string
   explanation: string
+  poster_url?: string | null
 }
 
 export default function Home() {
@@ -35,6 +36,10 @@ export default function Home() {
         body: JSON.stringify({ prompt }),
       })
 
+      if (response.status === 429) {
+        const retryAfter = response.headers.get('Retry-After')
+        throw new Error(`The renderer is busy. Please try again in ${retryAfter ?? 'a few'} seconds.`)
+      }
       if (!response.ok) {
         throw new Error('Failed to generate visualization')
       }
@@ -151,6 +156,8 @@ export default function Home() {
               <div className="aspect-video bg-black rounded-lg overflow-hidden">
                 <video
                   src={result.video_url}
+                  poster={result.poster_url ?? undefined}
+                  preload="metadata"
                   controls
                   className="w-full h-full"
                   autoPlay
@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared.loop_monitor import LoopLagMonitor, percentiles
+
+# Held out from the intent classifier's training prompts, so the fast path sees them as it would real traffic
+PROMPTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts.jsonl")
+
+
+def load_prompts(path: str) -> List[str]:
+    """Prompts for every scene type, phrased the way users ask, some with parameters and some off the registry."""
+    prompts = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                prompts.append(json.loads(line)["prompt"])
+    return prompts
+
+
+class Recorder:
+    """Outcomes of one endpoint: latencies of successes, status counts of everything."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.first_item: List[float] = []
+        self.statuses: Counter = Counter()
+
+    def add(self, status: str, seconds: float) -> None:
+        self.statuses[status] += 1
+        if status == "200":
+            self.latencies.append(seconds)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        total = sum(self.statuses.values())
+        ok = self.statuses.get("200", 0)
+        out = {
+            "requests": total,
+            "throughput_rps": round(ok / elapsed, 3) if elapsed else None,
+            "error_rate": round(1 - ok / total, 4) if total else None,
+            "statuses": dict(self.statuses),
+            "latency_seconds": percentiles(self.latencies, digits=3),
+        }
+        if self.first_item:
+            out["first_item_seconds"] = percentiles(self.first_item, digits=3)
+        return out
+
+
+async def generate(client: httpx.AsyncClient, prompts: List[str], rec: Recorder) -> None:
+    started = time.perf_counter()
+    try:
+        resp = await client.post("/api/generate", json={"prompt": random.choice(prompts)})
+        rec.add(str(resp.status_code), time.perf_counter() - started)
+    except httpx.HTTPError as e:
+        rec.add(type(e).__name__, time.perf_counter() - started)
+
+
+async def generate_batch(client: httpx.AsyncClient, prompts: List[str], size: int, rec: Recorder) -> None:
+    """Streams the NDJSON batch; counts as OK only when every line reports ok."""
+    started = time.perf_counter()
+    try:
+        async with client.stream("POST", "/api/generate/batch", json={"prompts": random.sample(prompts, size)}) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                rec.add(str(resp.status_code), time.perf_counter() - started)
+                return
+            statuses = Counter()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                if not statuses:
+                    rec.first_item.append(time.perf_counter() - started)
+                statuses[json.loads(line).get("status")] += 1
+        bad = {s: n for s, n in statuses.items() if s != "ok"}
+        rec.add("200" if not bad else f"items_{'_'.join(sorted(bad))}", time.perf_counter() - started)
+    except httpx.HTTPError as e:
+        rec.add(type(e).__name__, time.perf_counter() - started)
+
+
+async def backend_health(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    try:
+        resp = await client.get("/health")
+        return resp.json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def fast_path_share(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """How many of the step's prompts the backend's intent fast path answered without the LLM."""
+    if not before or not after or "intent" not in before or "intent" not in after:
+        return None
+    prompts = after["intent"]["prompts"] - before["intent"]["prompts"]
+    fast = after["intent"]["fast_path"] - before["intent"]["fast_path"]
+    return {"prompts": prompts, "fast_path": fast, "share": round(fast / prompts, 3) if prompts else None}
+
+
+async def run_step(client: httpx.AsyncClient, prompts: List[str], rate: float, duration: float,
+                   batch_fraction: float, batch_size: int, drain: float) -> Dict[str, Any]:
+    """
+    Open loop: arrivals are Poisson at `rate` per second no matter how slowly
+    the backend answers, so a saturated backend shows up as growing latency and
+    errors rather than as the generator politely slowing down.
+    """
+    single, batch = Recorder(), Recorder()
+    health_before = await backend_health(client)
+    lag = LoopLagMonitor(interval=0.01)
+    lag.start()
+    tasks = []
+    started = time.perf_counter()
+    next_at = started
+    while True:
+        next_at += random.expovariate(rate)
+        if next_at - started > duration:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if random.random() < batch_fraction:
+            tasks.append(asyncio.ensure_future(generate_batch(client, prompts, batch_size, batch)))
+        else:
+            tasks.append(asyncio.ensure_future(generate(client, prompts, single)))
+    sent = time.perf_counter() - started
+    done, pending = await asyncio.wait(tasks, timeout=drain) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+    lag.stop()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "target_rps": rate,
+        "offered_rps": round(len(tasks) / sent, 3) if sent else None,
+        "duration_seconds": round(elapsed, 1),
+        "unfinished": len(pending),
+        "generate": single.report(elapsed),
+        "generator_loop_lag_seconds": lag.stats(),
+    }
+    if batch_fraction:
+        report["generate_batch"] = batch.report(elapsed)
+    health = await backend_health(client)
+    if health:
+        report["backend_loop_lag_seconds"] = health.get("event_loop_lag")
+        # Fast-path prompts never reach the LLM; the rest is what the LLM's capacity was tested with
+        report["intent_fast_path"] = fast_path_share(health_before, health)
+    return report
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    prompts = load_prompts(args.prompts)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    reports = []
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        for rate in args.rate:
+            report = await run_step(client, prompts, rate, args.duration, args.batch_fraction, args.batch_size, args.drain)
+            reports.append(report)
+            print(json.dumps(report, indent=2), flush=True)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the backend's /api/generate endpoints")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--rate", type=float, nargs="+", default=[1.0],
+                        help="Arrival rates in requests/second; several values run one step each")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of arrivals per step")
+    parser.add_argument("--drain", type=float, default=120.0, help="Seconds to wait for stragglers after each step")
+    parser.add_argument("--batch-fraction", type=float, default=0.0, help="Share of arrivals sent to /api/generate/batch")
+    parser.add_argument("--batch-size", type=int, default=5, help="Prompts per batch request")
+    parser.add_argument("--prompts", default=PROMPTS_FILE, help="JSONL file of {\"prompt\": ...} lines")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--output", help="Also write all step reports here as JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
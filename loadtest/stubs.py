@@ -0,0 +1,255 @@
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from typing import Any, AsyncIterator, Callable, Dict, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+# Stand-ins for the LLM providers and the MCP server, so the backend can be
+# load tested without a GPU or real renders. Latencies are drawn from a
+# configurable distribution per request.
+
+# What the stub LLM answers for each scene type, picked by keyword
+SCENES = {
+    "fourier_series": (("fourier", "square wave", "harmonic"), {"terms": [1, 3, 5, 7, 9]}),
+    "linear_transform": (("matrix", "transform", "shear", "rotation"), {"matrix": [[2, 1], [1, 2]], "show_basis": True}),
+    "parametric_curve": (("parametric", "circle", "spiral", "lissajous"), {"x_of_t": "cos(t)", "y_of_t": "sin(t)", "t_min": 0, "t_max": 6.28}),
+    "vector": (("vector",), {"vectors": [[2, 1], [-1, 2]]}),
+    "histogram_sampling": (("histogram", "sample"), {"mean": 0, "std": 1, "n": 500, "bins": 20}),
+    "normal_distribution": (("normal", "gaussian", "bell"), {"mean": 0, "std": 1}),
+    "activation_function": (("sigmoid", "relu", "tanh", "activation"), {"function": "sigmoid"}),
+    "backpropagation": (("backprop", "gradient flow", "chain rule"), {"layers": [3, 4, 2], "learning_rate": 0.1}),
+    "feedforward_nn": (("neural network", "layers", "feedforward", "perceptron"), {"layers": [3, 4, 2], "activation": "relu"}),
+    "gradient_descent": (("gradient descent", "optimi", "minimi"), {"function": "(x-1)**2 + (y+2)**2", "start_point": [3, 3], "learning_rate": 0.1, "steps": 20}),
+    "loss_landscape": (("loss", "landscape", "surface"), {"function": "(x-1)**2 + (y+2)**2"}),
+    "convolution": (("convolution", "kernel", "filter"), {"input_matrix": [[1, 2, 3], [4, 5, 6], [7, 8, 9]], "kernel": [[1, 0], [0, -1]], "stride": 1}),
+    "pooling": (("pooling", "downsampl"), {"pool_type": "max", "kernel_size": 2, "input_matrix": [[1, 2], [3, 4]]}),
+}
+
+
+# Characters per streamed piece, a few tokens' worth
+STREAM_CHUNK = 16
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Latency distribution in seconds:
+      fixed:0.5            always 0.5
+      uniform:1,3          uniform between 1 and 3
+      lognormal:2,0.6      median 2, log-space sigma 0.6 (long right tail, like real renders)
+      exp:0.8              exponential with mean 0.8
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        mu, sigma = math.log(values[0]), values[1]
+        return lambda: random.lognormvariate(mu, sigma)
+    if kind == "exp":
+        return lambda: random.expovariate(1.0 / values[0])
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+
+def refine(prompt: str) -> Dict[str, Any]:
+    text = prompt.lower()
+    for vis_type, (keywords, params) in SCENES.items():
+        if any(k in text for k in keywords):
+            return {"visualization_type": vis_type, "parameters": params, "description": prompt}
+    return {"visualization_type": "plot_function", "parameters": {"expression": "sin(x)", "x_min": 0, "x_max": 6.28}, "description": prompt}
+
+
+def llm_answer(system_prompt: str, user_prompt: str) -> str:
+    """Refinement prompts get JSON (an array for packed batches), anything else a paragraph."""
+    if "JSON array of" in system_prompt:
+        try:
+            prompts = json.loads(user_prompt)
+        except ValueError:
+            prompts = [user_prompt]
+        return json.dumps([refine(p) for p in prompts])
+    if "Respond only with valid JSON" in system_prompt:
+        return json.dumps(refine(user_prompt))
+    return "This animation shows the idea step by step. " * 8
+
+
+async def stream_pieces(text: str, seconds: float) -> AsyncIterator[str]:
+    """`text` in STREAM_CHUNK-character pieces spread over `seconds`, like tokens from a model."""
+    pieces = [text[i:i + STREAM_CHUNK] for i in range(0, len(text), STREAM_CHUNK)] or [""]
+    for piece in pieces:
+        yield piece
+        await asyncio.sleep(seconds / len(pieces))
+
+
+def create_llm_app(latency: Callable[[], float], error_rate: float) -> FastAPI:
+    """Answers Ollama's /api/generate and OpenAI's /v1/chat/completions, streamed or not."""
+    app = FastAPI(title="Stub LLM")
+
+    async def respond(system_prompt: str, user_prompt: str, stream: bool = False) -> Tuple[str, float]:
+        """
+        The answer and the seconds left to stream it. A streamed answer starts
+        halfway through its latency and takes the other half to arrive.
+        """
+        delay = latency()
+        first = delay / 2 if stream else delay
+        await asyncio.sleep(first)
+        if random.random() < error_rate:
+            raise HTTPException(status_code=500, detail="Stub LLM error")
+        return llm_answer(system_prompt, user_prompt), delay - first
+
+    @app.post("/api/generate")
+    async def ollama_generate(body: dict):
+        # The backend sends "<system>\n\nUser: <prompt>\nAssistant:"
+        match = re.match(r"(?s)(.*)\n\nUser: (.*)\nAssistant:$", body.get("prompt", ""))
+        system_prompt, user_prompt = match.groups() if match else ("", body.get("prompt", ""))
+        model = body.get("model")
+        # Ollama streams unless told not to
+        if not body.get("stream", True):
+            text, _ = await respond(system_prompt, user_prompt)
+            return {"model": model, "response": text, "done": True}
+        text, rest = await respond(system_prompt, user_prompt, stream=True)
+
+        async def lines():
+            # One NDJSON object per piece, then an empty one marking the end
+            async for piece in stream_pieces(text, rest):
+                yield json.dumps({"model": model, "response": piece, "done": False}) + "\n"
+            yield json.dumps({"model": model, "response": "", "done": True}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(body: dict):
+        messages = body.get("messages", [])
+        system_prompt = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user_prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        header = {
+            "id": f"chatcmpl-{random.getrandbits(48):x}",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+        }
+        if not body.get("stream"):
+            content, _ = await respond(system_prompt, user_prompt)
+            return {
+                **header,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+        content, rest = await respond(system_prompt, user_prompt, stream=True)
+
+        def event(delta: Dict[str, Any], finish_reason: str | None = None) -> str:
+            chunk = {**header, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        async def events():
+            # Server-sent events: the role, the content in pieces, a stop, then [DONE]
+            yield event({"role": "assistant", "content": ""})
+            async for piece in stream_pieces(content, rest):
+                yield event({"content": piece})
+            yield event({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def create_mcp_app(latency: Callable[[], float], error_rate: float, concurrency: int, max_depth: int) -> FastAPI:
+    """
+    Accepts renders like the MCP server: `concurrency` at a time, up to
+    `max_depth` waiting, 429 with Retry-After beyond that. Each render just
+    sleeps and returns a made-up artifact name.
+    """
+    app = FastAPI(title="Stub MCP")
+    slots = asyncio.Semaphore(concurrency)
+    state = {"running": 0, "queued": 0, "rendered": 0, "rejected": 0}
+
+    async def render_one(item: Dict[str, Any]) -> Dict[str, Any]:
+        if state["queued"] >= max_depth and state["running"] >= concurrency:
+            state["rejected"] += 1
+            raise HTTPException(status_code=429, detail="Render queue is full", headers={"Retry-After": "1"})
+        state["queued"] += 1
+        try:
+            await slots.acquire()
+        finally:
+            state["queued"] -= 1
+        state["running"] += 1
+        try:
+            await asyncio.sleep(latency())
+            if random.random() < error_rate:
+                raise HTTPException(status_code=400, detail="Render failed: stub error")
+            state["rendered"] += 1
+            key = json.dumps([item.get("type") or item.get("visualization_type"), item.get("parameters")], sort_keys=True)
+            name = hashlib.sha256(key.encode()).hexdigest() + ".mp4"
+            # Parameters as rendered; the stub has no schemas, so as sent
+            return {"video_path": name, "artifact": name, "poster": None, "parameters": item.get("parameters") or {}}
+        finally:
+            state["running"] -= 1
+            slots.release()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "queue": {
+            "running": state["running"], "queued": state["queued"],
+            "concurrency": concurrency, "max_depth": max_depth, "rejected": state["rejected"],
+        }, "rendered": state["rendered"]}
+
+    @app.post("/render")
+    async def render(body: dict):
+        return await render_one(body)
+
+    @app.post("/render/batch")
+    async def render_batch(body: dict):
+        async def one(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return {"index": index, "status": "ok", **await render_one(item)}
+            except HTTPException as e:
+                status = "busy" if e.status_code == 429 else "error"
+                return {"index": index, "status": status, "error": e.detail, **({"retry_after": 1} if status == "busy" else {})}
+
+        async def results():
+            tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(body.get("items", []))]
+            for done in asyncio.as_completed(tasks):
+                yield json.dumps(await done) + "\n"
+
+        return StreamingResponse(results(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM / MCP servers for load testing the backend")
+    sub = parser.add_subparsers(dest="kind", required=True)
+    llm = sub.add_parser("llm", help="Ollama and OpenAI compatible stub")
+    llm.add_argument("--host", default="127.0.0.1")
+    llm.add_argument("--port", type=int, default=11434)
+    llm.add_argument("--latency", default="lognormal:0.8,0.5", help="See parse_latency")
+    llm.add_argument("--error-rate", type=float, default=0.0)
+    mcp = sub.add_parser("mcp", help="MCP render server stub")
+    mcp.add_argument("--host", default="127.0.0.1")
+    mcp.add_argument("--port", type=int, default=9000)
+    mcp.add_argument("--latency", default="lognormal:4,0.6", help="See parse_latency")
+    mcp.add_argument("--error-rate", type=float, default=0.0)
+    mcp.add_argument("--concurrency", type=int, default=2)
+    mcp.add_argument("--max-depth", type=int, default=16)
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    if args.kind == "llm":
+        app = create_llm_app(latency, args.error_rate)
+    else:
+        app = create_mcp_app(latency, args.error_rate, args.concurrency, args.max_depth)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
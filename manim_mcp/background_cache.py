@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from manim import ThreeDScene
+from manim.camera.three_d_camera import ThreeDCamera
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils.family import extract_mobject_family_members
+
+from frame_elision import FRAME_ELISION, ElidingFileWriter
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_CACHE = os.getenv("MCP_BACKGROUND_CACHE", "true").lower() == "true"
+
+# Everything about a mobject that changes how it rasterizes
+STYLE_ATTRS = (
+    "fill_rgbas", "stroke_rgbas", "background_stroke_rgbas",
+    "stroke_width", "background_stroke_width", "sheen_factor", "sheen_direction",
+    "rgbas", "pixel_array", "z_index",
+)
+
+
+def fingerprint(mobjects: Iterable[Any]) -> str:
+    """Digest of the mobjects' identity, order, geometry and style."""
+    h = hashlib.blake2b(digest_size=16)
+    for mob in mobjects:
+        h.update(id(mob).to_bytes(8, "little"))
+        h.update(np.ascontiguousarray(mob.points).tobytes())
+        for attr in STYLE_ATTRS:
+            value = getattr(mob, attr, None)
+            if isinstance(value, np.ndarray):
+                h.update(np.ascontiguousarray(value).tobytes())
+            elif value is not None:
+                h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+class BackgroundCachingRenderer(CairoRenderer):
+    """
+    CairoRenderer that keeps the static background layer across play() calls.
+
+    manim already rasterizes the mobjects an animation does not touch once per
+    play() and composites the moving ones over that image each frame, but it
+    rebuilds the image at the start of every play(). Scenes with a grid or axes
+    and many short plays (convolution windows, gradient descent steps) redraw
+    the same background over and over. Here the layer is reused whenever the
+    static mobjects fingerprint the same as last time.
+
+    With frame elision on it also tracks damage per frame: when the background
+    and everything drawn over it fingerprint the same as the last frame drawn,
+    the redraw is skipped and the previous frame array is handed on as is.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._background: Optional[np.ndarray] = None
+        self._background_key: Optional[str] = None
+        self.background_hits = 0
+        self.background_misses = 0
+        self.background_raster_seconds = 0.0
+        self._drawn_background: Optional[np.ndarray] = None
+        self._drawn_key: Optional[str] = None
+        self._unchanged = False
+        self._last_frame: Optional[np.ndarray] = None
+        self.redraws_skipped = 0
+
+    def update_frame(self, scene, mobjects=None, include_submobjects=True, ignore_skipping=True, **kwargs):
+        if not FRAME_ELISION or mobjects is None or kwargs or (self.skip_animations and not ignore_skipping):
+            self._unchanged, self._drawn_key = False, None
+            return super().update_frame(scene, mobjects, include_submobjects, ignore_skipping, **kwargs)
+        drawn = extract_mobject_family_members(mobjects, use_z_index=self.camera.use_z_index, only_those_with_points=True) \
+            if include_submobjects else mobjects
+        key = fingerprint(drawn)
+        # `is`, not equality: a cached background array is never modified, a new one means new pixels
+        if key == self._drawn_key and self.static_image is self._drawn_background and self._last_frame is not None:
+            self.redraws_skipped += 1
+            self._unchanged = True
+            return
+        super().update_frame(scene, mobjects, include_submobjects, ignore_skipping)
+        self._unchanged = False
+        self._drawn_key, self._drawn_background = key, self.static_image
+
+    def get_frame(self):
+        if self._unchanged:
+            return self._last_frame
+        self._last_frame = super().get_frame()
+        return self._last_frame
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        self.static_image = None
+        if not static_mobjects:
+            return None
+        key = fingerprint(static_mobjects)
+        if key == self._background_key:
+            self.background_hits += 1
+            # update_frame copies it into the camera, so the cached array stays intact
+            self.static_image = self._background
+            return self.static_image
+        started = time.perf_counter()
+        self.update_frame(scene, mobjects=static_mobjects)
+        self.static_image = self.get_frame()
+        self.background_raster_seconds += time.perf_counter() - started
+        self.background_misses += 1
+        self._background, self._background_key = self.static_image, key
+        return self.static_image
+
+    def stats(self) -> Dict[str, Any]:
+        avg = self.background_raster_seconds / self.background_misses if self.background_misses else 0.0
+        return {
+            "background_hits": self.background_hits,
+            "background_misses": self.background_misses,
+            "raster_seconds_saved": round(avg * self.background_hits, 3),
+            "redraws_skipped": self.redraws_skipped,
+        }
+
+    def scene_finished(self, scene):
+        super().scene_finished(scene)
+        logger.info(f"Background layer cache for {scene.__class__.__name__}: {self.stats()}")
+
+
+def make_renderer(scene_cls, file_writer_class=None) -> Optional[CairoRenderer]:
+    """
+    A caching renderer for 2D scenes, and a frame-eliding file writer for all
+    (or `file_writer_class`, when given); None leaves the scene's default
+    renderer in place.
+    """
+    if file_writer_class is None and FRAME_ELISION:
+        file_writer_class = ElidingFileWriter
+    writer = {"file_writer_class": file_writer_class} if file_writer_class else {}
+    if issubclass(scene_cls, ThreeDScene):
+        # ThreeDScene needs its own camera class, and a moving camera changes every layer
+        return CairoRenderer(camera_class=ThreeDCamera, **writer) if writer else None
+    if not BACKGROUND_CACHE:
+        return CairoRenderer(**writer) if writer else None
+    return BackgroundCachingRenderer(**writer)
+
+
+# ---------------
+# Verification: render a scene with and without the cache and diff every frame
+# ---------------
+
+class _Recording:
+    """Mixin recording a digest of every frame written, and time spent drawing frames."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.frame_digests: List[str] = []
+        self.draw_seconds = 0.0
+
+    def update_frame(self, *args, **kwargs):
+        started = time.perf_counter()
+        super().update_frame(*args, **kwargs)
+        self.draw_seconds += time.perf_counter() - started
+
+    def add_frame(self, frame, num_frames: int = 1):
+        if not self.skip_animations:
+            self.frame_digests.extend([hashlib.sha1(frame.tobytes()).hexdigest()] * num_frames)
+        super().add_frame(frame, num_frames)
+
+
+class _RecordingCairoRenderer(_Recording, CairoRenderer):
+    pass
+
+
+class _RecordingCachingRenderer(_Recording, BackgroundCachingRenderer):
+    pass
+
+
+def _render_frames(scene_cls, params: Dict[str, Any], renderer_cls):
+    from manim import tempconfig
+    with tempconfig({"write_to_movie": False, "disable_caching": True, "pixel_width": 1280, "pixel_height": 720, "frame_rate": 30}):
+        renderer = renderer_cls()
+        scene_cls(renderer=renderer, **params).render()
+    return renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the background layer cache leaves every frame unchanged")
+    parser.add_argument("scene", help="Scene key, e.g. linear_transform")
+    parser.add_argument("--params", default="{}", help="JSON parameters")
+    args = parser.parse_args()
+
+    from server import SCENE_REGISTRY, prepare_request
+    req, _ = prepare_request({"type": args.scene, "parameters": json.loads(args.params)})
+    scene_cls = SCENE_REGISTRY[args.scene]
+    if make_renderer(scene_cls) is None:
+        print(f"{args.scene}: background cache not used for this scene")
+        return
+
+    baseline = _render_frames(scene_cls, req["parameters"], _RecordingCairoRenderer)
+    cached = _render_frames(scene_cls, req["parameters"], _RecordingCachingRenderer)
+
+    mismatched = sum(a != b for a, b in zip(baseline.frame_digests, cached.frame_digests))
+    mismatched += abs(len(baseline.frame_digests) - len(cached.frame_digests))
+    frames = max(1, len(baseline.frame_digests))
+    print(json.dumps({
+        "scene": args.scene,
+        "frames": len(baseline.frame_digests),
+        "mismatched_frames": mismatched,
+        "draw_ms_per_frame": {
+            "baseline": round(1000 * baseline.draw_seconds / frames, 3),
+            "cached": round(1000 * cached.draw_seconds / frames, 3),
+        },
+        **cached.stats(),
+    }, indent=2))
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from manim_mcp.scenes._params import RenderCost, SceneParams
+
+
+class OverBudget(Exception):
+    """The request's estimated cost is over budget and could not be clamped under it."""
+
+    def __init__(self, cost: RenderCost, budget: "RenderBudget"):
+        super().__init__(
+            f"Estimated render cost (plays={cost.plays}, frames={cost.frames}, mobjects={cost.mobjects}) "
+            f"is over budget (plays={budget.max_plays}, frames={budget.max_frames}, mobjects={budget.max_mobjects})"
+        )
+        self.cost = cost
+
+
+class RenderBudget:
+    """
+    Upper bounds on what a single render may do, checked against each scene's
+    static cost estimate. With the "clamp" policy, parameters are cut down
+    through the scene's clamp_params until the estimate fits; with "reject",
+    or when a scene cannot be clamped, the request is refused.
+    """
+
+    CLAMP_ATTEMPTS = 4
+
+    def __init__(self, max_plays: int = 300, max_frames: int = 9000, max_mobjects: int = 5000, policy: str = "clamp"):
+        self.max_plays = max_plays
+        self.max_frames = max_frames
+        self.max_mobjects = max_mobjects
+        self.policy = policy
+        self.clamped = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "RenderBudget":
+        return cls(
+            max_plays=int(os.getenv("MCP_MAX_PLAYS", "300")),
+            max_frames=int(os.getenv("MCP_MAX_FRAMES", "9000")),
+            max_mobjects=int(os.getenv("MCP_MAX_MOBJECTS", "5000")),
+            policy=os.getenv("MCP_OVER_BUDGET", "clamp").lower(),
+        )
+
+    def overrun(self, cost: RenderCost) -> float:
+        """How many times over budget the worst dimension is; <= 1 means it fits."""
+        return max(
+            cost.plays / self.max_plays,
+            cost.frames / self.max_frames,
+            cost.mobjects / self.max_mobjects,
+        )
+
+    def fit(self,
+            params: SceneParams,
+            estimate_cost: Callable[[SceneParams], RenderCost],
+            clamp_params: Optional[Callable[[SceneParams, float], SceneParams]] = None) -> Tuple[SceneParams, RenderCost]:
+        cost = estimate_cost(params)
+        over = self.overrun(cost)
+        if over <= 1:
+            return params, cost
+        if self.policy == "clamp" and clamp_params is not None:
+            for _ in range(self.CLAMP_ATTEMPTS):
+                # Aim a little under so fixed per-scene overhead doesn't keep us just over
+                params = clamp_params(params, 0.9 / over)
+                cost = estimate_cost(params)
+                over = self.overrun(cost)
+                if over <= 1:
+                    self.clamped += 1
+                    return params, cost
+        self.rejected += 1
+        raise OverBudget(cost, self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_plays": self.max_plays,
+            "max_frames": self.max_frames,
+            "max_mobjects": self.max_mobjects,
+            "policy": self.policy,
+            "clamped": self.clamped,
+            "rejected": self.rejected,
+        }
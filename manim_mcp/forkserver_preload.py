@@ -0,0 +1,20 @@
+# Imported once by the fork server (worker_pool.ForkServerPool). Render workers
+# are forked from it, so whatever is loaded and warmed here is shared
+# copy-on-write and never paid per render.
+import tempfile
+
+import worker_pool
+
+# server.py: manim, numpy, Cairo, Pango, the scene registry
+worker_pool.import_parent_main()
+
+import tex_cache
+from manim import Text, config
+from render_config import isolated_config
+
+with tempfile.TemporaryDirectory() as media_dir, isolated_config({"media_dir": media_dir}):
+    # Font discovery and Pango's first layout
+    Text("Aa")
+    # Builds and caches the TexTemplate
+    config.tex_template
+tex_cache.install()
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, Optional
+
+import numpy as np
+from manim import config
+from manim.scene.scene_file_writer import SceneFileWriter
+
+logger = logging.getLogger(__name__)
+
+FRAME_ELISION = os.getenv("MCP_FRAME_ELISION", "true").lower() == "true"
+
+
+class ElidingFileWriter(SceneFileWriter):
+    """
+    SceneFileWriter that doesn't pipe a frame to ffmpeg while it is identical
+    to the one before. Frames are held back and counted instead, and the ffmpeg
+    pipe for a partial movie is only opened once a second distinct frame shows
+    up. A partial movie that turns out to be a single frame throughout (every
+    wait(), and plays where nothing moves) is piped once and ffmpeg's tpad
+    clones it to full length. Runs of duplicates inside a moving segment are
+    still piped: the stream stays constant frame rate, which is what lets
+    partial movies, and whole renders in a lesson, be joined by stream copy.
+    """
+
+    def __init__(self, renderer, scene_name, **kwargs):
+        super().__init__(renderer, scene_name, **kwargs)
+        self.scene_name = scene_name
+        self._lazy = False
+        self._pending: Optional[np.ndarray] = None
+        self._pending_count = 0
+        self._pipe_path: Optional[str] = None
+        self.frames = 0
+        self.frames_piped = 0
+        self.elided_frames = 0
+        self.pipe_seconds = 0.0
+
+    def _can_elide(self) -> bool:
+        # The rawvideo -> libx264 mp4 path renders take; anything else is left to manim
+        return FRAME_ELISION and config.format == "mp4" and not config.transparent
+
+    def open_movie_pipe(self, file_path=None):
+        self._lazy = self._can_elide()
+        if not self._lazy:
+            return super().open_movie_pipe(file_path)
+        if file_path is None:
+            file_path = self.partial_movie_files[self.renderer.num_plays]
+        self.partial_movie_file_path = self._pipe_path = file_path
+        self.writing_process = None
+        self._pending, self._pending_count = None, 0
+
+    def _open_pipe(self, clone_frames: int = 0) -> None:
+        """manim's own encode settings, with an optional tpad repeating the last frame."""
+        fps = config.frame_rate
+        if fps == int(fps):
+            fps = int(fps)
+        # Convert first, so the clones are copies of the converted frame
+        filters = "format=yuv420p" + (f",tpad=stop_mode=clone:stop={clone_frames}" if clone_frames else "")
+        command = [
+            config.ffmpeg_executable, "-y",
+            "-f", "rawvideo",
+            "-s", f"{config.pixel_width}x{config.pixel_height}",
+            "-pix_fmt", "rgba",
+            "-r", str(fps),
+            "-i", "-",
+            "-an",
+            "-loglevel", config.ffmpeg_loglevel.lower(),
+            "-vf", filters,
+            "-vcodec", "libx264",
+            "-pix_fmt", "yuv420p",
+            self._pipe_path,
+        ]
+        self.writing_process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def _flush(self) -> None:
+        if self._pending is None:
+            return
+        if self.writing_process is None:
+            self._open_pipe()
+        data = self._pending.tobytes()
+        started = time.perf_counter()
+        for _ in range(self._pending_count):
+            self.writing_process.stdin.write(data)
+        self.pipe_seconds += time.perf_counter() - started
+        self.frames_piped += self._pending_count
+        self._pending, self._pending_count = None, 0
+
+    def write_frame(self, frame_or_renderer, num_frames: int = 1):
+        if not self._lazy:
+            for _ in range(num_frames):
+                super().write_frame(frame_or_renderer)
+            return
+        frame = frame_or_renderer
+        self.frames += num_frames
+        # Frozen frames arrive as the same array; so do frames the renderer skipped redrawing
+        if self._pending is not None and (frame is self._pending or np.array_equal(frame, self._pending)):
+            self._pending_count += num_frames
+            return
+        self._flush()
+        self._pending, self._pending_count = frame, num_frames
+
+    def close_movie_pipe(self):
+        if self._lazy:
+            if self.writing_process is None and self._pending_count > 1:
+                # One frame throughout: pipe it once, ffmpeg repeats it
+                self._open_pipe(clone_frames=self._pending_count - 1)
+                self.elided_frames += self._pending_count - 1
+                self._pending_count = 1
+            self._flush()
+            if self.writing_process is None:
+                # No frames at all; let ffmpeg fail or write exactly as it would have
+                self._open_pipe()
+            self._lazy = False
+        super().close_movie_pipe()
+
+    def stats(self) -> Dict[str, Any]:
+        # Clones are still encoded, but as unchanged frames x264 all but skips, so the
+        # time saved is about what piping and converting those frames would have cost
+        per_frame = self.pipe_seconds / self.frames_piped if self.frames_piped else 0.0
+        return {
+            "frames": self.frames,
+            "elided_frames": self.elided_frames,
+            "pipe_seconds": round(self.pipe_seconds, 3),
+            "encode_seconds_saved": round(per_frame * self.elided_frames, 3),
+        }
+
+    def finish(self):
+        super().finish()
+        if self.frames:
+            logger.info(f"Frame elision for {self.scene_name}: {self.stats()}")
+
+
+def elision_stats(renderer) -> Dict[str, Any]:
+    """Frame elision and redraw counts of a finished render, for telemetry and traces."""
+    stats = {}
+    writer = getattr(renderer, "file_writer", None)
+    if isinstance(writer, ElidingFileWriter):
+        stats.update(writer.stats())
+    if hasattr(renderer, "redraws_skipped"):
+        stats["redraws_skipped"] = renderer.redraws_skipped
+    return stats
+
+
+# ---------------
+# Verification: encode a scene with and without elision and compare decoded frames
+# ---------------
+
+def _framemd5(path: str) -> list:
+    out = subprocess.run(
+        [config.ffmpeg_executable, "-v", "error", "-i", path, "-f", "framemd5", "-"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in out.splitlines() if line and not line.startswith("#")]
+
+
+def _encode(scene_cls, params: Dict[str, Any], media_dir: str, elide: bool):
+    """Render to mp4 through the server's renderer (elide) or manim's default one."""
+    from background_cache import make_renderer
+    from render_config import isolated_config
+
+    with isolated_config({"media_dir": media_dir, "video_dir": media_dir, "output_file": "out",
+                          "write_to_movie": True, "disable_caching": True, "format": "mp4",
+                          "pixel_width": 1280, "pixel_height": 720, "frame_rate": 30}):
+        renderer = make_renderer(scene_cls) if elide else None
+        scene = scene_cls(**params, **({"renderer": renderer} if renderer else {}))
+        started = time.perf_counter()
+        scene.render()
+        seconds = time.perf_counter() - started
+    return os.path.join(media_dir, "out.mp4"), seconds, elision_stats(scene.renderer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that frame elision leaves every decoded frame unchanged")
+    parser.add_argument("scene", help="Scene key, e.g. gradient_descent")
+    parser.add_argument("--params", default="{}", help="JSON parameters")
+    args = parser.parse_args()
+
+    from server import SCENE_REGISTRY, prepare_request
+    req, _ = prepare_request({"type": args.scene, "parameters": json.loads(args.params)})
+    scene_cls = SCENE_REGISTRY[args.scene]
+
+    work = tempfile.mkdtemp(prefix="elision_")
+    try:
+        baseline, baseline_seconds, _ = _encode(scene_cls, req["parameters"], os.path.join(work, "baseline"), False)
+        elided, elided_seconds, stats = _encode(scene_cls, req["parameters"], os.path.join(work, "elided"), True)
+        a, b = _framemd5(baseline), _framemd5(elided)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    mismatched = sum(x != y for x, y in zip(a, b)) + abs(len(a) - len(b))
+    print(json.dumps({
+        "scene": args.scene,
+        "frames": len(a),
+        "mismatched_frames": mismatched,
+        "render_seconds": {"baseline": round(baseline_seconds, 3), "elided": round(elided_seconds, 3)},
+        **stats,
+    }, indent=2))
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import json
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from manim.scene.scene_file_writer import SceneFileWriter
+from pydantic import BaseModel, Field
+
+EXPORT_WIDTH = int(os.getenv("MCP_EXPORT_WIDTH", "640"))
+EXPORT_CHUNK_FRAMES = int(os.getenv("MCP_EXPORT_CHUNK_FRAMES", "256"))
+MAX_EXPORT_ITEMS = int(os.getenv("MCP_MAX_EXPORT_ITEMS", "256"))
+
+# The .npy header is padded to a fixed size, so the frame count can be rewritten in place
+HEADER_BYTES = 128
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+class ExportRequest(BaseModel):
+    visualization_type: str | None = None
+    type: str | None = None
+    parameters: dict = {}
+    # Bulk generation: one export per entry, each laid over `parameters`
+    parameters_list: Optional[List[dict]] = Field(None, min_length=1, max_length=MAX_EXPORT_ITEMS)
+    # "npy": one (frames, H, W, C) file; "chunks": a directory of EXPORT_CHUNK_FRAMES-frame .npy files
+    format: Literal["npy", "chunks"] = "npy"
+    width: int = Field(EXPORT_WIDTH, ge=64, le=1920)
+    frame_rate: int = Field(30, ge=1, le=60)
+    channels: Literal[3, 4] = 3
+
+    def options(self) -> Dict[str, Any]:
+        return {"format": self.format, "width": self.width, "frame_rate": self.frame_rate, "channels": self.channels}
+
+    def items(self) -> List[Dict[str, Any]]:
+        vis_type = self.type or self.visualization_type
+        return [{"type": vis_type, "parameters": {**self.parameters, **p}} for p in (self.parameters_list or [{}])]
+
+
+def export_config(width: int, frame_rate: int, media_dir: str) -> Dict[str, Any]:
+    """
+    manim config for a frame export: every frame is drawn as in a full render
+    (same 16:9 frame, at `width` pixels) but write_to_movie is off, so no
+    ffmpeg process is started and nothing is encoded.
+    """
+    return {
+        "media_dir": media_dir,
+        "video_dir": media_dir,
+        "images_dir": os.path.join(media_dir, "images"),
+        "log_to_file": False,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+        "pixel_width": width,
+        "pixel_height": (width * 9 // 16) // 2 * 2,
+        "frame_rate": frame_rate,
+    }
+
+
+def npy_header(shape: Tuple[int, ...]) -> bytes:
+    """A version 1.0 .npy header for uint8 data of `shape`, always HEADER_BYTES long."""
+    fields = repr({"descr": "|u1", "fortran_order": False, "shape": tuple(shape)})
+    size = HEADER_BYTES - len(NPY_MAGIC) - 2
+    return NPY_MAGIC + size.to_bytes(2, "little") + fields.ljust(size - 1).encode("latin1") + b"\n"
+
+
+class NpyFrameFile:
+    """
+    A .npy file of uint8 frames, (frames, H, W, C), written in place through a
+    memory map. Room for `capacity` frames is allocated up front and doubled
+    whenever a render runs longer than estimated; close() trims the file to
+    the frames written and fixes the header, so np.load(path, mmap_mode="r")
+    maps the result without reading it.
+    """
+
+    def __init__(self, path: str, frame_shape: Tuple[int, ...], capacity: int):
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.count = 0
+        self._file = open(path, "w+b")
+        self._file.write(npy_header((0, *self.frame_shape)))
+        self._map(max(1, capacity))
+
+    def _map(self, capacity: int) -> None:
+        self._file.truncate(HEADER_BYTES + capacity * self.frame_bytes)
+        self.frames = np.memmap(self._file, dtype=np.uint8, mode="r+", offset=HEADER_BYTES,
+                                shape=(capacity, *self.frame_shape))
+        self.capacity = capacity
+
+    def append(self, frame: np.ndarray, repeat: int = 1) -> None:
+        """Write `frame` as the next `repeat` frames."""
+        end = self.count + repeat
+        if end > self.capacity:
+            self.frames.flush()
+            self.frames = None
+            self._map(max(2 * self.capacity, end))
+        self.frames[self.count:end] = frame
+        self.count = end
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.frames.flush()
+        # Drop the map before shrinking the file under it
+        self.frames = None
+        self._file.truncate(HEADER_BYTES + self.count * self.frame_bytes)
+        self._file.seek(0)
+        self._file.write(npy_header((self.count, *self.frame_shape)))
+        self._file.close()
+
+    def layout(self) -> Dict[str, Any]:
+        return {"data": os.path.basename(self.path)}
+
+
+class ChunkedFrameStore:
+    """
+    Frames split across .npy files of `chunk_frames` frames each, in one
+    directory: a long render never needs one huge file, and a data loader can
+    map one chunk at a time. Each chunk is an NpyFrameFile.
+    """
+
+    def __init__(self, directory: str, frame_shape: Tuple[int, ...], chunk_frames: int = EXPORT_CHUNK_FRAMES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.frame_shape = tuple(frame_shape)
+        self.chunk_frames = chunk_frames
+        self.count = 0
+        self.chunks: List[NpyFrameFile] = []
+
+    def append(self, frame: np.ndarray, repeat: int = 1) -> None:
+        while repeat:
+            if not self.chunks or self.chunks[-1].count == self.chunk_frames:
+                if self.chunks:
+                    self.chunks[-1].close()
+                path = os.path.join(self.directory, f"chunk_{len(self.chunks):05d}.npy")
+                self.chunks.append(NpyFrameFile(path, self.frame_shape, self.chunk_frames))
+            n = min(repeat, self.chunk_frames - self.chunks[-1].count)
+            self.chunks[-1].append(frame, n)
+            self.count += n
+            repeat -= n
+
+    def close(self) -> None:
+        for chunk in self.chunks:
+            chunk.close()
+
+    def layout(self) -> Dict[str, Any]:
+        name = os.path.basename(self.directory)
+        chunks, start = [], 0
+        for chunk in self.chunks:
+            chunks.append({"file": f"{name}/{os.path.basename(chunk.path)}", "start": start, "frames": chunk.count})
+            start += chunk.count
+        return {"chunk_frames": self.chunk_frames, "chunks": chunks}
+
+
+class FrameArrayWriter(SceneFileWriter):
+    """
+    SceneFileWriter that keeps every frame instead of encoding it: each one
+    goes to `sink` as uint8 (H, W, channels), and the play() it belongs to is
+    noted in `frame_plays`. Set `sink` (and `channels`) once the scene is
+    constructed, before it renders.
+    """
+
+    def __init__(self, renderer, scene_name, **kwargs):
+        super().__init__(renderer, scene_name, **kwargs)
+        self.sink = None
+        self.channels = 3
+        self.frame_plays: List[int] = []
+
+    def write_frame(self, frame_or_renderer, num_frames: int = 1):
+        frame = np.asarray(frame_or_renderer)
+        self.sink.append(frame[..., :self.channels], num_frames)
+        # The renderer counts a play once it has finished, so this is the current play's index
+        self.frame_plays.extend([self.renderer.num_plays] * num_frames)
+
+
+def frame_metadata(frame_plays: List[int], animations: List[List[str]], frame_rate: int) -> Dict[str, Any]:
+    """
+    Per-play and per-frame metadata for an export: each play()'s animations
+    and frame range, and for every frame its play index, time in the scene
+    and time since its play began, in seconds.
+    """
+    plays = np.asarray(frame_plays, dtype=int)
+    index = np.arange(len(plays))
+    firsts = {}
+    for i, play in enumerate(frame_plays):
+        firsts.setdefault(play, i)
+    first = np.array([firsts[p] for p in frame_plays], dtype=int)
+    n = max(len(animations), int(plays.max()) + 1 if len(plays) else 0)
+    counts = np.bincount(plays, minlength=n)
+    return {
+        "plays": [
+            {"index": i, "animations": animations[i] if i < len(animations) else [],
+             "first_frame": firsts.get(i), "frames": int(counts[i])}
+            for i in range(n)
+        ],
+        "frames": {
+            "play": plays.tolist(),
+            "time": np.round(index / frame_rate, 6).tolist(),
+            "play_time": np.round((index - first) / frame_rate, 6).tolist(),
+        },
+    }
+
+
+def write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """Write atomically: a manifest only exists once its frames are complete."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
@@ -0,0 +1,85 @@
+import os
+import shutil
+import logging
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from shared.artifact_store import ArtifactStore
+from postprocess import FFMPEG, finalize_video
+
+logger = logging.getLogger(__name__)
+
+MAX_LESSON_ITEMS = int(os.getenv("MCP_MAX_LESSON_ITEMS", "20"))
+TITLE_CARD = "title_card"
+
+
+class LessonItem(BaseModel):
+    visualization_type: str | None = None
+    type: str | None = None
+    parameters: dict = {}
+    # Shown on a title card before the item
+    title: Optional[str] = None
+    subtitle: Optional[str] = None
+
+
+class LessonRequest(BaseModel):
+    items: List[LessonItem] = Field(min_length=1, max_length=MAX_LESSON_ITEMS)
+    # Opening card for the whole lesson
+    title: Optional[str] = None
+    subtitle: Optional[str] = None
+    title_seconds: float = Field(2.0, ge=0.5, le=10.0)
+
+
+def _card(title: str, subtitle: Optional[str], seconds: float) -> Dict[str, Any]:
+    params = {"title": title, "seconds": seconds}
+    if subtitle:
+        params["subtitle"] = subtitle
+    return {"type": TITLE_CARD, "parameters": params}
+
+
+def lesson_segments(lesson: LessonRequest) -> List[Dict[str, Any]]:
+    """The lesson as the ordered render requests it is made of, title cards included."""
+    segments = []
+    if lesson.title:
+        segments.append(_card(lesson.title, lesson.subtitle, lesson.title_seconds))
+    for item in lesson.items:
+        if item.title:
+            segments.append(_card(item.title, item.subtitle, lesson.title_seconds))
+        segments.append({"type": item.type or item.visualization_type, "parameters": item.parameters or {}})
+    return segments
+
+
+def concat_videos(paths: List[str], out_path: str) -> None:
+    """
+    Join videos with ffmpeg's concat demuxer as a stream copy. Only valid when
+    every input has the same encode profile, which holds for everything
+    rendered by render_request (same codec, size, frame rate and timebase).
+    """
+    list_file = f"{out_path}.txt"
+    with open(list_file, "w") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [FFMPEG, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", out_path],
+            check=True,
+        )
+    finally:
+        os.remove(list_file)
+
+
+def compose_lesson(names: List[str], store: ArtifactStore, work_dir: str) -> str:
+    """Concatenate stored segment videos into one stored video; returns its artifact name."""
+    tmp_dir = tempfile.mkdtemp(prefix="lesson_", dir=work_dir)
+    try:
+        paths = [store.fetch(name, tmp_dir) for name in names]
+        out_path = os.path.join(tmp_dir, "lesson.mp4")
+        concat_videos(paths, out_path)
+        # Faststart, poster and content-hash name, like any other render
+        return finalize_video(out_path, store)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,65 @@
+import os
+import logging
+import subprocess
+from typing import Optional
+
+from shared.artifact_store import ArtifactStore, derived_name
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# "webp", "jpg" or "none"
+POSTER_FORMAT = os.getenv("MCP_POSTER_FORMAT", "webp").lower()
+
+
+def faststart_remux(src: str, dst: str) -> None:
+    """Rewrite an mp4 with the moov atom up front so playback can start before the download ends."""
+    subprocess.run(
+        [FFMPEG, "-y", "-v", "error", "-i", src, "-c", "copy", "-movflags", "+faststart", dst],
+        check=True,
+    )
+
+
+def make_poster(video: str, poster: str) -> bool:
+    """Grab the final frame as a compressed still for the player's poster attribute."""
+    codec = ["-c:v", "libwebp", "-quality", "75"] if poster.endswith(".webp") else ["-q:v", "4"]
+    result = subprocess.run(
+        [FFMPEG, "-y", "-v", "error", "-sseof", "-0.1", "-i", video, "-frames:v", "1", *codec, poster],
+    )
+    return result.returncode == 0 and os.path.exists(poster)
+
+
+def poster_name_for(store: ArtifactStore, name: str) -> Optional[str]:
+    if POSTER_FORMAT not in ("webp", "jpg"):
+        return None
+    poster = derived_name(name, "poster", f".{POSTER_FORMAT}")
+    return poster if store.exists(poster) else None
+
+
+def finalize_video(path: str, store: ArtifactStore) -> str:
+    """
+    Remux a freshly rendered video for faststart and hand it to the artifact
+    store, which names it by content hash so the bytes behind a URL never
+    change and can be cached forever. The poster is stored alongside under a
+    name derived from the video's. Returns the video's artifact name.
+    """
+    tmp = f"{path}.faststart.mp4"
+    try:
+        faststart_remux(path, tmp)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"faststart remux failed for {path}: {e}")
+        tmp = path
+
+    poster = None
+    if POSTER_FORMAT in ("webp", "jpg"):
+        poster = f"{os.path.splitext(path)[0]}.poster.{POSTER_FORMAT}"
+        if not make_poster(tmp, poster):
+            logger.warning(f"Could not create poster for {path}")
+            poster = None
+
+    name = store.put(tmp, ".mp4")
+    if tmp != path and os.path.exists(path):
+        os.remove(path)
+    if poster:
+        store.put(poster, f".{POSTER_FORMAT}", name=derived_name(name, "poster", f".{POSTER_FORMAT}"))
+    return name
@@ -0,0 +1,101 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+PREVIEW_WIDTH = int(os.getenv("MCP_PREVIEW_WIDTH", "480"))
+PREVIEW_CACHE_ENTRIES = int(os.getenv("MCP_PREVIEW_CACHE_ENTRIES", "256"))
+PREVIEW_CACHE_MB = float(os.getenv("MCP_PREVIEW_CACHE_MB", "64"))
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+class PreviewRequest(BaseModel):
+    visualization_type: str | None = None
+    type: str | None = None
+    parameters: dict = {}
+    # Show the scene as it is after this many play() calls (waits included); the final frame if unset
+    play: Optional[int] = Field(None, ge=1)
+    format: Literal["png", "webp"] = "png"
+    width: int = Field(PREVIEW_WIDTH, ge=160, le=1280)
+
+
+def preview_config(width: int, media_dir: str) -> Dict[str, Any]:
+    """
+    manim config for a still: with save_last_frame set, every play() jumps
+    straight to its end state instead of rendering frames, and nothing is
+    encoded. Same 16:9 frame as a full render, at low resolution.
+    """
+    return {
+        "media_dir": media_dir,
+        "images_dir": media_dir,
+        "log_to_file": False,
+        "write_to_movie": False,
+        "save_last_frame": True,
+        "disable_caching": True,
+        "pixel_width": width,
+        "pixel_height": (width * 9 // 16) // 2 * 2,
+    }
+
+
+def encode_image(image, fmt: str) -> bytes:
+    """A PIL image as PNG or WebP bytes."""
+    buf = io.BytesIO()
+    if fmt == "webp":
+        image.save(buf, format="WEBP", quality=80, method=4)
+    else:
+        # Flat-colored diagrams compress well already; optimizing costs more time than it saves bytes
+        image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+class PreviewCache:
+    """In-memory LRU of encoded previews, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int = PREVIEW_CACHE_ENTRIES, max_bytes: int = int(PREVIEW_CACHE_MB * 1024 * 1024)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
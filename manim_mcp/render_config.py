@@ -0,0 +1,83 @@
+import os
+import copy
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from manim import config
+
+# Values of the render running in this context; None means manim's process-wide values
+_current: ContextVar[Optional[dict]] = ContextVar("manim_config", default=None)
+_install_lock = threading.Lock()
+
+
+class ContextLocalDict(MutableMapping):
+    """
+    Stands in for manim's `config._d`, the dict behind every config property.
+    Inside isolated_config() reads and writes go to that render's own copy, so
+    renders on different threads each see their own output dirs and resolution
+    through the same global `config` object every manim module imported.
+    """
+
+    def __init__(self, base: dict):
+        self._base = base
+
+    def _dict(self) -> dict:
+        d = _current.get()
+        return self._base if d is None else d
+
+    def __getitem__(self, key):
+        return self._dict()[key]
+
+    def __setitem__(self, key, value):
+        self._dict()[key] = value
+
+    def __delitem__(self, key):
+        del self._dict()[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._dict())
+
+    def __len__(self) -> int:
+        return len(self._dict())
+
+    def __deepcopy__(self, memo):
+        # ManimConfig.copy() deep-copies _d; the copy is a plain snapshot of the values seen here
+        return copy.deepcopy(self._dict(), memo)
+
+
+def install() -> None:
+    """Make manim's global config context-local. Idempotent; values outside a render are unchanged."""
+    with _install_lock:
+        if not isinstance(config._d, ContextLocalDict):
+            config._d = ContextLocalDict(config._d)
+
+
+@contextmanager
+def isolated_config(overrides: Dict[str, Any]):
+    """
+    Like manim's tempconfig, but the overrides are only visible in the current
+    context (thread, or task) rather than to the whole process. Starts from the
+    values the caller sees and applies the overrides through config's own
+    setters, so derived values (frame size from pixel size, dirs) stay consistent.
+    """
+    install()
+    token = _current.set(copy.deepcopy(config._d))
+    try:
+        config.update(overrides)
+        yield config
+    finally:
+        _current.reset(token)
+
+
+def work_dir(renders_dir: str) -> str:
+    """
+    Media dir for renders on this worker: one per process and thread, reused by
+    the renders it runs one after another (which keeps manim's partial movie
+    cache useful) but never shared by two renders at the same time.
+    """
+    path = os.path.join(renders_dir, "work", f"{os.getpid()}_{threading.current_thread().name}")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,165 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from scheduler import DurationPredictor
+from shared.loop_monitor import percentiles
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+
+class QueueFull(Exception):
+    """Raised when a render cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, retry_after: int, reason: str = "Render queue is full"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("client_id", "req", "cost", "lane", "predicted", "enqueued", "fut")
+
+    def __init__(self, client_id, req, cost, lane, predicted, fut):
+        self.client_id = client_id
+        self.req = req
+        self.cost = cost
+        self.lane = lane
+        self.predicted = predicted
+        self.enqueued = time.monotonic()
+        self.fut = fut
+
+
+class RenderQueue:
+    """
+    Bounded render queue, scheduled shortest-expected-job-first.
+
+    At most `concurrency` renders run at once. Waiting jobs sit in an
+    interactive or a batch lane, each holding up to `max_depth`, and a single
+    client may hold at most `max_per_client` waiting slots. Each job's duration
+    is predicted from past renders; the next job to run is the one with the
+    lowest `predicted + lane penalty - aging * seconds waited`, so short jobs
+    go first, batch work yields to interactive work, and anything that waits
+    long enough eventually wins.
+    """
+
+    def __init__(self,
+                 runner: Callable[[Dict[str, Any]], Awaitable[str]],
+                 concurrency: int = 1,
+                 max_depth: int = 16,
+                 max_per_client: int = 4,
+                 initial_estimate: float = 20.0,
+                 predictor: Optional[DurationPredictor] = None,
+                 aging: float = 1.0,
+                 batch_penalty: float = 30.0,
+                 batch_depth: Optional[int] = None,
+                 history: int = 500):
+        self.runner = runner
+        self.concurrency = max(1, int(concurrency))
+        self.max_depth = max(0, int(max_depth))
+        self.batch_depth = self.max_depth if batch_depth is None else max(0, int(batch_depth))
+        self.max_per_client = max(1, int(max_per_client))
+        self.predictor = predictor or DurationPredictor(default_seconds=initial_estimate)
+        self.aging = aging
+        self.lane_penalty = {INTERACTIVE: 0.0, BATCH: float(batch_penalty)}
+        self.running = 0
+        self.rejected = 0
+        # Exponentially weighted average of observed render durations
+        self.avg_render_seconds = float(initial_estimate)
+        self._waiting: Dict[str, List[_Job]] = {lane: [] for lane in LANES}
+        self._per_client: Dict[str, int] = {}
+        self._running_predicted: List[float] = []
+        self._waits: Dict[str, Deque[float]] = {lane: deque(maxlen=history) for lane in LANES}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(jobs) for jobs in self._waiting.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the predicted work ahead."""
+        ahead = sum(job.predicted for jobs in self._waiting.values() for job in jobs)
+        ahead += min(self._running_predicted, default=0.0)
+        return max(1, math.ceil(ahead / self.concurrency))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "concurrency": self.concurrency,
+            "max_depth": self.max_depth,
+            "rejected": self.rejected,
+            "avg_render_seconds": round(self.avg_render_seconds, 3),
+            "lanes": {
+                lane: {"queued": len(self._waiting[lane]), "wait_seconds": percentiles(self._waits[lane], digits=3)}
+                for lane in LANES
+            },
+            "prediction": self.predictor.stats(),
+        }
+
+    async def submit(self, client_id: str, req: Dict[str, Any],
+                     cost: Optional[Dict[str, Any]] = None, lane: str = INTERACTIVE) -> str:
+        """Run `req` when capacity allows; raises QueueFull instead of waiting past the bound."""
+        lane = lane if lane in LANES else INTERACTIVE
+        if self.running >= self.concurrency:
+            depth = self.max_depth if lane == INTERACTIVE else self.batch_depth
+            if len(self._waiting[lane]) >= depth:
+                self.rejected += 1
+                raise QueueFull(self.retry_after())
+            if self._per_client.get(client_id, 0) >= self.max_per_client:
+                self.rejected += 1
+                raise QueueFull(self.retry_after(), "Too many queued renders for this client")
+
+        predicted = self.predictor.predict(req.get("type"), cost)
+        job = _Job(client_id, req, cost, lane, predicted, asyncio.get_running_loop().create_future())
+        self._waiting[lane].append(job)
+        self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+        self._dispatch()
+        return await job.fut
+
+    def _score(self, job: _Job, now: float) -> float:
+        return job.predicted + self.lane_penalty[job.lane] - self.aging * (now - job.enqueued)
+
+    def _next_job(self) -> Optional[_Job]:
+        now = time.monotonic()
+        while True:
+            candidates = [job for jobs in self._waiting.values() for job in jobs]
+            if not candidates:
+                return None
+            job = min(candidates, key=lambda j: self._score(j, now))
+            self._waiting[job.lane].remove(job)
+            self._per_client[job.client_id] -= 1
+            if not self._per_client[job.client_id]:
+                del self._per_client[job.client_id]
+            if not job.fut.done():
+                self._waits[job.lane].append(now - job.enqueued)
+                return job
+
+    def _dispatch(self) -> None:
+        while self.running < self.concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            self.running += 1
+            asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: _Job) -> None:
+        started = time.monotonic()
+        self._running_predicted.append(job.predicted)
+        try:
+            result = await self.runner(job.req)
+        except Exception as e:
+            if not job.fut.done():
+                job.fut.set_exception(e)
+        else:
+            elapsed = time.monotonic() - started
+            self.avg_render_seconds = 0.8 * self.avg_render_seconds + 0.2 * elapsed
+            self.predictor.observe(job.req.get("type"), job.cost, job.predicted, elapsed)
+            if not job.fut.done():
+                job.fut.set_result(result)
+        finally:
+            self._running_predicted.remove(job.predicted)
+            self.running -= 1
+            self._dispatch()
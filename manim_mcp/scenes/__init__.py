@@ -2,4 +2,8 @@
 # Each module should define:
 # - SCENE_KEY: str
 # - SCENE_CLASS: Type[Scene]
-# - PARAM_SCHEMA: dict (optional, for documentation/validation)
+# - PARAM_SCHEMA: pydantic model (a SceneParams from ._params) validating the parameters
+# - estimate_cost(params) -> RenderCost: plays, frames and mobjects before rendering
+# - clamp_params(params, factor) -> params (optional): cut the cost to about `factor` of it
+# - TEX_LABELS: List[str] (optional): MathTex strings the scene always draws, prewarmed in the Tex cache
+# - SWEEP_SCENE_CLASS (optional): a ._sweep.TiledSweepScene drawing many parameter variants in one video
@@ -0,0 +1,182 @@
+from typing import ClassVar, List, Optional, Tuple
+
+import numpy as np
+from manim import Animation, Line, VGroup, VMobject, BLUE_D, WHITE
+from pydantic import Field, model_validator
+
+from ._params import Matrix as MatrixParam, SceneParams
+
+# Most matrices one scene applies in sequence
+MAX_STEPS = 6
+# Eigenvectors closer than this to dependent (|det P|) don't make a basis
+EIGENBASIS_MIN_DET = 1e-6
+
+
+def composed(matrices: List[np.ndarray]) -> np.ndarray:
+    """The single matrix applying `matrices` in order: the last one's product with the rest."""
+    total = np.eye(len(matrices[0]))
+    for m in matrices:
+        total = m @ total
+    return total
+
+
+def real_eigenvectors(m: np.ndarray) -> List[Tuple[float, np.ndarray]]:
+    """(eigenvalue, unit eigenvector) for each real eigenvalue of m."""
+    values, vectors = np.linalg.eig(m)
+    pairs = []
+    for value, vector in zip(values, vectors.T):
+        if abs(value.imag) < 1e-9 and np.all(np.abs(vector.imag) < 1e-9):
+            v = vector.real
+            pairs.append((float(value.real), v / np.linalg.norm(v)))
+    return pairs
+
+
+def eigenbasis(m: np.ndarray) -> Optional[np.ndarray]:
+    """Columns are a basis of m's real eigenvectors, or None when m isn't diagonalizable over the reals."""
+    pairs = real_eigenvectors(m)
+    if len(pairs) < len(m):
+        return None
+    p = np.stack([v for _, v in pairs], axis=1)
+    return p if abs(np.linalg.det(p)) > EIGENBASIS_MIN_DET else None
+
+
+def transform_steps(matrices: List[np.ndarray], show_inverse: bool = False, change_basis: bool = False) -> List[np.ndarray]:
+    """
+    The matrices a scene applies to its grid, in order: optionally the change
+    to the composition's eigenbasis first (so the matrices then only stretch
+    the grid along its lines), then each matrix, then optionally the inverse
+    of every step before it, change of basis included, which brings the grid
+    back to where it started.
+    """
+    steps = list(matrices)
+    if change_basis:
+        steps.insert(0, eigenbasis(composed(matrices)))
+    if show_inverse:
+        steps.append(np.linalg.inv(composed(steps)))
+    return steps
+
+
+class MatrixSequenceParams(SceneParams):
+    """Parameters shared by the 2D and 3D linear transform scenes; `size` is the matrix side."""
+
+    size: ClassVar[int] = 2
+    matrix: MatrixParam | None = None
+    matrices: List[MatrixParam] | None = Field(None, min_length=1, max_length=MAX_STEPS,
+                                               description="Matrices applied one after another; replaces matrix")
+    show_basis: bool = True
+    show_eigenvectors: bool = Field(False, description="Overlay each matrix's real eigenvectors while it applies")
+    show_inverse: bool = Field(False, description="Finish by applying the inverse, back to the start")
+    eigenbasis: bool = Field(False, description="First change to the eigenbasis, where the transform only stretches")
+
+    def sequence(self) -> List[np.ndarray]:
+        ms = self.matrices or [self.matrix if self.matrix is not None else np.eye(self.size).tolist()]
+        return [np.array(m, dtype=float) for m in ms]
+
+    @model_validator(mode="after")
+    def _square(self):
+        for m in self.sequence():
+            if m.shape != (self.size, self.size):
+                raise ValueError(f"matrices must be {self.size}x{self.size}")
+        total = composed(self.sequence())
+        if self.show_inverse and abs(np.linalg.det(total)) < 1e-9:
+            raise ValueError("show_inverse needs an invertible matrix (nonzero determinant)")
+        if self.eigenbasis and eigenbasis(total) is None:
+            raise ValueError("eigenbasis needs a matrix with a full set of real eigenvectors")
+        return self
+
+
+class GridLines(VMobject):
+    """
+    Straight lines held as one VMobject, a single cubic per line. Every point
+    of every line is one row of `points`, so a matrix applies to the whole
+    grid in one product instead of line by line; a linear map keeps each
+    line straight, so one cubic stays exact.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, **kwargs):
+        super().__init__(**kwargs)
+        # Control points a third and two thirds along make the cubic a straight segment
+        weights = np.array([0.0, 1 / 3, 2 / 3, 1.0])[None, :, None]
+        starts, ends = np.asarray(starts, dtype=float), np.asarray(ends, dtype=float)
+        self.points = (starts[:, None, :] + weights * (ends - starts)[:, None, :]).reshape(-1, 3)
+
+
+def _axis_values(axis_range: List[float], step: float) -> np.ndarray:
+    lo, hi = axis_range[0], axis_range[1]
+    return np.arange(np.ceil(lo / step), np.floor(hi / step) + 1) * step
+
+
+def _plane_lines(x_range: List[float], y_range: List[float], faded: bool):
+    """Start and end points of the vertical then horizontal lines: at each step, or halfway between for `faded`."""
+    def values(axis_range):
+        step = axis_range[2]
+        v = _axis_values(axis_range, step / 2 if faded else step)
+        on_step = np.isclose(v / step, np.round(v / step))
+        # The axes are drawn on their own
+        return v[~on_step] if faded else v[~np.isclose(v, 0)]
+
+    xs, ys = values(x_range), values(y_range)
+    vertical = [np.stack([xs, np.full_like(xs, y), np.zeros_like(xs)], 1) for y in y_range[:2]]
+    horizontal = [np.stack([np.full_like(ys, x), ys, np.zeros_like(ys)], 1) for x in x_range[:2]]
+    return np.concatenate([vertical[0], horizontal[0]]), np.concatenate([vertical[1], horizontal[1]])
+
+
+def array_plane(x_range: List[float], y_range: List[float]) -> VGroup:
+    """
+    A NumberPlane look-alike (faded half-step lines, blue grid lines, white
+    axes, one unit per step of scene space) made of three GridLines.
+    """
+    faded = GridLines(*_plane_lines(x_range, y_range, faded=True), stroke_color=BLUE_D, stroke_width=1, stroke_opacity=0.3)
+    lines = GridLines(*_plane_lines(x_range, y_range, faded=False), stroke_color=BLUE_D, stroke_width=2)
+    axes = GridLines(
+        [[x_range[0], 0, 0], [0, y_range[0], 0]],
+        [[x_range[1], 0, 0], [0, y_range[1], 0]],
+        stroke_color=WHITE, stroke_width=2,
+    )
+    return VGroup(faded, lines, axes)
+
+
+def array_lattice(axis_range: List[float], **kwargs) -> GridLines:
+    """Lines through every lattice point of a cube, parallel to each axis, as one GridLines."""
+    values = _axis_values(axis_range, axis_range[2])
+    a, b = np.meshgrid(values, values, indexing="ij")
+    a, b = a.ravel(), b.ravel()
+    lo, hi = np.full_like(a, axis_range[0]), np.full_like(a, axis_range[1])
+    starts = np.concatenate([np.stack([lo, a, b], 1), np.stack([a, lo, b], 1), np.stack([a, b, lo], 1)])
+    ends = np.concatenate([np.stack([hi, a, b], 1), np.stack([a, hi, b], 1), np.stack([a, b, hi], 1)])
+    return GridLines(starts, ends, **kwargs)
+
+
+def eigen_lines(m: np.ndarray, length: float, **kwargs) -> VGroup:
+    """The spans of m's real eigenvectors, lines through the origin that m maps onto themselves."""
+    lines = VGroup()
+    for _, v in real_eigenvectors(m):
+        v3 = np.pad(v, (0, 3 - len(v)))
+        lines.add(Line(-length * v3, length * v3, **kwargs))
+    return lines
+
+
+class ApplyMatrixArray(Animation):
+    """
+    Moves every point of a mobject's family straight to `matrix @ point`.
+    Start and end points are computed once, when the animation begins, so
+    each frame is one multiply-add per submobject however dense the grid.
+    """
+
+    def __init__(self, mobject, matrix: np.ndarray, **kwargs):
+        m = np.eye(3)
+        m[:len(matrix), :len(matrix)] = matrix
+        self.matrix = m
+        super().__init__(mobject, **kwargs)
+
+    def begin(self) -> None:
+        self.paths = [
+            (mob, mob.points.copy(), mob.points @ self.matrix.T - mob.points)
+            for mob in self.mobject.get_family() if len(mob.points)
+        ]
+        super().begin()
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        t = self.rate_func(alpha)
+        for mob, start, delta in self.paths:
+            mob.points = start + t * delta
@@ -0,0 +1,66 @@
+import re
+from typing import Annotated, List
+
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+
+# Matches the render config in server.render_request
+FRAME_RATE = 30
+DEFAULT_RUN_TIME = 1.0
+
+MAX_MATRIX_SIDE = 32
+EXPRESSION_CHARS = re.compile(r"^[A-Za-z0-9_+\-*/().,^ ]+$")
+
+
+class SceneParams(BaseModel):
+    """Base for scene parameter models. Unknown keys (LLM noise) are dropped, not rejected."""
+
+    model_config = ConfigDict(extra="ignore")
+
+
+class RenderCost(BaseModel):
+    """Static estimate of what a render will do, computed before any mobject exists."""
+
+    plays: int
+    frames: int
+    mobjects: int
+
+
+def estimate(plays: int, mobjects: int, wait_seconds: float = 1.0, run_time: float = DEFAULT_RUN_TIME) -> RenderCost:
+    frames = round((plays * run_time + wait_seconds) * FRAME_RATE)
+    return RenderCost(plays=plays, frames=frames, mobjects=mobjects)
+
+
+def grid_lines(axis_range: List[float]) -> int:
+    """Lines a NumberPlane/Axes draws for a [min, max, step] range."""
+    return int((axis_range[1] - axis_range[0]) / axis_range[2]) + 1
+
+
+def _rectangular(m: List[List[float]]) -> List[List[float]]:
+    if not m or not m[0]:
+        raise ValueError("matrix must not be empty")
+    if any(len(row) != len(m[0]) for row in m):
+        raise ValueError("matrix rows must all have the same length")
+    if len(m) > MAX_MATRIX_SIDE or len(m[0]) > MAX_MATRIX_SIDE:
+        raise ValueError(f"matrix sides are limited to {MAX_MATRIX_SIDE}")
+    return m
+
+
+def _axis_range(r: List[float]) -> List[float]:
+    if len(r) != 3:
+        raise ValueError("range must be [min, max, step]")
+    if r[0] >= r[1] or r[2] <= 0:
+        raise ValueError("range needs min < max and step > 0")
+    return r
+
+
+def _expression(s: str) -> str:
+    # Scenes eval these with no builtins; keep them to arithmetic and names
+    if len(s) > 200 or "__" in s or not EXPRESSION_CHARS.match(s):
+        raise ValueError("expression may only use numbers, names and arithmetic")
+    return s
+
+
+Matrix = Annotated[List[List[float]], AfterValidator(_rectangular)]
+AxisRange = Annotated[List[float], AfterValidator(_axis_range)]
+Expression = Annotated[str, AfterValidator(_expression)]
+LayerSize = Annotated[int, Field(ge=1, le=32)]
@@ -0,0 +1,132 @@
+from typing import Callable, List
+
+import numpy as np
+from manim import VMobject
+
+# Intervals the range is first cut into, before any refinement
+COARSE_SAMPLES = 64
+# Most points one curve may end up with
+MAX_POINTS = 2000
+# Halvings of a coarse interval; 64 * 2**12 resolves 1/262144 of the range
+MAX_DEPTH = 12
+# Largest allowed distance, in scene units, between the curve at an interval's
+# midpoint and the chord's midpoint: about half a pixel at 1280 wide
+TOLERANCE = 0.005
+# A jump's midpoint sits near one end of its chord (ratio 0.5); on a smooth curve,
+# even at a kink, the ratio shrinks as the interval does
+JUMP_RATIO = 0.4
+# Points further than this from the origin (the frame is 14.2 x 8) are treated as
+# undefined, so asymptotes don't spend the budget on points nobody sees
+FAR_LIMIT = 100.0
+
+PointsFn = Callable[[np.ndarray], np.ndarray]
+
+
+def _evaluate(fn: PointsFn, t: np.ndarray) -> np.ndarray:
+    """Points for parameters t, (n, 3); rows that are non-finite or far off screen are all NaN."""
+    with np.errstate(all="ignore"):
+        points = np.array(fn(t), dtype=float).reshape(len(t), 3)
+        points[~(np.abs(points) <= FAR_LIMIT).all(axis=1)] = np.nan
+    return points
+
+
+def _midpoint_error(a: np.ndarray, b: np.ndarray, mid: np.ndarray) -> np.ndarray:
+    """How far the curve bends away from each chord; inf where the chord crosses into or out of NaN."""
+    with np.errstate(invalid="ignore"):
+        err = np.linalg.norm(mid - (a + b) / 2, axis=1)
+    finite = [np.isfinite(p[:, 0]) for p in (a, b, mid)]
+    mixed = ~(finite[0] == finite[1]) | ~(finite[0] == finite[2])
+    err[mixed] = np.inf
+    # Wholly undefined stretches need no points
+    err[~(finite[0] | finite[1] | finite[2])] = 0.0
+    return err
+
+
+def sample_curve(fn: PointsFn, t_min: float, t_max: float, coarse: int = COARSE_SAMPLES,
+                 budget: int = MAX_POINTS, tolerance: float = TOLERANCE, max_depth: int = MAX_DEPTH) -> List[np.ndarray]:
+    """
+    Adaptively sample the curve t -> fn(t) over [t_min, t_max]. `fn` takes an
+    array of parameters and returns the (n, 3) scene points, so it runs once
+    per refinement round rather than once per point.
+
+    Starts from a coarse uniform grid and halves every interval whose midpoint
+    is more than `tolerance` off its chord, round after round, until all are
+    within tolerance, `max_depth` rounds have run or the curve has `budget`
+    points (the worst intervals go first when the budget runs short). Flat
+    stretches stay at coarse spacing; bends, kinks and jumps get the points.
+
+    Returns the curve's pieces, each an (n, 3) array. It is split wherever fn
+    is non-finite or beyond FAR_LIMIT, and at jumps (intervals that never
+    converged because their midpoint stays at one end of the chord), so no
+    line is drawn across them.
+    """
+    t = np.linspace(t_min, t_max, coarse + 1)
+    points = _evaluate(fn, t)
+    active = np.arange(coarse)
+    for _ in range(max_depth):
+        room = budget - len(t)
+        if not len(active) or room <= 0:
+            break
+        mid_t = (t[active] + t[active + 1]) / 2
+        mid = _evaluate(fn, mid_t)
+        err = _midpoint_error(points[active], points[active + 1], mid)
+        split = np.flatnonzero(err > tolerance)
+        if len(split) > room:
+            split = np.sort(split[np.argsort(-err[split], kind="stable")[:room]])
+        t = np.insert(t, active[split] + 1, mid_t[split])
+        points = np.insert(points, active[split] + 1, mid[split], axis=0)
+        # Each split interval is now two, shifted right by the splits before it
+        left = active[split] + np.arange(len(split))
+        active = np.stack([left, left + 1], axis=1).ravel()
+
+    cut = ~np.isfinite(points[:-1, 0]) | ~np.isfinite(points[1:, 0])
+    if len(active):
+        # Still unresolved: a jump, or a steep stretch the budget or depth ran out on
+        mid = _evaluate(fn, (t[active] + t[active + 1]) / 2)
+        err = _midpoint_error(points[active], points[active + 1], mid)
+        chord = np.linalg.norm(points[active + 1] - points[active], axis=1)
+        with np.errstate(invalid="ignore"):
+            cut[active] |= (err > tolerance) & (err > JUMP_RATIO * chord)
+
+    finite = np.isfinite(points[:, 0])
+    pieces = np.split(np.arange(len(t)), np.flatnonzero(cut) + 1)
+    return [points[i[finite[i]]] for i in pieces if finite[i].sum() >= 2]
+
+
+def axes_map(axes) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """Vectorized coords_to_point for linear axes: (xs, ys) -> (n, 3) scene points."""
+    origin = np.asarray(axes.c2p(0, 0), dtype=float)
+    ex = np.asarray(axes.c2p(1, 0), dtype=float) - origin
+    ey = np.asarray(axes.c2p(0, 1), dtype=float) - origin
+    return lambda xs, ys: origin + np.multiply.outer(xs, ex) + np.multiply.outer(ys, ey)
+
+
+def curve_from_pieces(pieces: List[np.ndarray], **kwargs) -> VMobject:
+    """One VMobject with a smoothed subpath per piece, as axes.plot would build it."""
+    curve = VMobject(**kwargs)
+    for piece in pieces:
+        curve.start_new_path(piece[0])
+        curve.add_points_as_corners(piece[1:])
+    if pieces:
+        curve.make_smooth()
+    return curve
+
+
+def _broadcast(values, like: np.ndarray) -> np.ndarray:
+    # Constant expressions ("2") come back as scalars
+    return np.broadcast_to(np.asarray(values, dtype=float), like.shape)
+
+
+def plot_adaptive(axes, f: Callable[[np.ndarray], np.ndarray], x_range, **kwargs) -> VMobject:
+    """Graph of y = f(x) on `axes`, for a vectorized f; a drop-in for axes.plot(f, x_range=...)."""
+    to_points = axes_map(axes)
+    pieces = sample_curve(lambda x: to_points(x, _broadcast(f(x), x)), x_range[0], x_range[1])
+    return curve_from_pieces(pieces, **kwargs)
+
+
+def parametric_adaptive(axes, fx: Callable[[np.ndarray], np.ndarray], fy: Callable[[np.ndarray], np.ndarray],
+                        t_range, **kwargs) -> VMobject:
+    """The curve t -> (fx(t), fy(t)) on `axes`, for vectorized fx and fy."""
+    to_points = axes_map(axes)
+    pieces = sample_curve(lambda t: to_points(_broadcast(fx(t), t), _broadcast(fy(t), t)), t_range[0], t_range[1])
+    return curve_from_pieces(pieces, **kwargs)
@@ -0,0 +1,83 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from manim import Scene, Text, Create, Write, UP, GRAY
+
+# Frame is 14.2 x 8 units; tiles leave a margin and room for their caption
+FRAME_WIDTH = 13.6
+FRAME_HEIGHT = 7.4
+CAPTION_SIZE = 18
+# Points per curve when a sweep samples functions itself
+SAMPLES = 200
+
+
+def grid_shape(n: int) -> Tuple[int, int]:
+    """Rows and columns for n tiles, as square as possible with more columns than rows."""
+    cols = math.ceil(math.sqrt(n * 16 / 9))
+    cols = max(1, min(n, cols))
+    return math.ceil(n / cols), cols
+
+
+def tile_centers(n: int) -> Tuple[List[np.ndarray], float, float]:
+    rows, cols = grid_shape(n)
+    w, h = FRAME_WIDTH / cols, FRAME_HEIGHT / rows
+    centers = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        centers.append(np.array([-FRAME_WIDTH / 2 + (c + 0.5) * w, FRAME_HEIGHT / 2 - (r + 0.5) * h, 0.0]))
+    return centers, w, h
+
+
+def tile_position(index: int, n: int) -> Dict[str, int]:
+    r, c = divmod(index, grid_shape(n)[1])
+    return {"row": r, "col": c}
+
+
+class TiledSweepScene(Scene, ABC):
+    """
+    Base for sweep scenes: every variant of a scene drawn side by side in one
+    video, animated together so the video is as long as a single variant.
+
+    Subclasses implement `make_axes(variant)` (built once per distinct axes and
+    copied into each tile, so the shared setup is computed once) and
+    `animate(tiles)`, where each tile has its variant, its axes and a caption.
+    """
+
+    def __init__(self, variants: List[Dict[str, Any]] = None, labels: List[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.variants = variants or [{}]
+        self.labels = labels or [f"#{i + 1}" for i in range(len(self.variants))]
+
+    def axes_key(self, variant: Dict[str, Any]) -> Any:
+        """Variants with equal keys share one axes template."""
+        return None
+
+    @abstractmethod
+    def make_axes(self, variant: Dict[str, Any]):
+        """The axes one variant is drawn on."""
+
+    @abstractmethod
+    def animate(self, tiles: List[Dict[str, Any]]) -> None:
+        """Play every tile's animation, together."""
+
+    def construct(self):
+        centers, w, h = tile_centers(len(self.variants))
+        templates: Dict[Any, Any] = {}
+        tiles = []
+        for variant, label, center in zip(self.variants, self.labels, centers):
+            key = self.axes_key(variant)
+            if key not in templates:
+                templates[key] = self.make_axes(variant)
+            axes = templates[key].copy()
+            axes.scale(min(0.85 * w / axes.width, 0.75 * h / axes.height)).move_to(center)
+            caption = Text(label, font_size=CAPTION_SIZE, color=GRAY).next_to(axes, UP, buff=0.08)
+            tiles.append({"variant": variant, "axes": axes, "caption": caption})
+
+        self.play(
+            *[Create(t["axes"]) for t in tiles],
+            *[Write(t["caption"]) for t in tiles],
+        )
+        self.animate(tiles)
+        self.wait(1)
@@ -1,13 +1,36 @@
-from typing import Dict, Any
+from typing import Literal
 import numpy as np
-from manim import Scene, Axes, MathTex, Create, Write, BLUE, YELLOW
+from manim import Scene, Axes, MathTex, Create, Write, BLUE, YELLOW, UP
+from pydantic import Field, field_validator, model_validator
+
+from ._params import RenderCost, SceneParams, estimate
+from ._sampling import plot_adaptive
+from ._sweep import SAMPLES, TiledSweepScene
 
 SCENE_KEY = "activation_function"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "function": "str in {'sigmoid','relu','tanh'} (default 'sigmoid')",
-    "x_min": "float (default -6)",
-    "x_max": "float (default 6)",
-}
+TEX_LABELS = ["x", "f(x)", *(name.upper() for name in ("sigmoid", "relu", "tanh"))]
+
+class ActivationFunctionParams(SceneParams):
+    function: Literal["sigmoid", "relu", "tanh"] = Field("sigmoid", description="Activation to plot")
+    x_min: float = -6.0
+    x_max: float = 6.0
+
+    @field_validator("function", mode="before")
+    @classmethod
+    def _lower(cls, v):
+        return v.lower() if isinstance(v, str) else v
+
+    @model_validator(mode="after")
+    def _interval(self):
+        if self.x_min >= self.x_max:
+            raise ValueError("x_min must be below x_max")
+        return self
+
+PARAM_SCHEMA = ActivationFunctionParams
+
+def estimate_cost(p: ActivationFunctionParams) -> RenderCost:
+    # Axes with ticks and labels, title, one graph
+    return estimate(plays=2, mobjects=20)
 
 FUNC_MAP = {
     "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
@@ -28,9 +51,35 @@ class ActivationFunctionScene(Scene):
         self.play(Create(axes), Write(labels))
 
         f = FUNC_MAP.get(self.function, FUNC_MAP["sigmoid"])
-        graph = axes.plot(f, x_range=[self.x_min, self.x_max], color=BLUE)
+        graph = plot_adaptive(axes, f, [self.x_min, self.x_max], color=BLUE)
         title = MathTex(self.function.upper()).to_edge(UP)
         self.play(Write(title), Create(graph))
         self.wait(1)
 
 SCENE_CLASS = ActivationFunctionScene
+
+class ActivationFunctionSweepScene(TiledSweepScene):
+    """Several activations (or ranges) side by side, all sampled in one array."""
+
+    def axes_key(self, v):
+        return v["x_min"], v["x_max"]
+
+    def make_axes(self, v):
+        return Axes(x_range=[v["x_min"], v["x_max"], (v["x_max"]-v["x_min"])/4], y_range=[-1.5, 1.5, 0.5], x_length=10, y_length=4)
+
+    def animate(self, tiles):
+        lo = np.array([t["variant"]["x_min"] for t in tiles])
+        hi = np.array([t["variant"]["x_max"] for t in tiles])
+        X = lo[:, None] + np.linspace(0.0, 1.0, SAMPLES)[None, :] * (hi - lo)[:, None]
+        Y = np.empty_like(X)
+        for name, f in FUNC_MAP.items():
+            rows = [i for i, t in enumerate(tiles) if t["variant"]["function"] == name]
+            if rows:
+                Y[rows] = f(X[rows])
+        graphs = [
+            t["axes"].plot_line_graph(x, y, add_vertex_dots=False, line_color=BLUE)["line_graph"]
+            for t, x, y in zip(tiles, X, Y)
+        ]
+        self.play(*[Create(g) for g in graphs])
+
+SWEEP_SCENE_CLASS = ActivationFunctionSweepScene
@@ -1,12 +1,30 @@
-from typing import Dict, Any, List
+from typing import List
 import numpy as np
 from manim import Scene, VGroup, Dot, Line, MathTex, Create, FadeIn, FadeOut, RED, BLUE, YELLOW, WHITE
+from pydantic import Field
+
+from ._params import LayerSize, RenderCost, SceneParams, estimate
 
 SCENE_KEY = "backpropagation"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "layers": "List[int]: e.g. [3,4,2]",
-    "learning_rate": "float (default 0.1)",
-}
+TEX_LABELS = ["\\text{Forward Pass}", "\\text{Backward Pass (gradients)}"]
+
+class BackpropagationParams(SceneParams):
+    layers: List[LayerSize] = Field([3, 4, 2], min_length=1, max_length=10, description="Nodes per layer, e.g. [3,4,2]")
+    learning_rate: float = Field(0.1, gt=0)
+
+PARAM_SCHEMA = BackpropagationParams
+
+def edge_count(layers: List[int]) -> int:
+    return sum(a * b for a, b in zip(layers, layers[1:]))
+
+def estimate_cost(p: BackpropagationParams) -> RenderCost:
+    # Every forward edge is drawn again for the backward pass
+    return estimate(plays=7, mobjects=sum(p.layers) + 2 * edge_count(p.layers) + 2, wait_seconds=1.5)
+
+def clamp_params(p: BackpropagationParams, factor: float) -> BackpropagationParams:
+    # Edges grow with the square of layer width
+    cap = max(1, int(max(p.layers) * factor ** 0.5))
+    return p.model_copy(update={"layers": [min(n, cap) for n in p.layers]})
 
 LAYER_X_SPACING = 2.5
 NODE_Y_SPACING = 0.8
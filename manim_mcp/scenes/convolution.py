@@ -1,13 +1,11 @@
-from typing import Dict, Any, List
+from typing import List
 import numpy as np
 from manim import Scene, VGroup, Square, Integer, Matrix, SurroundingRectangle, Create, FadeIn, Transform, YELLOW, BLUE, GREEN
+from pydantic import Field, model_validator
+
+from ._params import Matrix as MatrixParam, RenderCost, SceneParams, estimate
 
 SCENE_KEY = "convolution"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "input_matrix": "List[List[float]] (default 5x5 sample)",
-    "kernel": "List[List[float]] (default 3x3 edge detector)",
-    "stride": "int (default 1)",
-}
 
 DEFAULT_INPUT = [
     [1, 2, 3, 2, 1],
@@ -23,6 +21,45 @@ DEFAULT_KERNEL = [
     [-1, -1, -1],
 ]
 
+class ConvolutionParams(SceneParams):
+    input_matrix: MatrixParam | None = Field(None, description="Input grid (default 5x5 sample)")
+    kernel: MatrixParam | None = Field(None, description="Kernel (default 3x3 edge detector)")
+    stride: int = Field(1, ge=1)
+
+    @model_validator(mode="after")
+    def _kernel_fits(self):
+        X = self.input_matrix or DEFAULT_INPUT
+        K = self.kernel or DEFAULT_KERNEL
+        if len(K) > len(X) or len(K[0]) > len(X[0]):
+            raise ValueError("kernel must fit inside input_matrix")
+        return self
+
+PARAM_SCHEMA = ConvolutionParams
+
+def output_shape(p: ConvolutionParams):
+    X = p.input_matrix or DEFAULT_INPUT
+    K = p.kernel or DEFAULT_KERNEL
+    return (len(X) - len(K)) // p.stride + 1, (len(X[0]) - len(K[0])) // p.stride + 1
+
+def estimate_cost(p: ConvolutionParams) -> RenderCost:
+    X = p.input_matrix or DEFAULT_INPUT
+    K = p.kernel or DEFAULT_KERNEL
+    out_h, out_w = output_shape(p)
+    windows = out_h * out_w
+    # Two plays per window: move the highlight, write the output entry
+    entries = len(X) * len(X[0]) + len(K) * len(K[0]) + windows
+    return estimate(plays=2 + 2 * windows, mobjects=entries + 7)
+
+def clamp_params(p: ConvolutionParams, factor: float) -> ConvolutionParams:
+    """Crop the input so fewer windows are visited."""
+    X = p.input_matrix or DEFAULT_INPUT
+    K = p.kernel or DEFAULT_KERNEL
+    out_h, out_w = output_shape(p)
+    scale = factor ** 0.5
+    rows = (max(1, int(out_h * scale)) - 1) * p.stride + len(K)
+    cols = (max(1, int(out_w * scale)) - 1) * p.stride + len(K[0])
+    return p.model_copy(update={"input_matrix": [row[:cols] for row in X[:rows]]})
+
 class ConvolutionScene(Scene):
     def __init__(self,
                  input_matrix: List[List[float]] | None = None,
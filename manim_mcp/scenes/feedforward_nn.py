@@ -1,11 +1,31 @@
-from typing import Dict, Any, List
+from typing import List, Literal
 from manim import Scene, VGroup, Dot, Line, MathTex, Create, FadeIn, FadeOut, BLUE, YELLOW, WHITE
+from pydantic import Field, field_validator
+
+from ._params import LayerSize, RenderCost, SceneParams, estimate
 
 SCENE_KEY = "feedforward_nn"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "layers": "List[int]: e.g. [3,4,2]",
-    "activation": "str in {'relu','sigmoid','tanh','linear'} (default 'relu')",
-}
+TEX_LABELS = [f"\\text{{Activation:}}\\ {a.upper()}" for a in ("relu", "sigmoid", "tanh", "linear")]
+
+class FeedForwardNNParams(SceneParams):
+    layers: List[LayerSize] = Field([3, 4, 2], min_length=1, max_length=10, description="Nodes per layer, e.g. [3,4,2]")
+    activation: Literal["relu", "sigmoid", "tanh", "linear"] = "relu"
+
+    @field_validator("activation", mode="before")
+    @classmethod
+    def _lower(cls, v):
+        return v.lower() if isinstance(v, str) else v
+
+PARAM_SCHEMA = FeedForwardNNParams
+
+def estimate_cost(p: FeedForwardNNParams) -> RenderCost:
+    edges = sum(a * b for a, b in zip(p.layers, p.layers[1:]))
+    return estimate(plays=3, mobjects=sum(p.layers) + edges + 1)
+
+def clamp_params(p: FeedForwardNNParams, factor: float) -> FeedForwardNNParams:
+    # Edges grow with the square of layer width
+    cap = max(1, int(max(p.layers) * factor ** 0.5))
+    return p.model_copy(update={"layers": [min(n, cap) for n in p.layers]})
 
 LAYER_X_SPACING = 2.5
 NODE_Y_SPACING = 0.8
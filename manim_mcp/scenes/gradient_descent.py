@@ -1,16 +1,31 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, List, Tuple
 import numpy as np
 from manim import Scene, Axes, Dot, Vector, VGroup, MathTex, Create, Write, FadeIn, FadeOut, RED, BLUE
+from pydantic import Field
+
+from ._params import AxisRange, Expression, RenderCost, SceneParams, estimate, grid_lines
+from ._sweep import TiledSweepScene
 
 SCENE_KEY = "gradient_descent"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "function": "str: f(x,y) in terms of x,y, e.g. '(x-1)**2 + (y+2)**2'",
-    "start_point": "List[float]: [x0,y0] (default [3,3])",
-    "learning_rate": "float (default 0.1)",
-    "steps": "int (default 20)",
-    "x_range": "List[float]: [min,max,step] (default [-4,4,1])",
-    "y_range": "List[float]: [min,max,step] (default [-4,4,1])",
-}
+TEX_LABELS = ["x", "y"]
+
+class GradientDescentParams(SceneParams):
+    function: Expression = Field("(x-1)**2 + (y+2)**2", description="f(x,y) in terms of x,y")
+    start_point: List[float] = Field([3.0, 3.0], min_length=2, max_length=2, description="[x0,y0]")
+    learning_rate: float = Field(0.1, gt=0)
+    steps: int = Field(20, ge=1, le=1000)
+    x_range: AxisRange = Field([-4, 4, 1], description="[min,max,step]")
+    y_range: AxisRange = Field([-4, 4, 1], description="[min,max,step]")
+
+PARAM_SCHEMA = GradientDescentParams
+
+def estimate_cost(p: GradientDescentParams) -> RenderCost:
+    # One FadeIn per step after the axes and the starting dot
+    axes = 2 * (grid_lines(p.x_range) + grid_lines(p.y_range)) + 2
+    return estimate(plays=2 + p.steps, mobjects=axes + p.steps + 1)
+
+def clamp_params(p: GradientDescentParams, factor: float) -> GradientDescentParams:
+    return p.model_copy(update={"steps": max(1, int(p.steps * factor))})
 
 SAFE_NS = {
     "sin": np.sin,
@@ -24,6 +39,25 @@ SAFE_NS = {
     "abs": np.abs,
 }
 
+def descend(function: str, starts, learning_rates, steps: int, eps: float = 1e-4) -> np.ndarray:
+    """
+    Gradient descent from many start points / learning rates at once, with
+    central-difference gradients. Returns positions shaped (variants, steps + 1, 2).
+    """
+    def f(x, y):
+        return np.broadcast_to(eval(function, {"__builtins__": {}}, {**SAFE_NS, "x": x, "y": y}), x.shape)
+
+    p = np.array(starts, dtype=float).reshape(-1, 2)
+    lr = np.array(learning_rates, dtype=float).reshape(-1, 1)
+    path = np.empty((len(p), steps + 1, 2))
+    path[:, 0] = p
+    for s in range(steps):
+        x, y = p[:, 0], p[:, 1]
+        g = np.stack([f(x + eps, y) - f(x - eps, y), f(x, y + eps) - f(x, y - eps)], axis=1) / (2*eps)
+        p = p - lr * g
+        path[:, s + 1] = p
+    return path
+
 class GradientDescentScene(Scene):
     def __init__(self,
                  function: str = "(x-1)**2 + (y+2)**2",
@@ -44,21 +78,12 @@ class GradientDescentScene(Scene):
     def f(self, x, y):
         return eval(self.function, {"__builtins__": {}}, {**SAFE_NS, "x": x, "y": y})
 
-    def grad(self, x, y, eps: float = 1e-4):
-        fx = (self.f(x + eps, y) - self.f(x - eps, y)) / (2*eps)
-        fy = (self.f(x, y + eps) - self.f(x, y - eps)) / (2*eps)
-        return np.array([fx, fy], dtype=float)
-
     def construct(self):
         axes = Axes(x_range=self.x_range, y_range=self.y_range, x_length=8, y_length=8)
         labels = axes.get_axis_labels(MathTex("x"), MathTex("y"))
         self.play(Create(axes), Write(labels))
 
-        path_points = [self.p.copy()]
-        for _ in range(self.steps):
-            g = self.grad(*self.p)
-            self.p = self.p - self.lr * g
-            path_points.append(self.p.copy())
+        path_points = descend(self.function, [self.p], [self.lr], self.steps)[0]
 
         dots = VGroup(*[Dot(axes.c2p(px, py), color=RED, radius=0.06) for px, py in path_points])
         self.play(FadeIn(dots[0]))
@@ -67,3 +92,30 @@ class GradientDescentScene(Scene):
         self.wait(1)
 
 SCENE_CLASS = GradientDescentScene
+
+class GradientDescentSweepScene(TiledSweepScene):
+    """Descent paths for several functions, start points or learning rates, side by side."""
+
+    def axes_key(self, v):
+        return tuple(v["x_range"]), tuple(v["y_range"])
+
+    def make_axes(self, v):
+        return Axes(x_range=v["x_range"], y_range=v["y_range"], x_length=8, y_length=8)
+
+    def animate(self, tiles):
+        # One vectorized descent per distinct function, run to the longest variant
+        paths = [None] * len(tiles)
+        groups: Dict[str, List[int]] = {}
+        for i, t in enumerate(tiles):
+            groups.setdefault(t["variant"]["function"], []).append(i)
+        for function, idx in groups.items():
+            vs = [tiles[i]["variant"] for i in idx]
+            path = descend(function, [v["start_point"] for v in vs], [v["learning_rate"] for v in vs], max(v["steps"] for v in vs))
+            for i, p, v in zip(idx, path, vs):
+                paths[i] = p[:v["steps"] + 1]
+
+        dots = [[Dot(t["axes"].c2p(px, py), color=RED, radius=0.04) for px, py in p] for t, p in zip(tiles, paths)]
+        for step in range(max(len(d) for d in dots)):
+            self.play(*[FadeIn(d[step]) for d in dots if step < len(d)])
+
+SWEEP_SCENE_CLASS = GradientDescentSweepScene
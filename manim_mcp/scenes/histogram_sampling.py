@@ -1,15 +1,28 @@
-from typing import Dict, Any, List
+from typing import List
 import numpy as np
 from manim import Scene, Axes, BarChart, VGroup, Create, Write, MathTex, BLUE, YELLOW
+from pydantic import Field
+
+from ._params import RenderCost, SceneParams, estimate
 
 SCENE_KEY = "histogram_sampling"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "data": "List[float] (optional)",
-    "mean": "float (default 0.0 if data not provided)",
-    "std": "float (default 1.0 if data not provided)",
-    "n": "int number of samples when generating (default 500)",
-    "bins": "int number of bins (default 20)",
-}
+TEX_LABELS = ["\\text{Histogram}"]
+
+class HistogramSamplingParams(SceneParams):
+    data: List[float] | None = Field(None, max_length=100000)
+    mean: float = Field(0.0, description="Used when data is not provided")
+    std: float = Field(1.0, gt=0, description="Used when data is not provided")
+    n: int = Field(500, ge=1, le=100000, description="Number of samples when generating")
+    bins: int = Field(20, ge=1, le=200)
+
+PARAM_SCHEMA = HistogramSamplingParams
+
+def estimate_cost(p: HistogramSamplingParams) -> RenderCost:
+    # Each bar carries a two-line range label
+    return estimate(plays=2, mobjects=3 * p.bins + 15)
+
+def clamp_params(p: HistogramSamplingParams, factor: float) -> HistogramSamplingParams:
+    return p.model_copy(update={"bins": max(1, int(p.bins * factor))})
 
 class HistogramSamplingScene(Scene):
     def __init__(self, data: List[float] | None = None, mean: float = 0.0, std: float = 1.0, n: int = 500, bins: int = 20, **kwargs):
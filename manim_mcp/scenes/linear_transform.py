@@ -1,50 +1,90 @@
-from typing import Dict, Any, List
+from typing import List
 import numpy as np
-from manim import Scene, NumberPlane, Vector, VGroup, Matrix, MathTex, FadeIn, Transform, Create, BLUE, YELLOW, WHITE
+from manim import Scene, Vector, VGroup, Matrix, FadeIn, FadeOut, Transform, Create, BLUE, YELLOW, TEAL
+from pydantic import Field
+
+from ._grid import ApplyMatrixArray, MatrixSequenceParams, array_plane, eigen_lines, real_eigenvectors, transform_steps
+from ._params import AxisRange, Matrix as MatrixParam, RenderCost, estimate, grid_lines
 
 SCENE_KEY = "linear_transform"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "matrix": "List[List[float]]: 2x2 matrix, e.g. [[1,0],[0,1]]",
-    "show_basis": "bool (default True)",
-    "grid_x_range": "List[float]: [min, max, step] (default [-6, 6, 1])",
-    "grid_y_range": "List[float]: [min, max, step] (default [-4, 4, 1])",
-}
+
+class LinearTransformParams(MatrixSequenceParams):
+    matrix: MatrixParam | None = Field(None, description="2x2 matrix, e.g. [[1,0],[0,1]] (identity if unset)")
+    grid_x_range: AxisRange = Field([-6, 6, 1], description="[min, max, step]")
+    grid_y_range: AxisRange = Field([-4, 4, 1], description="[min, max, step]")
+
+PARAM_SCHEMA = LinearTransformParams
+
+def estimate_cost(p: LinearTransformParams) -> RenderCost:
+    # The plane is three mobjects, but drawing it still costs a stroke per line,
+    # one per step on each axis plus the faded ones between
+    lines = 2 * (grid_lines(p.grid_x_range) + grid_lines(p.grid_y_range))
+    steps = len(p.sequence()) + p.show_inverse + p.eigenbasis
+    # Plane, basis and label, then a play per step, plus fading eigenvectors in and out
+    plays = 2 + p.show_basis + steps * (3 if p.show_eigenvectors else 1)
+    return estimate(plays=plays, mobjects=lines + 10)
+
+def clamp_params(p: LinearTransformParams, factor: float) -> LinearTransformParams:
+    """Coarsen the grid rather than shrink the visible area."""
+    return p.model_copy(update={
+        "grid_x_range": [*p.grid_x_range[:2], p.grid_x_range[2] / factor],
+        "grid_y_range": [*p.grid_y_range[:2], p.grid_y_range[2] / factor],
+    })
 
 class LinearTransformScene(Scene):
     def __init__(self,
                  matrix: List[List[float]] | None = None,
+                 matrices: List[List[List[float]]] | None = None,
                  show_basis: bool = True,
+                 show_eigenvectors: bool = False,
+                 show_inverse: bool = False,
+                 eigenbasis: bool = False,
                  grid_x_range: List[float] | None = None,
                  grid_y_range: List[float] | None = None,
                  **kwargs):
         super().__init__(**kwargs)
-        self.M = np.array(matrix if matrix is not None else [[1.0, 0.0], [0.0, 1.0]], dtype=float)
+        sequence = matrices or [matrix if matrix is not None else [[1.0, 0.0], [0.0, 1.0]]]
+        self.steps = transform_steps([np.array(m, dtype=float) for m in sequence], show_inverse, eigenbasis)
         self.show_basis = bool(show_basis)
+        self.show_eigenvectors = bool(show_eigenvectors)
         self.grid_x_range = grid_x_range or [-6, 6, 1]
         self.grid_y_range = grid_y_range or [-4, 4, 1]
 
     def construct(self):
-        plane = NumberPlane(x_range=self.grid_x_range, y_range=self.grid_y_range)
-        self.play(Create(plane))
+        # Array-backed: each step moves every grid line in one product per style
+        plane = array_plane(self.grid_x_range, self.grid_y_range)
+        self.play(FadeIn(plane))
 
-        vectors = VGroup()
-        e1 = Vector([1, 0], color=BLUE)
-        e2 = Vector([0, 1], color=YELLOW)
+        vectors = VGroup(Vector([1, 0], color=BLUE), Vector([0, 1], color=YELLOW))
         if self.show_basis:
-            vectors.add(e1, e2)
             self.play(Create(vectors))
 
-        # Show matrix label
-        mat_label = Matrix(self.M.round(2).tolist())
-        mat_label.to_corner()
+        # Label with the matrix being applied, replaced at each step
+        mat_label = Matrix(self.steps[0].round(2).tolist()).to_corner()
         self.play(FadeIn(mat_label))
 
-        # Apply linear transform to the plane and basis
-        self.play(Transform(plane, plane.apply_matrix(self.M)))
-        if self.show_basis:
-            e1_t = Vector((self.M @ np.array([1, 0], dtype=float)).tolist(), color=BLUE)
-            e2_t = Vector((self.M @ np.array([0, 1], dtype=float)).tolist(), color=YELLOW)
-            self.play(Transform(vectors[0], e1_t), Transform(vectors[1], e2_t))
+        total = np.eye(2)
+        # Long enough to cross the whole grid from the origin
+        reach = float(np.hypot(max(map(abs, self.grid_x_range[:2])), max(map(abs, self.grid_y_range[:2]))))
+        for i, step in enumerate(self.steps):
+            total = step @ total
+            anims = [ApplyMatrixArray(plane, step)]
+            if i > 0:
+                anims.append(Transform(mat_label, Matrix(step.round(2).tolist()).to_corner()))
+            if self.show_basis:
+                anims += [Transform(vectors[j], Vector(total[:, j].tolist(), color=vectors[j].get_color())) for j in range(2)]
+
+            overlay = VGroup()
+            if self.show_eigenvectors:
+                # Each span stays put while its vector is only stretched, by its eigenvalue
+                arrows = [Vector(v.tolist(), color=TEAL) for _, v in real_eigenvectors(step)]
+                overlay.add(eigen_lines(step, reach, color=TEAL, stroke_opacity=0.6), *arrows)
+                self.play(FadeIn(overlay))
+                anims += [Transform(arrow, Vector((value * v).tolist(), color=TEAL))
+                          for arrow, (value, v) in zip(arrows, real_eigenvectors(step))]
+            self.play(*anims)
+            if self.show_eigenvectors:
+                self.play(FadeOut(overlay))
         self.wait(1)
 
 SCENE_CLASS = LinearTransformScene
@@ -0,0 +1,97 @@
+from typing import List
+import numpy as np
+from manim import ThreeDScene, ThreeDAxes, Arrow3D, VGroup, Matrix, FadeIn, FadeOut, Transform, Create, ORIGIN, BLUE, BLUE_D, GREEN, RED, TEAL
+from pydantic import Field
+
+from ._grid import ApplyMatrixArray, MatrixSequenceParams, array_lattice, eigen_lines, real_eigenvectors, transform_steps
+from ._params import AxisRange, Matrix as MatrixParam, RenderCost, estimate, grid_lines
+
+SCENE_KEY = "linear_transform_3d"
+
+class LinearTransform3DParams(MatrixSequenceParams):
+    size = 3
+    matrix: MatrixParam | None = Field(None, description="3x3 matrix, e.g. [[1,0,0],[0,1,0],[0,0,1]] (identity if unset)")
+    grid_range: AxisRange = Field([-2, 2, 1], description="[min, max, step] on every axis")
+
+PARAM_SCHEMA = LinearTransform3DParams
+
+# Arrow3D is a cone and a cylinder of Surface faces; low resolution keeps three of them cheap
+ARROW_RESOLUTION = 8
+
+def estimate_cost(p: LinearTransform3DParams) -> RenderCost:
+    # One stroke per lattice line, three directions through an n x n grid of points
+    lines = 3 * grid_lines(p.grid_range) ** 2
+    steps = len(p.sequence()) + p.show_inverse + p.eigenbasis
+    plays = 2 + p.show_basis + steps * (3 if p.show_eigenvectors else 1)
+    arrow_faces = 3 * 2 * ARROW_RESOLUTION ** 2 if p.show_basis else 0
+    return estimate(plays=plays, mobjects=lines + arrow_faces + 20)
+
+def clamp_params(p: LinearTransform3DParams, factor: float) -> LinearTransform3DParams:
+    """Coarsen the lattice rather than shrink the visible volume."""
+    return p.model_copy(update={"grid_range": [*p.grid_range[:2], p.grid_range[2] / factor]})
+
+def _arrow(v: np.ndarray, color) -> Arrow3D:
+    return Arrow3D(ORIGIN, np.asarray(v, dtype=float), color=color, resolution=ARROW_RESOLUTION)
+
+class LinearTransform3DScene(ThreeDScene):
+    def __init__(self,
+                 matrix: List[List[float]] | None = None,
+                 matrices: List[List[List[float]]] | None = None,
+                 show_basis: bool = True,
+                 show_eigenvectors: bool = False,
+                 show_inverse: bool = False,
+                 eigenbasis: bool = False,
+                 grid_range: List[float] | None = None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        sequence = matrices or [matrix if matrix is not None else np.eye(3).tolist()]
+        self.steps = transform_steps([np.array(m, dtype=float) for m in sequence], show_inverse, eigenbasis)
+        self.show_basis = bool(show_basis)
+        self.show_eigenvectors = bool(show_eigenvectors)
+        self.grid_range = grid_range or [-2, 2, 1]
+
+    def construct(self):
+        self.set_camera_orientation(phi=65 * np.pi / 180, theta=-45 * np.pi / 180)
+        lo, hi = self.grid_range[:2]
+        axes = ThreeDAxes(x_range=[lo, hi, 1], y_range=[lo, hi, 1], z_range=[lo, hi, 1],
+                          x_length=hi - lo, y_length=hi - lo, z_length=hi - lo)
+        # One unit per scene unit with the origin at ORIGIN, where the lattice and matrices work
+        axes.shift(-axes.c2p(0, 0, 0))
+        # Array-backed: each step moves every lattice line in one product
+        lattice = array_lattice(self.grid_range, stroke_color=BLUE_D, stroke_width=1.5, stroke_opacity=0.6)
+        self.play(Create(axes), FadeIn(lattice))
+
+        colors = [RED, GREEN, BLUE]
+        basis = VGroup(*(_arrow(e, c) for e, c in zip(np.eye(3), colors)))
+        if self.show_basis:
+            self.play(Create(basis))
+
+        mat_label = Matrix(self.steps[0].round(2).tolist()).scale(0.7).to_corner()
+        self.add_fixed_in_frame_mobjects(mat_label)
+        self.play(FadeIn(mat_label))
+
+        total = np.eye(3)
+        reach = float(np.sqrt(3) * max(abs(lo), abs(hi)))
+        for i, step in enumerate(self.steps):
+            total = step @ total
+            anims = [ApplyMatrixArray(lattice, step)]
+            if i > 0:
+                # mat_label is fixed in frame, so its target is laid out in frame coordinates too
+                anims.append(Transform(mat_label, Matrix(step.round(2).tolist()).scale(0.7).to_corner()))
+            if self.show_basis:
+                anims += [Transform(basis[j], _arrow(total[:, j], colors[j])) for j in range(3)]
+
+            overlay = VGroup()
+            if self.show_eigenvectors:
+                # Each span stays put while its vector is only stretched, by its eigenvalue
+                pairs = real_eigenvectors(step)
+                arrows = [_arrow(v, TEAL) for _, v in pairs]
+                overlay.add(eigen_lines(step, reach, color=TEAL, stroke_opacity=0.6), *arrows)
+                self.play(FadeIn(overlay))
+                anims += [Transform(arrow, _arrow(value * v, TEAL)) for arrow, (value, v) in zip(arrows, pairs)]
+            self.play(*anims)
+            if self.show_eigenvectors:
+                self.play(FadeOut(overlay))
+        self.wait(1)
+
+SCENE_CLASS = LinearTransform3DScene
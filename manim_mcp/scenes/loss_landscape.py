@@ -1,13 +1,25 @@
-from typing import Dict, Any
 import numpy as np
 from manim import ThreeDScene, ThreeDAxes, Surface, MathTex, Create, Write, BLUE, YELLOW
+from pydantic import Field
+
+from ._params import AxisRange, Expression, RenderCost, SceneParams, estimate, grid_lines
 
 SCENE_KEY = "loss_landscape"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "function": "str: z=f(x,y) (default '(x-1)**2 + (y+2)**2')",
-    "x_range": "List[float]: [min,max,step] (default [-3,3,1])",
-    "y_range": "List[float]: [min,max,step] (default [-3,3,1])",
-}
+TEX_LABELS = ["\\text{Loss Landscape}"]
+
+class LossLandscapeParams(SceneParams):
+    function: Expression = Field("(x-1)**2 + (y+2)**2", description="z=f(x,y)")
+    x_range: AxisRange = Field([-3, 3, 1], description="[min,max,step]")
+    y_range: AxisRange = Field([-3, 3, 1], description="[min,max,step]")
+
+PARAM_SCHEMA = LossLandscapeParams
+
+SURFACE_RESOLUTION = 24
+
+def estimate_cost(p: LossLandscapeParams) -> RenderCost:
+    # One face per surface cell dominates the axes' ticks
+    ticks = grid_lines(p.x_range) + grid_lines(p.y_range) + 5
+    return estimate(plays=3, mobjects=SURFACE_RESOLUTION ** 2 + ticks + 4)
 
 SAFE_NS = {
     "sin": np.sin,
@@ -47,7 +59,7 @@ class LossLandscapeScene(ThreeDScene):
             lambda u, v: surf(u, v),
             u_range=(self.x_range[0], self.x_range[1]),
             v_range=(self.y_range[0], self.y_range[1]),
-            resolution=(24, 24),
+            resolution=(SURFACE_RESOLUTION, SURFACE_RESOLUTION),
             fill_opacity=0.7,
             checkerboard_colors=[BLUE, YELLOW],
         )
@@ -1,14 +1,30 @@
-from typing import Dict, Any
 import numpy as np
 from manim import Scene, Axes, MathTex, Create, Write, BLUE
+from pydantic import Field, model_validator
+
+from ._params import RenderCost, SceneParams, estimate
+from ._sampling import plot_adaptive
+from ._sweep import SAMPLES, TiledSweepScene
 
 SCENE_KEY = "normal_distribution"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "mean": "float (default 0.0)",
-    "std": "float > 0 (default 1.0)",
-    "x_min": "float (default -4)",
-    "x_max": "float (default 4)",
-}
+TEX_LABELS = ["x", "p(x)"]
+
+class NormalDistributionParams(SceneParams):
+    mean: float = 0.0
+    std: float = Field(1.0, gt=0)
+    x_min: float = -4.0
+    x_max: float = 4.0
+
+    @model_validator(mode="after")
+    def _interval(self):
+        if self.x_min >= self.x_max:
+            raise ValueError("x_min must be below x_max")
+        return self
+
+PARAM_SCHEMA = NormalDistributionParams
+
+def estimate_cost(p: NormalDistributionParams) -> RenderCost:
+    return estimate(plays=2, mobjects=18)
 
 class NormalDistributionScene(Scene):
     def __init__(self, mean: float = 0.0, std: float = 1.0, x_min: float = -4.0, x_max: float = 4.0, **kwargs):
@@ -27,8 +43,41 @@ class NormalDistributionScene(Scene):
             m, s = self.mean, self.std
             return (1.0/(np.sqrt(2*np.pi)*s)) * np.exp(-0.5*((x-m)/s)**2)
 
-        graph = axes.plot(normal_pdf, x_range=[self.x_min, self.x_max], color=BLUE)
+        graph = plot_adaptive(axes, normal_pdf, [self.x_min, self.x_max], color=BLUE)
         self.play(Create(graph))
         self.wait(1)
 
 SCENE_CLASS = NormalDistributionScene
+
+class NormalDistributionSweepScene(TiledSweepScene):
+    """
+    Densities for a grid of means and stds, side by side on a shared y scale so
+    widths compare at a glance. All densities come from one broadcast.
+    """
+
+    def __init__(self, variants=None, **kwargs):
+        super().__init__(variants=variants, **kwargs)
+        peak = 1.0 / (np.sqrt(2*np.pi) * min(max(v.get("std", 1.0), 1e-3) for v in self.variants))
+        self.y_max = float(np.ceil(peak * 11) / 10)
+
+    def axes_key(self, v):
+        return v["x_min"], v["x_max"]
+
+    def make_axes(self, v):
+        return Axes(x_range=[v["x_min"], v["x_max"], (v["x_max"] - v["x_min"])/4], y_range=[0, self.y_max, self.y_max/5], x_length=10, y_length=4)
+
+    def animate(self, tiles):
+        vs = [t["variant"] for t in tiles]
+        lo = np.array([v["x_min"] for v in vs])[:, None]
+        hi = np.array([v["x_max"] for v in vs])[:, None]
+        m = np.array([v["mean"] for v in vs])[:, None]
+        s = np.maximum(np.array([v["std"] for v in vs]), 1e-3)[:, None]
+        X = lo + np.linspace(0.0, 1.0, SAMPLES)[None, :] * (hi - lo)
+        P = np.exp(-0.5*((X - m)/s)**2) / (np.sqrt(2*np.pi)*s)
+        graphs = [
+            t["axes"].plot_line_graph(x, p, add_vertex_dots=False, line_color=BLUE)["line_graph"]
+            for t, x, p in zip(tiles, X, P)
+        ]
+        self.play(*[Create(g) for g in graphs])
+
+SWEEP_SCENE_CLASS = NormalDistributionSweepScene
@@ -1,15 +1,31 @@
-from typing import Dict, Any
+from typing import Any
 import numpy as np
-from manim import Scene, Axes, ParametricFunction, Create, MathTex, BLUE
+from manim import Scene, Axes, Create, MathTex, BLUE
+from pydantic import Field, model_validator
+
+from ._params import Expression, RenderCost, SceneParams, estimate
+from ._sampling import parametric_adaptive
 
 SCENE_KEY = "parametric_curve"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "x_of_t": "str: x(t), e.g. 'cos(t)'",
-    "y_of_t": "str: y(t), e.g. 'sin(t)'",
-    "t_min": "float (default 0)",
-    "t_max": "float (default 2*pi)",
-    "color": "str/color (default BLUE)",
-}
+TEX_LABELS = ["x", "y"]
+
+class ParametricCurveParams(SceneParams):
+    x_of_t: Expression = Field("cos(t)", description="x(t), e.g. 'cos(t)'")
+    y_of_t: Expression = Field("sin(t)", description="y(t), e.g. 'sin(t)'")
+    t_min: float = 0.0
+    t_max: float = 2 * np.pi
+    color: str | None = Field(None, description="Manim color (default BLUE)")
+
+    @model_validator(mode="after")
+    def _interval(self):
+        if self.t_min >= self.t_max:
+            raise ValueError("t_min must be below t_max")
+        return self
+
+PARAM_SCHEMA = ParametricCurveParams
+
+def estimate_cost(p: ParametricCurveParams) -> RenderCost:
+    return estimate(plays=2, mobjects=14)
 
 SAFE_NS = {
     "sin": np.sin,
@@ -49,7 +65,7 @@ class ParametricCurveScene(Scene):
         def y(t):
             return eval(self.y_of_t, {"__builtins__": {}}, {**SAFE_NS, "t": t})
 
-        curve = ParametricFunction(lambda t: axes.c2p(x(t), y(t)), t_range=[self.t_min, self.t_max], color=self.color or BLUE)
+        curve = parametric_adaptive(axes, x, y, [self.t_min, self.t_max], color=self.color or BLUE)
         self.play(Create(curve))
         self.wait(1)
 
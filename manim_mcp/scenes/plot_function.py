@@ -1,14 +1,30 @@
-from typing import Dict, Any
+from typing import Any
 import numpy as np
 from manim import Scene, Axes, MathTex, Create, Write, BLUE, YELLOW
+from pydantic import Field, model_validator
+
+from ._params import Expression, RenderCost, SceneParams, estimate
+from ._sampling import plot_adaptive
 
 SCENE_KEY = "plot_function"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "expression": "str: function of x, e.g. 'sin(x) + 0.5*cos(2*x)'",
-    "x_min": "float (default 0)",
-    "x_max": "float (default 2*pi)",
-    "color": "str/color (default BLUE)",
-}
+TEX_LABELS = ["x", "f(x)"]
+
+class PlotFunctionParams(SceneParams):
+    expression: Expression = Field("sin(x)", description="Function of x, e.g. 'sin(x) + 0.5*cos(2*x)'")
+    x_min: float = 0.0
+    x_max: float = 2 * np.pi
+    color: str | None = Field(None, description="Manim color (default BLUE)")
+
+    @model_validator(mode="after")
+    def _interval(self):
+        if self.x_min >= self.x_max:
+            raise ValueError("x_min must be below x_max")
+        return self
+
+PARAM_SCHEMA = PlotFunctionParams
+
+def estimate_cost(p: PlotFunctionParams) -> RenderCost:
+    return estimate(plays=2, mobjects=16)
 
 SAFE_NS = {
     # numpy functions
@@ -40,7 +56,8 @@ class PlotFunctionScene(Scene):
             local = {"x": x}
             return eval(self.expression, {"__builtins__": {}}, {**SAFE_NS, **local})
 
-        graph = axes.plot(f, x_range=[self.x_min, self.x_max], color=self.color or BLUE)
+        # f is evaluated on whole arrays of x; the names in SAFE_NS are all numpy ufuncs
+        graph = plot_adaptive(axes, f, [self.x_min, self.x_max], color=self.color or BLUE)
         self.play(Create(graph))
         self.wait(1)
 
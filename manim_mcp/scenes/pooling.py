@@ -1,14 +1,12 @@
-from typing import Dict, Any
+from typing import Literal
 import numpy as np
 from manim import Scene, Matrix, SurroundingRectangle, VGroup, Create, Transform, MathTex, YELLOW
+from pydantic import Field, field_validator, model_validator
+
+from ._params import Matrix as MatrixParam, RenderCost, SceneParams, estimate
 
 SCENE_KEY = "pooling"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "pool_type": "str in {'max','avg'} (default 'max')",
-    "kernel_size": "int (default 2)",
-    "stride": "int (default equals kernel_size)",
-    "input_matrix": "List[List[float]] (default 4x4 sample)",
-}
+TEX_LABELS = [f"{p.upper()}\\ Pooling" for p in ("max", "avg")]
 
 DEFAULT_INPUT = [
     [1, 2, 3, 4],
@@ -17,6 +15,48 @@ DEFAULT_INPUT = [
     [0, 3, 1, 5],
 ]
 
+class PoolingParams(SceneParams):
+    pool_type: Literal["max", "avg"] = "max"
+    kernel_size: int = Field(2, ge=1)
+    stride: int | None = Field(None, ge=1, description="Defaults to kernel_size")
+    input_matrix: MatrixParam | None = Field(None, description="Input grid (default 4x4 sample)")
+
+    @field_validator("pool_type", mode="before")
+    @classmethod
+    def _lower(cls, v):
+        return v.lower() if isinstance(v, str) else v
+
+    @model_validator(mode="after")
+    def _kernel_fits(self):
+        X = self.input_matrix or DEFAULT_INPUT
+        if self.kernel_size > min(len(X), len(X[0])):
+            raise ValueError("kernel_size must fit inside input_matrix")
+        return self
+
+PARAM_SCHEMA = PoolingParams
+
+def output_shape(p: PoolingParams):
+    X = p.input_matrix or DEFAULT_INPUT
+    s = p.stride or p.kernel_size
+    return (len(X) - p.kernel_size) // s + 1, (len(X[0]) - p.kernel_size) // s + 1
+
+def estimate_cost(p: PoolingParams) -> RenderCost:
+    X = p.input_matrix or DEFAULT_INPUT
+    out_h, out_w = output_shape(p)
+    windows = out_h * out_w
+    # Two plays per window: move the highlight, write the output entry
+    return estimate(plays=2 + 2 * windows, mobjects=len(X) * len(X[0]) + windows + 6)
+
+def clamp_params(p: PoolingParams, factor: float) -> PoolingParams:
+    """Crop the input so fewer windows are visited."""
+    X = p.input_matrix or DEFAULT_INPUT
+    s = p.stride or p.kernel_size
+    out_h, out_w = output_shape(p)
+    scale = factor ** 0.5
+    rows = (max(1, int(out_h * scale)) - 1) * s + p.kernel_size
+    cols = (max(1, int(out_w * scale)) - 1) * s + p.kernel_size
+    return p.model_copy(update={"input_matrix": [row[:cols] for row in X[:rows]]})
+
 class PoolingScene(Scene):
     def __init__(self,
                  pool_type: str = "max",
@@ -0,0 +1,39 @@
+from typing import Optional
+from manim import Scene, Text, VGroup, FadeIn, FadeOut, DOWN, GRAY
+from pydantic import Field
+
+from ._params import RenderCost, SceneParams, estimate
+
+SCENE_KEY = "title_card"
+
+class TitleCardParams(SceneParams):
+    title: str = Field("Untitled", min_length=1, max_length=120)
+    subtitle: Optional[str] = Field(None, max_length=200)
+    seconds: float = Field(2.0, ge=0.5, le=10.0)
+
+PARAM_SCHEMA = TitleCardParams
+
+def estimate_cost(p: TitleCardParams) -> RenderCost:
+    return estimate(plays=2, mobjects=2, wait_seconds=p.seconds)
+
+class TitleCardScene(Scene):
+    """Plain text card shown between the scenes of a lesson. Text, not MathTex, so no LaTeX run."""
+
+    def __init__(self, title: str = "Untitled", subtitle: Optional[str] = None, seconds: float = 2.0, **kwargs):
+        super().__init__(**kwargs)
+        self.title = str(title)
+        self.subtitle = subtitle
+        self.seconds = float(seconds)
+
+    def construct(self):
+        card = VGroup(Text(self.title, font_size=56))
+        if self.subtitle:
+            card.add(Text(self.subtitle, font_size=32, color=GRAY).next_to(card[0], DOWN, buff=0.4))
+        if card.width > 12:
+            card.scale_to_fit_width(12)
+        card.move_to((0, 0, 0))
+        self.play(FadeIn(card))
+        self.wait(self.seconds)
+        self.play(FadeOut(card))
+
+SCENE_CLASS = TitleCardScene
@@ -1,12 +1,28 @@
-from typing import Dict, Any, List
+from typing import Annotated, List
 import numpy as np
 from manim import Scene, NumberPlane, Vector, VGroup, Dot, Line, MathTex, Create, FadeIn, Transform, BLUE, YELLOW, WHITE, RED, RIGHT
+from pydantic import Field
+
+from ._params import RenderCost, SceneParams, estimate
 
 SCENE_KEY = "vector"
-PARAM_SCHEMA: Dict[str, Any] = {
-    "vectors": "List[List[float]]: list of 2D vectors",
-    "colors": "List[str]: optional list of manim color names",
-}
+TEX_LABELS = ["+", "="]
+
+class VectorParams(SceneParams):
+    vectors: List[Annotated[List[float], Field(min_length=2, max_length=3)]] = Field([[2, 1], [-1, 2]], min_length=1, max_length=64, description="List of 2D vectors")
+    colors: List[str] | None = Field(None, description="Optional list of manim color names")
+
+PARAM_SCHEMA = VectorParams
+
+# The default NumberPlane: 17 vertical and 9 horizontal lines plus subdivisions
+PLANE_MOBJECTS = 2 * (17 + 9)
+
+def estimate_cost(p: VectorParams) -> RenderCost:
+    plays = 3 if len(p.vectors) >= 2 else 2
+    return estimate(plays=plays, mobjects=PLANE_MOBJECTS + len(p.vectors) + 1)
+
+def clamp_params(p: VectorParams, factor: float) -> VectorParams:
+    return p.model_copy(update={"vectors": p.vectors[:max(1, int(len(p.vectors) * factor))]})
 
 COLOR_MAP = [BLUE, YELLOW, WHITE, RED]
 
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+
+from shared.loop_monitor import percentiles
+
+logger = logging.getLogger(__name__)
+
+# Feature scales keep the normal equations well conditioned
+FRAME_SCALE = 30.0
+WORK_SCALE = 30.0 * 1000.0
+RIDGE = 1e-3
+MIN_SAMPLES = 3
+
+
+def features(cost: Optional[Dict[str, Any]]) -> np.ndarray:
+    """[1, seconds of video, seconds x mobjects]: fixed setup, per-frame work, per-frame drawing."""
+    if not cost:
+        return np.array([1.0, 0.0, 0.0])
+    frames = float(cost.get("frames", 0))
+    return np.array([1.0, frames / FRAME_SCALE, frames * float(cost.get("mobjects", 0)) / WORK_SCALE])
+
+
+class _Fit:
+    """Running least squares of render seconds on `features`."""
+
+    def __init__(self):
+        self.xtx = np.eye(3) * RIDGE
+        self.xty = np.zeros(3)
+        self.n = 0
+        self._w: Optional[np.ndarray] = None
+
+    def add(self, x: np.ndarray, y: float) -> None:
+        self.xtx += np.outer(x, x)
+        self.xty += x * y
+        self.n += 1
+        self._w = None
+
+    def predict(self, x: np.ndarray) -> float:
+        if self._w is None:
+            self._w = np.linalg.solve(self.xtx, self.xty)
+        return float(x @ self._w)
+
+
+class DurationPredictor:
+    """
+    Predicts how long a render will take from past renders, keyed by scene type
+    and the scene's static cost estimate (frames, mobjects). Each scene type
+    gets its own fit once it has a few samples; until then a fit over all
+    scenes is used, and before that a flat default.
+
+    Observations are appended to a JSONL telemetry file and replayed on start,
+    so predictions survive restarts.
+    """
+
+    def __init__(self, default_seconds: float = 20.0, telemetry_file: Optional[str] = None, history: int = 500):
+        self.default_seconds = default_seconds
+        self.telemetry_file = telemetry_file
+        self._by_type: Dict[str, _Fit] = {}
+        self._all = _Fit()
+        # Recent |predicted - actual| in seconds, and relative to actual
+        self.abs_errors: Deque[float] = deque(maxlen=history)
+        self.rel_errors: Deque[float] = deque(maxlen=history)
+        if telemetry_file:
+            self._replay(telemetry_file)
+
+    def _replay(self, path: str, limit: int = 5000) -> None:
+        try:
+            with open(path) as f:
+                lines = deque(f, maxlen=limit)
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+                self._fit(rec["type"], rec.get("cost"), float(rec["seconds"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+        logger.info(f"Loaded {self._all.n} render timings from {path}")
+
+    def _fit(self, vis_type: str, cost: Optional[Dict[str, Any]], seconds: float) -> None:
+        x = features(cost)
+        self._by_type.setdefault(vis_type or "", _Fit()).add(x, seconds)
+        self._all.add(x, seconds)
+
+    def predict(self, vis_type: str, cost: Optional[Dict[str, Any]]) -> float:
+        x = features(cost)
+        fit = self._by_type.get(vis_type or "")
+        if fit is not None and fit.n >= MIN_SAMPLES:
+            seconds = fit.predict(x)
+        elif self._all.n >= MIN_SAMPLES:
+            seconds = self._all.predict(x)
+        else:
+            seconds = self.default_seconds
+        return max(0.1, seconds)
+
+    def observe(self, vis_type: str, cost: Optional[Dict[str, Any]], predicted: float, seconds: float) -> None:
+        self.abs_errors.append(abs(predicted - seconds))
+        self.rel_errors.append(abs(predicted - seconds) / max(seconds, 1e-3))
+        self._fit(vis_type, cost, seconds)
+        if self.telemetry_file:
+            try:
+                with open(self.telemetry_file, "a") as f:
+                    f.write(json.dumps({"type": vis_type, "cost": cost, "seconds": round(seconds, 3), "ts": time.time()}) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not record render telemetry: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self._all.n,
+            "scene_types": sorted(k for k, fit in self._by_type.items() if fit.n >= MIN_SAMPLES),
+            "abs_error_seconds": percentiles(self.abs_errors, digits=3),
+            "relative_error": percentiles(self.rel_errors, digits=3),
+        }
+
+
+def predictor_from_env(renders_dir: str, default_seconds: float) -> DurationPredictor:
+    path = os.getenv("MCP_TELEMETRY_FILE", os.path.join(renders_dir, "render_telemetry.jsonl"))
+    return DurationPredictor(default_seconds=default_seconds, telemetry_file=path or None)
@@ -2,29 +2,81 @@ import sys
 import os
 import json
 import argparse
+import asyncio
+import glob
+import hashlib
+import inspect
+import multiprocessing
 import tempfile
-from typing import Dict, Any, List
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Annotated, Dict, Any, List, Tuple
 import importlib
 import pkgutil
 
-from manim import config, tempconfig
+# Modules shared between services live in <repo>/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from manim import config
 from manim import Scene, VGroup, Axes, Dot, Line, Square, FadeIn, FadeOut, Create, Write, Transform, Text
 from manim import BLUE, YELLOW, WHITE
+from manim.utils.exceptions import EndSceneEarlyException
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
+from shared.singleflight import SingleFlight, canonical_request_key
+from shared import tracing
+from render_queue import BATCH, INTERACTIVE, QueueFull, RenderQueue
+from scheduler import predictor_from_env
+from shared.artifact_store import artifact_store_from_env
+from postprocess import finalize_video, poster_name_for
+from budget import OverBudget, RenderBudget
+from background_cache import make_renderer
+from frame_elision import elision_stats
+from frame_export import ChunkedFrameStore, ExportRequest, FrameArrayWriter, NpyFrameFile, export_config, frame_metadata, write_manifest
+from lesson import LessonRequest, compose_lesson, lesson_segments
+from preview import MEDIA_TYPES, PREVIEW_WIDTH, PreviewCache, PreviewRequest, encode_image, preview_config
+from sweep import SWEEP_TYPE, SweepParams, SweepRequest, build_manifest, expand_grid, label_for, sweep_cost
+import tex_cache
+from render_config import isolated_config, work_dir
+from worker_pool import ForkServerPool
+from tex_cache import tex_cache_dir, tex_config, usage_stats
+from manim_mcp.scenes._params import FRAME_RATE, RenderCost, SceneParams, estimate
+from manim_mcp.scenes._sampling import plot_adaptive
 
 RENDERS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'renders'))
 os.makedirs(RENDERS_DIR, exist_ok=True)
+# Finished videos go to the artifact store; RENDERS_DIR only holds work in progress
+ARTIFACT_STORE = artifact_store_from_env(RENDERS_DIR)
+# Compiled MathTex, shared by every render worker (and every node, on a shared volume)
+TEX_DIR = tex_cache_dir(RENDERS_DIR)
+TEX_PREWARM = os.getenv("MCP_TEX_PREWARM", "true").lower() == "true"
+# Previews never write files, but manim's file writer still wants a media dir
+PREVIEW_DIR = os.path.join(RENDERS_DIR, "previews")
+# Raw frame exports (datasets), named by content like renders
+EXPORT_DIR = os.getenv("MCP_EXPORT_DIR", os.path.join(RENDERS_DIR, "exports"))
+tracing.configure("manim_mcp", os.path.join(RENDERS_DIR, "traces_manim_mcp.jsonl"))
 
 # -----------------
 # Scene Definitions
 # -----------------
+class FourierParams(SceneParams):
+    terms: List[Annotated[int, Field(ge=1, le=199)]] = Field([1, 3, 5, 7, 9], min_length=1, max_length=50)
+
+def fourier_cost(p: FourierParams) -> RenderCost:
+    # Axes and target, then one play per partial sum
+    return estimate(plays=2 + len(p.terms), mobjects=16 + len(p.terms))
+
+def fourier_clamp(p: FourierParams, factor: float) -> FourierParams:
+    return p.model_copy(update={"terms": p.terms[:max(1, int(len(p.terms) * factor))]})
+
 class FourierSquareWave(Scene):
-    def __init__(self, terms: List[int] = None, **kwargs):
+    def __init__(self, terms: List[int] = None, renderer=None, **kwargs):
         # Do not forward unknown kwargs to Scene to avoid TypeError for things like 'target_function'
-        super().__init__()
+        super().__init__(renderer=renderer)
         self.terms = terms or [1, 3, 5, 7, 9]
 
     def construct(self):
@@ -32,22 +84,19 @@ class FourierSquareWave(Scene):
         labels = axes.get_axis_labels(Text("x"), Text("f(x)"))
         self.play(Create(axes), Write(labels))
 
-        x = np.linspace(0, 2 * np.pi, 1000)
-
-        # Square wave target
+        # Square wave target; the sampler splits it at the jumps rather than drawing them
         def square_wave(x):
             return np.sign(np.sin(x))
 
-        target_graph = axes.plot(square_wave, x_range=[0, 2*np.pi], color=YELLOW)
+        target_graph = plot_adaptive(axes, square_wave, [0, 2*np.pi], color=YELLOW)
         self.play(Create(target_graph))
 
-        # Build Fourier approximation progressively
-        partial_sum = np.zeros_like(x)
+        # Build Fourier approximation progressively, each partial sum sampled where it wiggles
         graphs = VGroup()
-        for k in self.terms:
-            partial_sum += (4 / (np.pi * k)) * np.sin(k * x)
-            approx_func = lambda t, ps=partial_sum.copy(): np.interp(t, x, ps)
-            graph = axes.plot(approx_func, x_range=[0, 2*np.pi], color=BLUE)
+        for i in range(len(self.terms)):
+            ks = np.array(self.terms[:i + 1], dtype=float)
+            approx_func = lambda x, ks=ks: (4 / (np.pi * ks)) @ np.sin(np.multiply.outer(ks, x))
+            graph = plot_adaptive(axes, approx_func, [0, 2*np.pi], color=BLUE)
             graphs.add(graph)
             if len(graphs) == 1:
                 self.play(Create(graph))
@@ -60,6 +109,27 @@ class FourierSquareWave(Scene):
 # Render Helpers & Discovery
 # ---------------
 PARAM_SCHEMAS: Dict[str, Any] = {}
+COST_MODELS: Dict[str, Any] = {}
+CLAMPS: Dict[str, Any] = {}
+TEX_LABELS: Dict[str, List[str]] = {}
+# Hash of each scene's source, part of every ref and export key
+SCENE_VERSIONS: Dict[str, str] = {}
+# Scenes that can draw a whole parameter grid in one video
+SWEEP_SCENES: Dict[str, Any] = {}
+BUDGET = RenderBudget.from_env()
+# Bump when a change outside the scene modules (renderer, file writers, encoding,
+# post-processing) changes what renders look like, so refs to old renders stop matching
+RENDER_VERSION = 1
+# Shared scene helpers (sampling, grids, params) change output of every scene that uses them
+SCENE_HELPERS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenes", "_*.py")))
+
+def source_version(source: str) -> str:
+    """Short hash of a scene's source plus the shared scene helpers."""
+    h = hashlib.sha256(source.encode("utf-8"))
+    for path in SCENE_HELPERS:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
 
 def discover_scenes() -> Dict[str, Any]:
     """Discover available scenes, including built-ins and plugins under manim_mcp.scenes."""
@@ -67,7 +137,10 @@ def discover_scenes() -> Dict[str, Any]:
 
     # Built-in scene(s)
     registry["fourier_series"] = FourierSquareWave
-    PARAM_SCHEMAS["fourier_series"] = {"terms": "List[int] (default [1,3,5,7,9])"}
+    PARAM_SCHEMAS["fourier_series"] = FourierParams
+    COST_MODELS["fourier_series"] = fourier_cost
+    CLAMPS["fourier_series"] = fourier_clamp
+    SCENE_VERSIONS["fourier_series"] = source_version(inspect.getsource(FourierSquareWave))
 
     # Plugin discovery: modules in manim_mcp.scenes that define SCENE_KEY/SCENE_CLASS
     try:
@@ -76,10 +149,18 @@ def discover_scenes() -> Dict[str, Any]:
             module = importlib.import_module(f"{scenes_pkg.__name__}.{modinfo.name}")
             key = getattr(module, "SCENE_KEY", None)
             cls = getattr(module, "SCENE_CLASS", None)
-            schema = getattr(module, "PARAM_SCHEMA", {}) or {}
+            schema = getattr(module, "PARAM_SCHEMA", None)
             if key and cls:
                 registry[key] = cls
-                PARAM_SCHEMAS[key] = schema
+                SCENE_VERSIONS[key] = source_version(inspect.getsource(module))
+                if schema is not None:
+                    PARAM_SCHEMAS[key] = schema
+                    COST_MODELS[key] = getattr(module, "estimate_cost", None)
+                    CLAMPS[key] = getattr(module, "clamp_params", None)
+                if getattr(module, "SWEEP_SCENE_CLASS", None):
+                    SWEEP_SCENES[key] = module.SWEEP_SCENE_CLASS
+                if getattr(module, "TEX_LABELS", None):
+                    TEX_LABELS[key] = list(module.TEX_LABELS)
     except Exception:
         # Non-fatal; if discovery fails we still have built-ins
         pass
@@ -88,11 +169,121 @@ def discover_scenes() -> Dict[str, Any]:
 
 SCENE_REGISTRY = discover_scenes()
 
-def render_request(req: Dict[str, Any]) -> str:
-    vis_type = req.get("type") or req.get("visualization_type")
-    params = req.get("parameters", {})
+def render_key(vis_type: str | None, parameters: Dict[str, Any], **extra: Any) -> str:
+    """
+    Ref and export key of a prepared request: the canonical request plus the
+    versions of the code that renders it, so renders made before a deploy
+    that changed a scene (or the renderer) are never served for it.
+    """
+    scene = parameters.get("scene") if vis_type == SWEEP_TYPE else vis_type
+    return canonical_request_key(vis_type, {
+        "parameters": parameters,
+        **extra,
+        "render_version": RENDER_VERSION,
+        "scene_version": SCENE_VERSIONS.get(scene),
+    })
+
+def prepare_request(data: Dict[str, Any]) -> Tuple[Dict[str, Any], RenderCost | None]:
+    """
+    Validate parameters against the scene's schema and fit them to the render
+    budget. Raises ValidationError or OverBudget. Returns the normalized request
+    (which is what gets rendered and cached) and its estimated cost.
+    """
+    vis_type = data.get("type")
+    if vis_type == SWEEP_TYPE:
+        return prepare_sweep(data.get("parameters") or {})
+    model = PARAM_SCHEMAS.get(vis_type)
+    if model is None:
+        # Unknown types render the small placeholder scene
+        return data, None
+    params = model.model_validate(data.get("parameters") or {})
+    cost = None
+    if COST_MODELS.get(vis_type):
+        params, cost = BUDGET.fit(params, COST_MODELS[vis_type], CLAMPS.get(vis_type))
+    return {"type": vis_type, "parameters": params.model_dump(exclude_none=True)}, cost
+
+def prepare_sweep(parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], RenderCost]:
+    """
+    A tiled sweep is valid when its scene can tile and every variant is a
+    valid request for that scene. Variants are normalized (and clamped) one by
+    one; the tiled render as a whole must then fit the budget unclamped.
+    """
+    sweep = SweepParams.model_validate(parameters)
+    if sweep.scene not in SWEEP_SCENES:
+        raise ValueError(f"Scene {sweep.scene!r} has no tiled sweep")
+    variants, costs = [], []
+    for variant in sweep.variants:
+        req, cost = prepare_request({"type": sweep.scene, "parameters": variant})
+        variants.append(req["parameters"])
+        costs.append(cost)
+    cost = sweep_cost(costs)
+    if BUDGET.overrun(cost) > 1:
+        BUDGET.rejected += 1
+        raise OverBudget(cost, BUDGET)
+    params = {"scene": sweep.scene, "variants": variants, "labels": sweep.labels}
+    return {"type": SWEEP_TYPE, "parameters": params}, cost
+
+def default_estimates() -> Dict[str, Any]:
+    """Cost of each scene with its default parameters, for the /scenes listing."""
+    return {
+        key: fn(PARAM_SCHEMAS[key]()).model_dump()
+        for key, fn in COST_MODELS.items() if fn is not None
+    }
+
+def traced_scene(scene) -> None:
+    """Give every play() (waits included) and the final movie assembly their own spans."""
+    play, finished = scene.play, scene.renderer.scene_finished
+    count = [0]
+
+    def traced_play(*args, **kwargs):
+        count[0] += 1
+        animations = [type(a).__name__ for a in args]
+        with tracing.span(f"play[{count[0]}]", animations=animations):
+            return play(*args, **kwargs)
+
+    def traced_finished(s):
+        # Closes the ffmpeg pipe and concatenates the partial movie files
+        with tracing.span("combine"):
+            return finished(s)
+
+    scene.play = traced_play
+    scene.renderer.scene_finished = traced_finished
+
+# Wall time of the current render's first frame; worker_pool reports it per job
+render_timing = threading.local()
+
+def timed_first_frame(scene) -> None:
+    """Note when the renderer gets its first frame that is actually drawn (cached segments don't count)."""
+    add_frame = scene.renderer.add_frame
+    render_timing.first_frame = None
+
+    def timed_add_frame(*args, **kwargs):
+        if render_timing.first_frame is None and not scene.renderer.skip_animations:
+            render_timing.first_frame = time.time()
+        return add_frame(*args, **kwargs)
+
+    scene.renderer.add_frame = timed_add_frame
 
-    if vis_type not in SCENE_REGISTRY:
+def render_request(req: Dict[str, Any]) -> str:
+    trace = req.get("trace") or {}
+    with tracing.resume(trace.get("parent")) as ctx:
+        if "enqueued" in trace:
+            tracing.add_span("queue", trace["enqueued"], time.time())
+        with tracing.span("render_request", type=req.get("type")) as span:
+            started = time.time()
+            # Frame exports take the same queue and workers as renders
+            name = (_export_frames if req.get("export") else _render_request)(req, ctx.sampled)
+            if span is not None and getattr(render_timing, "first_frame", None):
+                span["first_frame_seconds"] = round(render_timing.first_frame - started, 4)
+            return name
+
+def resolve_scene(vis_type: str | None, params: Dict[str, Any]) -> Tuple[Any, str, Dict[str, Any]]:
+    """Scene class, its name and constructor kwargs for a prepared request."""
+    if vis_type == SWEEP_TYPE:
+        scene_cls = SWEEP_SCENES[params["scene"]]
+        scene_name = scene_cls.__name__
+        params = {"variants": params["variants"], "labels": params.get("labels")}
+    elif vis_type not in SCENE_REGISTRY:
         # Fallback: create a minimal scene
         class Placeholder(Scene):
             def construct(self):
@@ -103,16 +294,27 @@ def render_request(req: Dict[str, Any]) -> str:
     else:
         scene_cls = SCENE_REGISTRY[vis_type]
         scene_name = scene_cls.__name__
+    return scene_cls, scene_name, params
 
-    # Output path
-    out_name = f"{vis_type or 'visualization'}.mp4"
-    out_path = os.path.join(RENDERS_DIR, out_name)
-
-    # Render with manim tempconfig to control output dir
-    with tempconfig({
-        "media_dir": RENDERS_DIR,
-        "video_dir": RENDERS_DIR,
-        "images_dir": os.path.join(RENDERS_DIR, "images"),
+def _render_request(req: Dict[str, Any], traced: bool = False) -> str:
+    vis_type = req.get("type") or req.get("visualization_type")
+    scene_cls, scene_name, params = resolve_scene(vis_type, req.get("parameters", {}))
+
+    # Output path, unique per request; the media dir is this worker's own, so
+    # concurrent renders never share partial movies, Text SVGs or images either
+    key = render_key(vis_type, req.get("parameters", {}))
+    out_name = f"{vis_type or 'visualization'}_{key[:12]}"
+    media_dir = work_dir(RENDERS_DIR)
+    out_path = os.path.join(media_dir, f"{out_name}.mp4")
+
+    tex_cache.install()
+    # Config overrides only this render sees, even with other renders on other threads
+    with isolated_config({
+        **tex_config(TEX_DIR),
+        "media_dir": media_dir,
+        "video_dir": media_dir,
+        "images_dir": os.path.join(media_dir, "images"),
+        "output_file": out_name,
         "log_to_file": False,
         "format": "mp4",
         "write_to_movie": True,
@@ -121,16 +323,158 @@ def render_request(req: Dict[str, Any]) -> str:
         "pixel_height": 720,
         "frame_rate": 30,
     }):
-        scene = scene_cls(**params)
-        scene.render()  # Manim determines file path
-
-    # Find the latest mp4 produced
-    produced_files = [f for f in os.listdir(RENDERS_DIR) if f.endswith('.mp4')]
-    if not produced_files:
+        # 2D scenes keep their static background layer between play() calls
+        renderer = make_renderer(scene_cls)
+        with tracing.span("construct", scene=scene_name):
+            scene = scene_cls(**params, **({"renderer": renderer} if renderer else {}))
+        timed_first_frame(scene)
+        if traced:
+            traced_scene(scene)
+        with tracing.span("scene.render") as span:
+            scene.render()
+            if span is not None:
+                span.update(elision_stats(scene.renderer))
+
+    if not os.path.exists(out_path):
         raise RuntimeError("No video produced")
-    produced_files.sort(key=lambda f: os.path.getmtime(os.path.join(RENDERS_DIR, f)), reverse=True)
-    latest = os.path.join(RENDERS_DIR, produced_files[0])
-    return latest
+    # Faststart + content-hash name so the result can be served as immutable
+    with tracing.span("finalize"):
+        name = finalize_video(out_path, ARTIFACT_STORE)
+    ARTIFACT_STORE.set_ref(key, name)
+    return name
+
+def render_preview(req: Dict[str, Any], play: int | None = None, fmt: str = "png", width: int = PREVIEW_WIDTH) -> bytes:
+    """
+    A still of a prepared request: the final frame, or the frame after `play`
+    play() calls. Runs construct() with every animation skipped, so the cost
+    is building the mobjects plus rasterizing one small frame.
+    """
+    vis_type = req.get("type")
+    scene_cls, scene_name, params = resolve_scene(vis_type, req.get("parameters", {}))
+    images = []
+
+    tex_cache.install()
+    with tracing.resume((req.get("trace") or {}).get("parent")), tracing.span("preview.render", type=vis_type, play=play):
+        with isolated_config({**tex_config(TEX_DIR), **preview_config(width, PREVIEW_DIR), "output_file": scene_name}):
+            scene = scene_cls(**params)
+            # scene_finished() hands the last frame to save_final_image under save_last_frame;
+            # keep it in memory instead of writing <SceneName>.png, which concurrent previews would share
+            scene.renderer.file_writer.save_final_image = images.append
+            if play is not None:
+                scene_play, count = scene.play, [0]
+
+                def play_until(*args, **kwargs):
+                    count[0] += 1
+                    scene_play(*args, **kwargs)
+                    if count[0] >= play:
+                        # Scene.render() catches this, then draws and saves the last frame as usual
+                        raise EndSceneEarlyException()
+
+                scene.play = play_until
+            scene.render()
+        return encode_image(images[-1].convert("RGB"), fmt)
+
+def export_job(req: Dict[str, Any], cost: RenderCost | None, options: Dict[str, Any]) -> Dict[str, Any]:
+    """A prepared request as a frame export; its estimated frames (plus a second) size the preallocated array."""
+    fps = options["frame_rate"]
+    frames = round(cost.frames * fps / FRAME_RATE) if cost else 0
+    return {**req, "export": {**options, "capacity": frames + fps}}
+
+def _export_frames(req: Dict[str, Any], traced: bool = False) -> str:
+    """
+    Render a prepared export job to raw frames instead of a video: every
+    frame the Cairo renderer draws is copied straight into a memory-mapped
+    .npy (or a directory of chunks) and ffmpeg never runs. Next to the data
+    goes a JSON manifest with the array's shape and, per play() and per
+    frame, the animations, play index and time. Returns the manifest's path;
+    an export already on disk is returned as is.
+    """
+    opts = req["export"]
+    vis_type = req.get("type") or req.get("visualization_type")
+    scene_cls, scene_name, params = resolve_scene(vis_type, req.get("parameters", {}))
+    spec = {k: opts[k] for k in ("format", "width", "frame_rate", "channels")}
+    key = render_key(vis_type, req.get("parameters", {}), export=spec)
+    out_dir = opts.get("dir") or EXPORT_DIR
+    out_name = f"{vis_type or 'visualization'}_{key[:12]}"
+    manifest_path = os.path.join(out_dir, f"{out_name}.json")
+    if os.path.exists(manifest_path):
+        return manifest_path
+    os.makedirs(out_dir, exist_ok=True)
+
+    cfg = export_config(spec["width"], spec["frame_rate"], work_dir(RENDERS_DIR))
+    frame_shape = (cfg["pixel_height"], cfg["pixel_width"], spec["channels"])
+    if spec["format"] == "chunks":
+        sink = ChunkedFrameStore(os.path.join(out_dir, out_name), frame_shape)
+    else:
+        sink = NpyFrameFile(os.path.join(out_dir, f"{out_name}.npy"), frame_shape, opts.get("capacity") or spec["frame_rate"])
+    animations: List[List[str]] = []
+
+    tex_cache.install()
+    try:
+        with isolated_config({**tex_config(TEX_DIR), **cfg, "output_file": out_name}):
+            # Same caching renderer as a render, with frames going to the sink instead of ffmpeg
+            renderer = make_renderer(scene_cls, FrameArrayWriter)
+            with tracing.span("construct", scene=scene_name):
+                scene = scene_cls(**params, renderer=renderer)
+            writer = scene.renderer.file_writer
+            writer.sink, writer.channels = sink, spec["channels"]
+            scene_play = scene.play
+
+            def noted_play(*args, **kwargs):
+                animations.append([type(a).__name__ for a in args])
+                return scene_play(*args, **kwargs)
+
+            scene.play = noted_play
+            if traced:
+                traced_scene(scene)
+            with tracing.span("scene.render") as span:
+                scene.render()
+                if span is not None:
+                    span["frames"] = sink.count
+    finally:
+        sink.close()
+
+    with tracing.span("manifest"):
+        write_manifest(manifest_path, {
+            "type": vis_type,
+            "scene": scene_name,
+            "parameters": req.get("parameters", {}),
+            **spec,
+            "dtype": "uint8",
+            "shape": [sink.count, *frame_shape],
+            **sink.layout(),
+            **frame_metadata(writer.frame_plays, animations, spec["frame_rate"]),
+        })
+    return manifest_path
+
+def export_summary(manifest_path: str) -> Dict[str, Any]:
+    """Response fields for a finished export: where it is and its shape, without the per-frame columns."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return {
+        "manifest": manifest_path,
+        "shape": manifest["shape"],
+        "plays": len(manifest["plays"]),
+        **({"data": manifest["data"]} if "data" in manifest else {"chunks": len(manifest["chunks"])}),
+    }
+
+def read_requests(path: str) -> List[Dict[str, Any]]:
+    """Requests from a JSON file (one request, or a list of them) or a JSONL file."""
+    with open(path, 'r') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+def render_result(name: str) -> Dict[str, Any]:
+    """Response fields for a stored render: its artifact name, poster and local path if any."""
+    return {
+        "video_path": ARTIFACT_STORE.local_path(name) or name,
+        "artifact": name,
+        "poster": poster_name_for(ARTIFACT_STORE, name),
+    }
 
 # ---------------
 # CLI Entrypoint
@@ -141,6 +485,13 @@ def main():
     parser.add_argument('--http', action='store_true', help='Run as HTTP server (FastAPI)')
     parser.add_argument('--host', default='0.0.0.0', help='HTTP host')
     parser.add_argument('--port', type=int, default=9000, help='HTTP port')
+    parser.add_argument('--preview', metavar='IMAGE', help='Write a preview still (.png or .webp) of request_file instead of rendering it')
+    parser.add_argument('--preview-bench', action='store_true', help='Time a preview of every registered scene with default parameters')
+    parser.add_argument('--export', metavar='DIR', help='Export raw frames of every request in request_file (JSON, JSON list or JSONL; parameters_list expands one) to DIR instead of rendering')
+    parser.add_argument('--export-format', choices=['npy', 'chunks'], default='npy', help='One .npy per request, or a directory of chunked .npy files')
+    parser.add_argument('--export-width', type=int, help='Frame width in pixels (default MCP_EXPORT_WIDTH)')
+    parser.add_argument('--export-fps', type=int, default=30, help='Frames per second of scene time')
+    parser.add_argument('--export-alpha', action='store_true', help='Keep the alpha channel (RGBA frames)')
     parser.add_argument('request_file', nargs='?', help='Path to JSON request file produced by backend (CLI mode)')
     args = parser.parse_args()
 
@@ -149,15 +500,47 @@ def main():
         uvicorn.run(app, host=args.host, port=args.port)
         return
 
+    if args.preview_bench:
+        # First preview in a process pays for imports and font setup; the server warms that up
+        render_preview({"type": "title_card", "parameters": {}}, width=160)
+        timings = {}
+        for vis_type in sorted(SCENE_REGISTRY):
+            started = time.perf_counter()
+            render_preview(prepare_request({"type": vis_type, "parameters": {}})[0])
+            timings[vis_type] = round(time.perf_counter() - started, 3)
+        print(json.dumps(timings, indent=2))
+        return
+
     if not args.request_file:
         parser.error('request_file is required in CLI mode')
 
+    if args.export:
+        overrides = {"format": args.export_format, "frame_rate": args.export_fps, "channels": 4 if args.export_alpha else 3}
+        if args.export_width:
+            overrides["width"] = args.export_width
+        for item in read_requests(args.request_file):
+            export = ExportRequest.model_validate({**item, **overrides})
+            options = {**export.options(), "dir": args.export}
+            for data in export.items():
+                req, cost = prepare_request(data)
+                print(render_request(export_job(req, cost, options)), flush=True)
+        return
+
     with open(args.request_file, 'r') as f:
         req = json.load(f)
 
-    out_path = render_request(req)
-    # Print absolute path for caller
-    print(os.path.abspath(out_path))
+    req, _ = prepare_request({
+        "type": req.get("type") or req.get("visualization_type"),
+        "parameters": req.get("parameters", {}),
+    })
+    if args.preview:
+        with open(args.preview, 'wb') as f:
+            f.write(render_preview(req, fmt="webp" if args.preview.endswith(".webp") else "png"))
+        print(os.path.abspath(args.preview))
+        return
+    name = render_request(req)
+    # Print absolute path for caller (or the artifact name when stored remotely)
+    print(ARTIFACT_STORE.local_path(name) or name)
 
 # ---------------
 # HTTP (FastAPI)
@@ -170,35 +553,393 @@ class RenderRequest(BaseModel):
 
 class RenderResponse(BaseModel):
     video_path: str
+    artifact: str | None = None
+    poster: str | None = None
+    # The parameters as rendered: schema defaults filled in, clamped to the budget
+    parameters: dict | None = None
+
+class BatchRenderRequest(BaseModel):
+    items: List[RenderRequest]
+
+class LessonResponse(RenderResponse):
+    # Artifact names of the lesson's segments, title cards included, in order
+    segments: List[str] = []
+
+RENDER_CONCURRENCY = int(os.getenv("MCP_RENDER_CONCURRENCY", "1"))
+# "thread": every render slot in this warm process; "forkserver": workers forked from a
+# preloaded parent and recycled; "process": one spawned process per slot
+RENDER_WORKERS = os.getenv("MCP_RENDER_WORKERS", "thread").lower()
+RENDER_QUEUE_DEPTH = int(os.getenv("MCP_RENDER_QUEUE_DEPTH", "16"))
+RENDER_QUEUE_PER_CLIENT = int(os.getenv("MCP_RENDER_QUEUE_PER_CLIENT", "4"))
+RENDER_BATCH_QUEUE_DEPTH = int(os.getenv("MCP_RENDER_BATCH_QUEUE_DEPTH", str(RENDER_QUEUE_DEPTH)))
+# Seconds of priority a waiting job gains per second waited
+SCHED_AGING = float(os.getenv("MCP_SCHED_AGING", "1.0"))
+# Head start interactive jobs get over batch jobs, in predicted seconds
+SCHED_BATCH_PENALTY = float(os.getenv("MCP_SCHED_BATCH_PENALTY", "30"))
+# Previews get their own warm processes so they never wait behind a full render
+PREVIEW_WORKERS = int(os.getenv("MCP_PREVIEW_WORKERS", "1"))
+PREVIEW_QUEUE_DEPTH = int(os.getenv("MCP_PREVIEW_QUEUE_DEPTH", "8"))
+
+def make_render_executor(concurrency: int, workers: str = RENDER_WORKERS):
+    """
+    Renders run on worker threads of this process by default: each sees its
+    own manim config (render_config.isolated_config) and media dir, and Cairo
+    rasterizing and ffmpeg piping release the GIL, so renders overlap.
+    Processes trade memory for no shared GIL: "forkserver" forks them warm
+    from a preloaded parent, "process" spawns each one cold.
+    """
+    if workers == "forkserver":
+        return ForkServerPool(concurrency)
+    if concurrency <= 1 or workers != "process":
+        return ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="render")
+    return ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context("spawn"))
+
+def client_id_for(request: Request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
 
 def create_app() -> FastAPI:
     app = FastAPI(title="Manim MCP Server", version="1.0.0")
+    inflight = SingleFlight()
+    executor = make_render_executor(RENDER_CONCURRENCY)
+    tex_state: Dict[str, Any] = {"ready": not TEX_PREWARM, "prewarm": None}
+    preview_pool = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    previews = PreviewCache()
+    preview_state = {"pending": 0, "rejected": 0}
+
+    @app.on_event("startup")
+    async def tidy_tex_cache():
+        # Before prewarming, which reads the usage log
+        await asyncio.to_thread(tex_cache.tidy, TEX_DIR)
+
+    @app.on_event("startup")
+    async def start_prewarm():
+        if not TEX_PREWARM:
+            return
+
+        async def run():
+            labels = sorted({label for labels in TEX_LABELS.values() for label in labels})
+            # Own process: prewarming changes manim's global config
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                try:
+                    tex_state["prewarm"] = await asyncio.get_running_loop().run_in_executor(
+                        pool, tex_cache.prewarm, TEX_DIR, labels)
+                except Exception as e:
+                    tex_state["prewarm"] = {"error": str(e)}
+            tex_state["ready"] = True
+
+        asyncio.ensure_future(run())
+
+    @app.on_event("startup")
+    async def warm_previews():
+        # Spawned workers import manim and the scenes on first use; pay that before the first preview
+        warm = {"type": "title_card", "parameters": {"title": "Preview"}}
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(preview_pool, render_preview, warm, None, "png", 160) for _ in range(PREVIEW_WORKERS)]
+        asyncio.ensure_future(asyncio.gather(*futures, return_exceptions=True))
+
+    async def run_render(data: Dict[str, Any]) -> str:
+        return await asyncio.get_running_loop().run_in_executor(executor, render_request, data)
+
+    queue = RenderQueue(
+        run_render,
+        concurrency=RENDER_CONCURRENCY,
+        max_depth=RENDER_QUEUE_DEPTH,
+        max_per_client=RENDER_QUEUE_PER_CLIENT,
+        predictor=predictor_from_env(RENDERS_DIR, default_seconds=20.0),
+        aging=SCHED_AGING,
+        batch_penalty=SCHED_BATCH_PENALTY,
+        batch_depth=RENDER_BATCH_QUEUE_DEPTH,
+    )
+
+    async def render_one(data: Dict[str, Any], client_id: str, lane: str = INTERACTIVE) -> str:
+        data, cost = prepare_request(data)
+        return await render_prepared(data, cost, client_id, lane)
+
+    async def render_prepared(data: Dict[str, Any], cost: RenderCost | None, client_id: str, lane: str = INTERACTIVE) -> str:
+        key = render_key(data["type"], data["parameters"])
+        # A request rendered before (by any node sharing the store) needs no queue slot
+        with tracing.span("store.lookup") as span:
+            cached = await asyncio.to_thread(ARTIFACT_STORE.get_ref, key)
+            if span is not None:
+                span["hit"] = bool(cached)
+        if cached:
+            return cached
+        cost = cost.model_dump() if cost else None
+        # Render workers pick the trace up from the request; they don't share our context
+        job = {**data, "trace": {"parent": tracing.traceparent(), "enqueued": time.time()}}
+        return await inflight.do(key, lambda: queue.submit(client_id, job, cost=cost, lane=lane))
 
     @app.get('/health')
     async def health():
-        return {"status": "ok"}
+        return {
+            "status": "ok",
+            "coalesced_requests": inflight.coalesced,
+            "queue": queue.stats(),
+            "preview": {**previews.stats(), **preview_state},
+            **({"render_workers": executor.stats()} if isinstance(executor, ForkServerPool) else {}),
+        }
+
+    @app.get('/ready')
+    async def ready():
+        # Serves (cold) either way; this tells a load balancer when the Tex cache is warm
+        body = {
+            "ready": tex_state["ready"],
+            "prewarm": tex_state["prewarm"],
+            "tex_cache": await asyncio.to_thread(usage_stats, TEX_DIR),
+        }
+        return JSONResponse(body, status_code=200 if tex_state["ready"] else 503)
+
+    @app.post('/prepare')
+    async def prepare(req: RenderRequest):
+        """A request as /render would render it (validated, defaults filled in, clamped to the budget), without rendering."""
+        try:
+            data, cost = prepare_request({"type": req.type or req.visualization_type, "parameters": req.parameters or {}})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+        except OverBudget as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {**data, "cost": cost.model_dump() if cost else None}
 
     @app.get('/scenes')
     async def scenes():
         # Sorted keys for stable output
         return {
             "scenes": sorted(SCENE_REGISTRY.keys()),
-            "schemas": PARAM_SCHEMAS,
+            "schemas": {key: model.model_json_schema() for key, model in PARAM_SCHEMAS.items()},
+            "estimates": default_estimates(),
+            "budget": BUDGET.stats(),
         }
 
     @app.post('/render', response_model=RenderResponse)
-    async def render(req: RenderRequest):
+    async def render(req: RenderRequest, request: Request):
         data = {
             "type": req.type or req.visualization_type,
             "parameters": req.parameters or {},
         }
         try:
-            out_path = render_request(data)
-            return RenderResponse(video_path=os.path.abspath(out_path))
+            with tracing.resume(request.headers.get(tracing.HEADER)), tracing.span("mcp.render", type=data["type"]):
+                data, cost = prepare_request(data)
+                name = await render_prepared(data, cost, client_id_for(request))
+                return RenderResponse(**await asyncio.to_thread(render_result, name), parameters=data["parameters"])
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+        except OverBudget as e:
+            raise HTTPException(status_code=422, detail=str(e))
         except Exception as e:
             # Surface a readable error to callers instead of a generic 500
             raise HTTPException(status_code=400, detail=f"Render failed: {str(e)}")
 
+    @app.post('/render/batch')
+    async def render_batch(req: BatchRenderRequest, request: Request):
+        """Render many requests; streams one NDJSON line per item as it finishes."""
+        client_id = client_id_for(request)
+        # Never hold more queue slots than a single client is allowed
+        slots = asyncio.Semaphore(RENDER_QUEUE_PER_CLIENT)
+
+        async def one(index: int, item: RenderRequest) -> Dict[str, Any]:
+            data = {
+                "type": item.type or item.visualization_type,
+                "parameters": item.parameters or {},
+            }
+            async with slots:
+                try:
+                    data, cost = prepare_request(data)
+                    name = await render_prepared(data, cost, client_id, lane=BATCH)
+                    result = await asyncio.to_thread(render_result, name)
+                    return {"index": index, "status": "ok", **result, "parameters": data["parameters"]}
+                except QueueFull as e:
+                    return {"index": index, "status": "busy", "retry_after": e.retry_after, "error": str(e)}
+                except (ValidationError, OverBudget) as e:
+                    return {"index": index, "status": "error", "error": f"Invalid request: {e}"}
+                except Exception as e:
+                    return {"index": index, "status": "error", "error": f"Render failed: {str(e)}"}
+
+        async def results():
+            # Tasks copy the context they are created in, so every item joins the caller's trace
+            with tracing.resume(request.headers.get(tracing.HEADER)):
+                tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(req.items)]
+            for done in asyncio.as_completed(tasks):
+                yield json.dumps(await done) + "\n"
+
+        return StreamingResponse(results(), media_type="application/x-ndjson")
+
+    @app.post('/export')
+    async def export(req: ExportRequest, request: Request):
+        """
+        Raw frames for datasets: each request (or each entry of parameters_list)
+        renders straight into a memory-mapped .npy, or a directory of chunks,
+        under MCP_EXPORT_DIR, next to a JSON manifest with per-frame metadata.
+        Exports take the batch lane; streams one NDJSON line per item as it finishes.
+        """
+        client_id = client_id_for(request)
+        slots = asyncio.Semaphore(RENDER_QUEUE_PER_CLIENT)
+        options = req.options()
+
+        async def one(index: int, data: Dict[str, Any]) -> Dict[str, Any]:
+            async with slots:
+                try:
+                    data, cost = prepare_request(data)
+                    key = render_key(data["type"], data["parameters"], export=options)
+                    job = {**export_job(data, cost, options), "trace": {"parent": tracing.traceparent(), "enqueued": time.time()}}
+                    cost = cost.model_dump() if cost else None
+                    path = await inflight.do(key, lambda: queue.submit(client_id, job, cost=cost, lane=BATCH))
+                    return {"index": index, "status": "ok", **await asyncio.to_thread(export_summary, path)}
+                except QueueFull as e:
+                    return {"index": index, "status": "busy", "retry_after": e.retry_after, "error": str(e)}
+                except (ValidationError, OverBudget) as e:
+                    return {"index": index, "status": "error", "error": f"Invalid request: {e}"}
+                except Exception as e:
+                    return {"index": index, "status": "error", "error": f"Export failed: {str(e)}"}
+
+        async def results():
+            with tracing.resume(request.headers.get(tracing.HEADER)):
+                tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(req.items())]
+            for done in asyncio.as_completed(tasks):
+                yield json.dumps(await done) + "\n"
+
+        return StreamingResponse(results(), media_type="application/x-ndjson")
+
+    @app.post('/preview')
+    async def preview(req: PreviewRequest, request: Request):
+        """
+        A low-resolution still of what /render would produce, in well under a
+        second: construct() runs with animations skipped and one frame is drawn.
+        Recent previews are kept in memory, keyed like renders.
+        """
+        try:
+            data, _ = prepare_request({"type": req.type or req.visualization_type, "parameters": req.parameters or {}})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+        except OverBudget as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        key = canonical_request_key("preview", {**data, "play": req.play, "format": req.format, "width": req.width})
+        headers = {"Cache-Control": "no-cache"}
+
+        with tracing.resume(request.headers.get(tracing.HEADER)), tracing.span("mcp.preview", type=data["type"]) as span:
+            image = previews.get(key)
+            if span is not None:
+                span["hit"] = image is not None
+            if image is not None:
+                return Response(image, media_type=MEDIA_TYPES[req.format], headers={**headers, "X-Preview-Cache": "hit"})
+            # Stale previews are worthless to a user who is still typing; shed them instead of queueing
+            if preview_state["pending"] >= PREVIEW_QUEUE_DEPTH:
+                preview_state["rejected"] += 1
+                raise HTTPException(status_code=429, detail="Too many previews in progress", headers={"Retry-After": "1"})
+
+            async def run() -> bytes:
+                preview_state["pending"] += 1
+                try:
+                    job = {**data, "trace": {"parent": tracing.traceparent()}}
+                    image = await asyncio.get_running_loop().run_in_executor(
+                        preview_pool, render_preview, job, req.play, req.format, req.width)
+                finally:
+                    preview_state["pending"] -= 1
+                previews.put(key, image)
+                return image
+
+            started = time.perf_counter()
+            try:
+                image = await inflight.do(key, run)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Preview failed: {str(e)}")
+            headers.update({"X-Preview-Cache": "miss", "X-Preview-Seconds": f"{time.perf_counter() - started:.3f}"})
+            return Response(image, media_type=MEDIA_TYPES[req.format], headers=headers)
+
+    def compose(key: str, names: List[str]) -> str:
+        name = compose_lesson(names, ARTIFACT_STORE, RENDERS_DIR)
+        ARTIFACT_STORE.set_ref(key, name)
+        return name
+
+    @app.post('/render/lesson', response_model=LessonResponse)
+    async def render_lesson(req: LessonRequest, request: Request):
+        """
+        Render a lesson: its items in order, with optional title cards, joined
+        into one video. Every segment renders (or is found) through the same
+        cache as /render, so changing one item only re-renders that item.
+        """
+        client_id = client_id_for(request)
+        try:
+            segments = [prepare_request(s)[0] for s in lesson_segments(req)]
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+        except OverBudget as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        key = canonical_request_key("lesson", {"segments": [render_key(s["type"], s["parameters"]) for s in segments]})
+        slots = asyncio.Semaphore(RENDER_QUEUE_PER_CLIENT)
+
+        async def one(segment: Dict[str, Any]) -> str:
+            async with slots:
+                return await render_one(segment, client_id, lane=BATCH)
+
+        try:
+            with tracing.resume(request.headers.get(tracing.HEADER)), tracing.span("mcp.lesson", segments=len(segments)):
+                names = list(await asyncio.gather(*(one(s) for s in segments)))
+                cached = await asyncio.to_thread(ARTIFACT_STORE.get_ref, key)
+                name = cached or await inflight.do(key, lambda: asyncio.to_thread(compose, key, names))
+            return LessonResponse(**await asyncio.to_thread(render_result, name), segments=names)
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Lesson failed: {str(e)}")
+
+    @app.post('/render/sweep')
+    async def render_sweep(req: SweepRequest, request: Request):
+        """
+        Render a scene over a grid of parameter values. "tiled" draws every
+        variant in one video (scenes with a SWEEP_SCENE_CLASS compute all
+        variants together); "videos" renders each variant through the cache,
+        where they share manim's cached setup segments. Returns a manifest
+        indexed by parameter values.
+        """
+        client_id = client_id_for(request)
+        variants, values = expand_grid(req)
+        try:
+            prepared = [prepare_request({"type": req.type, "parameters": v})[0] for v in variants]
+            if req.mode == "tiled":
+                if req.type not in SWEEP_SCENES:
+                    raise HTTPException(status_code=422, detail=f"Scene {req.type!r} has no tiled sweep; use mode \"videos\"")
+                data, _ = prepare_request({"type": SWEEP_TYPE, "parameters": {
+                    "scene": req.type,
+                    "variants": [p["parameters"] for p in prepared],
+                    "labels": [label_for(v) for v in values],
+                }})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+        except OverBudget as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        parameters = [p["parameters"] for p in prepared]
+
+        try:
+            if req.mode == "tiled":
+                video = await render_one(data, client_id)
+                return build_manifest(req, values, parameters, video=video)
+            slots = asyncio.Semaphore(RENDER_QUEUE_PER_CLIENT)
+
+            async def one(item: Dict[str, Any]) -> str:
+                async with slots:
+                    return await render_one(item, client_id, lane=BATCH)
+
+            artifacts = list(await asyncio.gather(*(one(p) for p in prepared)))
+            return build_manifest(req, values, parameters, artifacts=artifacts)
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Sweep failed: {str(e)}")
+
     return app
 
 if __name__ == '__main__':
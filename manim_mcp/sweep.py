@@ -0,0 +1,104 @@
+import os
+import json
+import itertools
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, model_validator
+
+from manim_mcp.scenes._params import RenderCost, SceneParams
+from manim_mcp.scenes._sweep import tile_position
+
+SWEEP_TYPE = "sweep"
+MAX_SWEEP_VARIANTS = int(os.getenv("MCP_MAX_SWEEP_VARIANTS", "16"))
+
+
+class SweepRequest(BaseModel):
+    """A scene key, fixed parameters, and a grid of values for the parameters being compared."""
+
+    type: str
+    base: dict = {}
+    grid: Dict[str, List[Any]] = Field(min_length=1)
+    # "tiled": every variant in one video; "videos": one video per variant
+    mode: Literal["tiled", "videos"] = "tiled"
+
+    @model_validator(mode="after")
+    def _size(self):
+        if any(not values for values in self.grid.values()):
+            raise ValueError("every grid parameter needs at least one value")
+        n = 1
+        for values in self.grid.values():
+            n *= len(values)
+        if n > MAX_SWEEP_VARIANTS:
+            raise ValueError(f"grid has {n} variants; the limit is {MAX_SWEEP_VARIANTS}")
+        return self
+
+
+class SweepParams(SceneParams):
+    """Parameters of the tiled "sweep" render: already validated variants of one scene."""
+
+    scene: str
+    variants: List[dict] = Field(min_length=1, max_length=MAX_SWEEP_VARIANTS)
+    labels: List[str] = []
+
+
+def expand_grid(req: SweepRequest) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Every combination of grid values, in a stable order (grid keys sorted,
+    first key slowest). Returns (full parameters, swept values) per variant.
+    """
+    keys = sorted(req.grid)
+    variants, values = [], []
+    for combo in itertools.product(*(req.grid[k] for k in keys)):
+        swept = dict(zip(keys, combo))
+        variants.append({**req.base, **swept})
+        values.append(swept)
+    return variants, values
+
+
+def index_key(values: Dict[str, Any]) -> str:
+    """Manifest key for a variant, e.g. 'learning_rate=0.1&steps=20'."""
+    return "&".join(f"{k}={json.dumps(values[k], separators=(',', ':'))}" for k in sorted(values))
+
+
+def label_for(values: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={json.dumps(values[k], separators=(',', ':'))}" for k in sorted(values))
+
+
+def sweep_cost(costs: List[RenderCost]) -> RenderCost:
+    """Tiles animate together: as long as the longest variant, drawing all of them."""
+    return RenderCost(
+        plays=max(c.plays for c in costs),
+        frames=max(c.frames for c in costs),
+        mobjects=sum(c.mobjects for c in costs),
+    )
+
+
+def build_manifest(req: SweepRequest,
+                   values: List[Dict[str, Any]],
+                   parameters: List[Dict[str, Any]],
+                   artifacts: Optional[List[str]] = None,
+                   video: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The sweep's output, indexed by parameter values: `index` maps each
+    variant's index_key to its entry in `variants`, which holds the swept
+    values, the parameters actually rendered (after validation and budget
+    clamping) and where to find it: its own artifact, or its tile in `video`.
+    """
+    entries = []
+    for i, (swept, params) in enumerate(zip(values, parameters)):
+        entry = {"values": swept, "parameters": params}
+        if artifacts is not None:
+            entry["artifact"] = artifacts[i]
+        if video is not None:
+            entry["tile"] = tile_position(i, len(values))
+        entries.append(entry)
+    manifest = {
+        "scene": req.type,
+        "mode": req.mode,
+        "axes": {k: req.grid[k] for k in sorted(req.grid)},
+        "variants": entries,
+        "index": {index_key(swept): i for i, swept in enumerate(values)},
+    }
+    if video is not None:
+        manifest["video"] = video
+    return manifest
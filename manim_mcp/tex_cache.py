@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from manim import config
+
+logger = logging.getLogger(__name__)
+
+PREWARM_TOP = int(os.getenv("MCP_TEX_PREWARM_TOP", "200"))
+USAGE_LOG = "usage.jsonl"
+# How much of the usage log metrics and prewarming look at
+USAGE_WINDOW = 20000
+# Once the log grows past this it is cut back to USAGE_WINDOW lines (about 3 MB)
+USAGE_MAX_BYTES = int(os.getenv("MCP_TEX_USAGE_MAX_BYTES", str(8 * 1024 * 1024)))
+# /ready is probed often; its cache stats are recomputed at most this often
+USAGE_STATS_TTL = float(os.getenv("MCP_TEX_STATS_TTL", "30"))
+
+_original_tex_to_svg_file = None
+_install_lock = threading.Lock()
+# Lookups made while prewarming are logged as such and don't count towards popularity or hits
+_prewarming = False
+# tex_dir -> (computed at, usage_stats)
+_stats_cache: Dict[str, tuple] = {}
+
+
+def tex_cache_dir(renders_dir: str) -> str:
+    return os.getenv("MCP_TEX_CACHE_DIR", os.path.join(renders_dir, "tex_cache"))
+
+
+def tex_config(tex_dir: str) -> Dict[str, Any]:
+    """Config overrides that point manim at the shared cache. Cleanup is ours, per entry."""
+    return {"tex_dir": tex_dir, "no_latex_cleanup": True}
+
+
+def _texcode(expression: str, environment: Optional[str], tex_template) -> str:
+    if environment is not None:
+        return tex_template.get_texcode_for_expression_in_env(expression, environment)
+    return tex_template.get_texcode_for_expression(expression)
+
+
+@contextmanager
+def _locked(path: Path):
+    """Exclusive lock so only one worker compiles a given entry; the others wait and reuse it."""
+    with open(f"{path}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _record(tex_dir: Path, expression: str, environment: Optional[str], template: str, hit: bool, seconds: float) -> None:
+    line = json.dumps({
+        "expression": expression,
+        "environment": environment,
+        "template": template,
+        "hit": hit,
+        "seconds": round(seconds, 4),
+        "prewarm": _prewarming,
+    })
+    try:
+        # Single small appends, so concurrent workers don't interleave lines
+        with open(tex_dir / USAGE_LOG, "a") as f:
+            f.write(line + "\n")
+            size = f.tell()
+    except OSError:
+        return
+    if size > USAGE_MAX_BYTES:
+        compact_usage(str(tex_dir))
+
+
+def compact_usage(tex_dir: str, keep: int = USAGE_WINDOW) -> None:
+    """
+    Cut the usage log back to its last `keep` lines, which is all metrics and
+    prewarming read. One worker compacts at a time; a line another worker
+    appends meanwhile may be lost, which only costs a count.
+    """
+    path = os.path.join(tex_dir, USAGE_LOG)
+    try:
+        with open(f"{path}.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            with open(path) as f:
+                lines = deque(f, maxlen=keep)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.writelines(lines)
+            os.replace(tmp, path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not compact the Tex usage log: {e}")
+
+
+def tidy(tex_dir: str) -> None:
+    """Startup housekeeping: compact the usage log and drop the lock files of entries already compiled."""
+    compact_usage(tex_dir)
+    for lock in Path(tex_dir).glob("*.lock"):
+        if lock.with_suffix(".svg").exists():
+            lock.unlink(missing_ok=True)
+
+
+def cached_tex_to_svg_file(expression: str, environment: Optional[str] = None, tex_template=None) -> Path:
+    """
+    Drop-in for manim's tex_to_svg_file that is safe to share between worker
+    processes and containers: entries are keyed (as in manim) by the hash of the
+    full TeX source, so template and environment are part of the key; a lock
+    per entry stops two workers compiling the same thing; and every lookup is
+    logged for metrics and prewarming.
+    """
+    from manim.utils.tex_file_writing import tex_hash
+
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    tex_dir = config.get_dir("tex_dir")
+    tex_dir.mkdir(parents=True, exist_ok=True)
+    stem = tex_hash(_texcode(expression, environment, tex_template))
+    svg_file = tex_dir / f"{stem}.svg"
+    template = tex_hash(tex_template.body)
+
+    if svg_file.exists():
+        _record(tex_dir, expression, environment, template, True, 0.0)
+        return svg_file
+
+    with _locked(tex_dir / stem):
+        if svg_file.exists():
+            # Another worker compiled it while we waited
+            _record(tex_dir, expression, environment, template, True, 0.0)
+            (tex_dir / f"{stem}.lock").unlink(missing_ok=True)
+            return svg_file
+        started = time.perf_counter()
+        result = _original_tex_to_svg_file(expression, environment, tex_template)
+        _record(tex_dir, expression, environment, template, False, time.perf_counter() - started)
+        # The .svg exists now, so later lookups never reach the lock; a failed compile keeps it for the retry
+        for leftover in tex_dir.glob(f"{stem}.*"):
+            if leftover.suffix != ".svg":
+                leftover.unlink(missing_ok=True)
+        return result
+
+
+def install() -> None:
+    """Route MathTex/Tex compilation through the shared cache (idempotent, per process, thread-safe)."""
+    global _original_tex_to_svg_file
+    import manim.utils.tex_file_writing as tex_file_writing
+    import manim.mobject.text.tex_mobject as tex_mobject
+
+    with _install_lock:
+        if _original_tex_to_svg_file is None:
+            _original_tex_to_svg_file = tex_file_writing.tex_to_svg_file
+        tex_file_writing.tex_to_svg_file = cached_tex_to_svg_file
+        tex_mobject.tex_to_svg_file = cached_tex_to_svg_file
+
+
+def read_usage(tex_dir: str, limit: int = USAGE_WINDOW) -> List[Dict[str, Any]]:
+    try:
+        with open(os.path.join(tex_dir, USAGE_LOG)) as f:
+            lines = deque(f, maxlen=limit)
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def usage_stats(tex_dir: str, max_age: float = USAGE_STATS_TTL) -> Dict[str, Any]:
+    """Hit rate and compile time saved, over the recent usage log; reused for `max_age` seconds."""
+    cached = _stats_cache.get(tex_dir)
+    if cached and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+    stats = _usage_stats(tex_dir)
+    _stats_cache[tex_dir] = (time.monotonic(), stats)
+    return stats
+
+
+def _usage_stats(tex_dir: str) -> Dict[str, Any]:
+    records = read_usage(tex_dir)
+    misses = [r for r in records if not r.get("hit")]
+    lookups = sum(1 for r in records if not r.get("prewarm"))
+    hits = sum(1 for r in records if r.get("hit") and not r.get("prewarm"))
+    compile_seconds = sum(r.get("seconds", 0.0) for r in misses)
+    avg = compile_seconds / len(misses) if misses else 0.0
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "misses": len(misses),
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "avg_compile_seconds": round(avg, 3),
+        "compile_seconds_saved": round(hits * avg, 1),
+        "entries": len(list(Path(tex_dir).glob("*.svg"))) if os.path.isdir(tex_dir) else 0,
+    }
+
+
+def popular(tex_dir: str, template: str, top: int = PREWARM_TOP) -> List[tuple]:
+    """Most used (expression, environment) pairs for the given template."""
+    counts = Counter(
+        (r["expression"], r.get("environment"))
+        for r in read_usage(tex_dir)
+        if r.get("template") == template and "expression" in r and not r.get("prewarm")
+    )
+    return [key for key, _ in counts.most_common(top)]
+
+
+def prewarm(tex_dir: str, labels: Iterable[str]) -> Dict[str, Any]:
+    """
+    Compile scene labels and the most popular past entries into the shared
+    cache. Runs in its own process so manim's global config is not shared with
+    a render in progress.
+    """
+    global _prewarming
+    from manim import MathTex, tempconfig
+    from manim.utils.tex_file_writing import tex_hash
+
+    _prewarming = True
+    started = time.perf_counter()
+    warmed, failed = 0, 0
+    with tempconfig(tex_config(tex_dir)):
+        install()
+        for label in labels:
+            try:
+                MathTex(label)
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Could not prewarm {label!r}: {e}")
+        template = tex_hash(config["tex_template"].body)
+        for expression, environment in popular(tex_dir, template):
+            try:
+                cached_tex_to_svg_file(expression, environment)
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Could not prewarm {expression!r}: {e}")
+    return {"warmed": warmed, "failed": failed, "seconds": round(time.perf_counter() - started, 2)}
@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import queue
+import logging
+import importlib
+import threading
+import multiprocessing
+from multiprocessing import process, spawn
+from collections import Counter, deque
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.loop_monitor import percentiles
+
+logger = logging.getLogger(__name__)
+
+WORKER_MAX_RENDERS = int(os.getenv("MCP_WORKER_MAX_RENDERS", "50"))
+WORKER_MAX_RSS_MB = float(os.getenv("MCP_WORKER_MAX_RSS_MB", "2048"))
+# What the fork server imports once; every worker is forked from the result
+PRELOAD = ["forkserver_preload"]
+# Path of the parent's main script (server.py), for the fork server to load
+MAIN_ENV = "MCP_FORKSERVER_MAIN"
+# Recent jobs the timing percentiles are taken over
+TIMING_WINDOW = 500
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (ru_maxrss would be the peak)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+def import_parent_main() -> None:
+    """
+    In the fork server: run the parent's main script once, as __mp_main__.
+    Forked workers then find it loaded and skip re-running it on start, which
+    they otherwise do for every worker. multiprocessing's own "__main__"
+    preload is meant to do this but reads a "main_path" key that
+    spawn.get_preparation_data() never sets, so it is done here instead.
+    """
+    path = os.environ.get(MAIN_ENV)
+    if not path or getattr(sys.modules["__main__"], "__file__", None) == path:
+        return
+    process.current_process()._inheriting = True
+    try:
+        spawn.import_main_path(path)
+    finally:
+        del process.current_process()._inheriting
+
+
+def _worker_main(conn, max_renders: int, max_rss: float) -> None:
+    """Run jobs sent by one pool slot until told to stop or due for recycling."""
+    renders = 0
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        module, name, args = job
+        # Already imported by the fork server; "__main__" is its copy of server.py (import_parent_main)
+        target = importlib.import_module(module)
+        timing = getattr(target, "render_timing", None)
+        if timing is not None:
+            timing.first_frame = None
+        try:
+            ok, value = True, getattr(target, name)(*args)
+        except Exception as e:
+            ok, value = False, e
+        renders += 1
+        rss = rss_bytes()
+        retire = "renders" if renders >= max_renders else "rss" if rss > max_rss else None
+        first_frame = getattr(timing, "first_frame", None) if timing is not None else None
+        info = {"first_frame": first_frame, "rss": rss, "retire": retire}
+        try:
+            conn.send((ok, value, info))
+        except Exception:
+            # Unpicklable exception; pass on its message
+            conn.send((False, RuntimeError(str(value)), info))
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ForkServerPool(Executor):
+    """
+    Render executor whose workers are forked from a fork server that has
+    already imported manim, numpy, the scene registry and warmed fonts and the
+    Tex template (forkserver_preload.py). A worker starts in milliseconds with
+    all of that shared copy-on-write, instead of paying seconds of imports as a
+    spawned process would.
+
+    Each slot keeps one worker and feeds it jobs over a pipe. A worker exits
+    after `max_renders` jobs or once its RSS is over `max_rss_mb` (manim leaks
+    a little per render: mobject caches, Pango and Cairo state), and the slot
+    forks a fresh one. Jobs are module-level functions, sent by module and name.
+    """
+
+    def __init__(self, workers: int, max_renders: int = WORKER_MAX_RENDERS,
+                 max_rss_mb: float = WORKER_MAX_RSS_MB, preload: List[str] = PRELOAD):
+        self._ctx = multiprocessing.get_context("forkserver")
+        self._ctx.set_forkserver_preload(preload)
+        # The fork server inherits our environment when it starts
+        main_path = spawn.get_preparation_data("forkserver").get("init_main_from_path")
+        if main_path:
+            os.environ[MAIN_ENV] = main_path
+        self.max_renders = max_renders
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self._jobs: "queue.Queue[Optional[Tuple[str, str, tuple, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.failed = 0
+        self.crashed = 0
+        self.recycled: Counter = Counter()
+        self.start_seconds: deque = deque(maxlen=TIMING_WINDOW)
+        self.first_frame_seconds: deque = deque(maxlen=TIMING_WINDOW)
+        self.worker_rss: Dict[int, int] = {}
+        self._slots = [
+            threading.Thread(target=self._run_slot, args=(i,), name=f"forkserver-slot-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for slot in self._slots:
+            slot.start()
+
+    def _start_worker(self) -> _Worker:
+        started = time.perf_counter()
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_renders, self.max_rss),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            self.start_seconds.append(time.perf_counter() - started)
+        return _Worker(process, parent_conn)
+
+    def _try_start_worker(self) -> Optional[_Worker]:
+        try:
+            return self._start_worker()
+        except Exception as e:
+            logger.warning(f"Could not start a render worker: {e!r}")
+            return None
+
+    def _replace(self, worker: _Worker) -> Optional[_Worker]:
+        worker.stop()
+        return self._try_start_worker()
+
+    def _run_slot(self, index: int) -> None:
+        # Fork the first worker now, so the fork server's preload happens at startup
+        worker = self._try_start_worker()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                if worker is not None:
+                    worker.stop()
+                return
+            module, name, args, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            dispatched = time.time()
+            if worker is None or not worker.process.is_alive():
+                # Replacement failed earlier, or the worker was killed while idle
+                if worker is not None:
+                    worker.stop()
+                worker = self._try_start_worker()
+                if worker is None:
+                    future.set_exception(RuntimeError("No render worker available"))
+                    continue
+            try:
+                worker.conn.send((module, name, args))
+                ok, value, info = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                # Killed mid-render (OOM killer, a crash in Cairo); the next job gets a fresh worker
+                with self._lock:
+                    self.crashed += 1
+                logger.warning(f"Render worker {worker.process.pid} died: {e!r}")
+                future.set_exception(RuntimeError(f"Render worker died: {e!r}"))
+                worker = self._replace(worker)
+                continue
+
+            with self._lock:
+                self.renders += 1
+                if not ok:
+                    self.failed += 1
+                self.worker_rss[index] = info["rss"]
+                if info["first_frame"]:
+                    # Job start to first frame, including any fork of a worker and dispatch
+                    self.first_frame_seconds.append(info["first_frame"] - dispatched)
+                if info["retire"]:
+                    self.recycled[info["retire"]] += 1
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+            if info["retire"]:
+                # Fork the replacement right away rather than when the next job arrives
+                worker = self._replace(worker)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if kwargs:
+            raise TypeError("ForkServerPool jobs take positional arguments only")
+        future: Future = Future()
+        self._jobs.put((fn.__module__, fn.__name__, args, future))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[3].cancel()
+        for _ in self._slots:
+            self._jobs.put(None)
+        if wait:
+            for slot in self._slots:
+                slot.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": "forkserver",
+                "workers": len(self._slots),
+                "renders": self.renders,
+                "failed": self.failed,
+                "crashed": self.crashed,
+                "recycled": dict(self.recycled),
+                "worker_rss_mb": {i: round(rss / 1024 / 1024, 1) for i, rss in sorted(self.worker_rss.items())},
+                "worker_start_seconds": percentiles(self.start_seconds, digits=3),
+                "first_frame_seconds": percentiles(self.first_frame_seconds, digits=3),
+            }
@@ -0,0 +1,217 @@
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+import httpx
+
+# Artifacts are named "<sha256 of content><extension>", e.g. "3f9c...e1.mp4".
+# Derived artifacts (a video's poster) are named after their source:
+# "3f9c...e1.poster.webp". Both are immutable once written.
+ARTIFACT_NAME = re.compile(r"^([0-9a-f]{64})((?:\.[a-z]+)?\.[a-z0-9]+)$")
+REF_KEY = re.compile(r"^[0-9a-f]{64}$")
+CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_artifact_name(name: str) -> bool:
+    return bool(ARTIFACT_NAME.match(name))
+
+
+def is_derived(name: str) -> bool:
+    m = ARTIFACT_NAME.match(name)
+    return bool(m) and m.group(2).count(".") > 1
+
+
+def derived_name(name: str, kind: str, ext: str) -> str:
+    """Name of an artifact derived from `name`, e.g. its poster image."""
+    m = ARTIFACT_NAME.match(name)
+    if not m:
+        raise ValueError(f"Not an artifact name: {name}")
+    return f"{m.group(1)}.{kind}{ext}"
+
+
+def blob_relpath(name: str) -> str:
+    """Content-addressed layout: ab/cd/abcd...ef.mp4 keeps directories small."""
+    m = ARTIFACT_NAME.match(name)
+    if not m:
+        raise ValueError(f"Not an artifact name: {name}")
+    digest = m.group(1)
+    return os.path.join(digest[:2], digest[2:4], name)
+
+
+class ArtifactStore(ABC):
+    """
+    Where rendered artifacts live once they leave the renderer.
+
+    Blobs are immutable and addressed by content hash. Refs map a canonical
+    request key to the blob that answered it, so a repeat request can be served
+    without rendering again.
+    """
+
+    @abstractmethod
+    def put(self, path: str, ext: str, name: Optional[str] = None) -> str:
+        """
+        Store the file at `path` (consuming it) and return its artifact name.
+        `name` is only given for derived artifacts; otherwise it is the content hash.
+        """
+        ...
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        ...
+
+    def local_path(self, name: str) -> Optional[str]:
+        """Filesystem path of a blob when the store is on local disk, else None."""
+        return None
+
+    def fetch(self, name: str, work_dir: str) -> str:
+        """A readable local file with the blob's bytes: the blob itself if local, else a copy in work_dir."""
+        path = self.local_path(name)
+        if path is None:
+            raise FileNotFoundError(name)
+        return path
+
+    @abstractmethod
+    def get_ref(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set_ref(self, key: str, name: str) -> None:
+        ...
+
+
+class LocalArtifactStore(ArtifactStore):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.blobs_dir = os.path.join(self.root, "blobs")
+        self.refs_dir = os.path.join(self.root, "refs")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+
+    def _blob_path(self, name: str) -> str:
+        return os.path.join(self.blobs_dir, blob_relpath(name))
+
+    def put(self, path: str, ext: str, name: Optional[str] = None) -> str:
+        name = name or f"{file_digest(path)}{ext}"
+        dest = self._blob_path(name)
+        if os.path.exists(dest):
+            # Identical bytes are already stored
+            os.remove(path)
+            return name
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        shutil.move(path, tmp)
+        os.replace(tmp, dest)
+        return name
+
+    def put_stream(self, chunks: Iterator[bytes], name: str) -> str:
+        """Store streamed bytes under `name`, rejecting content that does not match its hash."""
+        m = ARTIFACT_NAME.match(name)
+        if not m:
+            raise ValueError(f"Not an artifact name: {name}")
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.blobs_dir, suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    h.update(chunk)
+                    f.write(chunk)
+            if not is_derived(name) and h.hexdigest() != m.group(1):
+                raise ValueError("Content does not match artifact hash")
+            return self.put(tmp, m.group(2), name=name)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def exists(self, name: str) -> bool:
+        return is_artifact_name(name) and os.path.exists(self._blob_path(name))
+
+    def local_path(self, name: str) -> Optional[str]:
+        return self._blob_path(name) if self.exists(name) else None
+
+    def get_ref(self, key: str) -> Optional[str]:
+        if not REF_KEY.match(key):
+            return None
+        try:
+            with open(os.path.join(self.refs_dir, key)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if self.exists(name) else None
+
+    def set_ref(self, key: str, name: str) -> None:
+        if not REF_KEY.match(key) or not is_artifact_name(name):
+            raise ValueError("Invalid ref")
+        tmp = os.path.join(self.refs_dir, f"{key}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            f.write(name)
+        os.replace(tmp, os.path.join(self.refs_dir, key))
+
+
+class HTTPArtifactStore(ArtifactStore):
+    """Client for the blob service in blobstore/ (or anything speaking its PUT/GET/HEAD API)."""
+
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def blob_url(self, name: str) -> str:
+        return f"{self.base_url}/blobs/{name}"
+
+    def put(self, path: str, ext: str, name: Optional[str] = None) -> str:
+        name = name or f"{file_digest(path)}{ext}"
+        if not self.exists(name):
+            with open(path, "rb") as f:
+                resp = httpx.put(
+                    self.blob_url(name),
+                    content=iter(lambda: f.read(CHUNK_SIZE), b""),
+                    timeout=self.timeout,
+                )
+                resp.raise_for_status()
+        os.remove(path)
+        return name
+
+    def exists(self, name: str) -> bool:
+        resp = httpx.head(self.blob_url(name), timeout=self.timeout)
+        return resp.status_code == 200
+
+    def fetch(self, name: str, work_dir: str) -> str:
+        dest = os.path.join(work_dir, name)
+        with httpx.stream("GET", self.blob_url(name), timeout=self.timeout) as resp:
+            if resp.status_code == 404:
+                raise FileNotFoundError(name)
+            resp.raise_for_status()
+            with open(dest, "wb") as f:
+                for chunk in resp.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+        return dest
+
+    def get_ref(self, key: str) -> Optional[str]:
+        resp = httpx.get(f"{self.base_url}/refs/{key}", timeout=self.timeout)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json().get("name")
+
+    def set_ref(self, key: str, name: str) -> None:
+        resp = httpx.put(f"{self.base_url}/refs/{key}", json={"name": name}, timeout=self.timeout)
+        resp.raise_for_status()
+
+
+def artifact_store_from_env(default_root: str) -> ArtifactStore:
+    """ARTIFACT_STORE_URL selects the blob service; otherwise blobs live on local disk."""
+    url = os.getenv("ARTIFACT_STORE_URL")
+    if url:
+        return HTTPArtifactStore(url)
+    return LocalArtifactStore(os.getenv("ARTIFACT_STORE_DIR", default_root))
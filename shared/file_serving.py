@@ -0,0 +1,95 @@
+import os
+import re
+import mimetypes
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from shared.artifact_store import is_artifact_name
+
+CHUNK_SIZE = 256 * 1024
+# Artifacts named by their sha256 never change, so they can be cached forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+def _etag(name: str, stat: os.stat_result) -> str:
+    if is_artifact_name(name):
+        return f'"{name.split(".")[0]}"'
+    return f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive offsets; None means serve the whole file."""
+    m = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header)
+    if not m or (not m.group(1) and not m.group(2)):
+        # Multi-range or malformed requests fall back to a full response
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(m.group(2)))
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+async def _read_file(path: str, start: int, length: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(path: str, name: str, request: Request) -> Response:
+    """
+    Serve a file with strong validators and byte-range support.
+    Content-addressed names get `immutable` caching; anything else is revalidated.
+    """
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = _etag(name, stat)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": IMMUTABLE if is_artifact_name(name) else "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header:
+        if_range = request.headers.get("if-range")
+        # A stale If-Range means the client's partial copy is useless; send everything
+        if if_range is None or if_range.strip() == etag:
+            byte_range = _parse_range(range_header, size)
+
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers, media_type=media_type)
+    return StreamingResponse(_read_file(path, start, length), status_code=status, headers=headers, media_type=media_type)
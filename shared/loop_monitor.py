@@ -0,0 +1,54 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+
+def percentiles(values: Iterable[float], qs=(50, 95, 99), digits: int = 4) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles as {"p50": ..., ...}; None for each when there are no values."""
+    data = sorted(values)
+    out: Dict[str, Optional[float]] = {}
+    for q in qs:
+        if not data:
+            out[f"p{q}"] = None
+            continue
+        idx = min(len(data) - 1, max(0, int(round(q / 100.0 * (len(data) - 1)))))
+        out[f"p{q}"] = round(data[idx], digits)
+    return out
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task asks to sleep `interval` seconds and
+    records how much later than that it actually woke up. Lag means something
+    is blocking the loop (sync I/O, CPU work) and every request waits on it.
+    """
+
+    def __init__(self, interval: float = 0.05, history: int = 2000):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.max_lag = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {**percentiles(self.samples), "max": round(self.max_lag, 4)}
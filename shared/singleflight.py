@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def _canonicalize(value: Any) -> Any:
+    """Normalize a parameter value so equivalent requests serialize identically."""
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        # 2 and 2.0 describe the same render
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def canonical_request_key(visualization_type: Optional[str], parameters: Optional[Dict[str, Any]]) -> str:
+    """Stable key for a (type, parameters) render request."""
+    vis_type = (visualization_type or "").strip().lower()
+    body = json.dumps(_canonicalize(parameters or {}), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{vis_type}\n{body}".encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive its result or exception.
+    The task is shielded so a disconnecting caller does not cancel the work
+    for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,226 @@
+# Lightweight request tracing shared by the backend and the MCP server.
+#
+# A trace starts where a request first arrives and its context travels with
+# the request as a W3C `traceparent` header. Each service appends the spans it
+# records to its own JSONL file; the files can be merged into Chrome trace
+# format (chrome://tracing, Perfetto) with
+#
+#     python -m shared.tracing chrome renders/traces_*.jsonl -o trace.json
+#
+# Only a TRACE_SAMPLE_RATE fraction of traces is recorded (default 0, i.e.
+# off); for an unsampled request a span costs one context variable lookup.
+import os
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+HEADER = "traceparent"
+
+SERVICE = "python"
+_trace_file = os.path.join(os.getcwd(), "traces.jsonl")
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current: ContextVar[Optional[SpanContext]] = ContextVar("trace_span", default=None)
+_write_lock = threading.Lock()
+
+
+def configure(service: str, default_file: str) -> None:
+    """Name this service in its spans and pick its trace file (TRACE_FILE overrides)."""
+    global SERVICE, _trace_file
+    SERVICE = service
+    _trace_file = os.getenv("TRACE_FILE", default_file)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse `00-<trace id>-<span id>-<flags>`; anything malformed starts a fresh trace."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return SpanContext(parts[1], parts[2], sampled)
+
+
+def current() -> Optional[SpanContext]:
+    return _current.get()
+
+
+def traceparent() -> Optional[str]:
+    """Header value for the current span, to pass to a downstream service."""
+    ctx = _current.get()
+    return ctx.traceparent() if ctx else None
+
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    ctx = _current.get()
+    if ctx is not None:
+        headers[HEADER] = ctx.traceparent()
+    return headers
+
+
+@contextmanager
+def resume(parent: Optional[str] = None, sample_rate: Optional[float] = None) -> Iterator[SpanContext]:
+    """
+    Continue the trace in a `traceparent` value, or start a new one, sampled
+    with probability `sample_rate` (TRACE_SAMPLE_RATE by default). Spans opened
+    inside become children of it.
+    """
+    ctx = parse_traceparent(parent)
+    if ctx is None:
+        rate = SAMPLE_RATE if sample_rate is None else sample_rate
+        ctx = SpanContext(secrets.token_hex(16), secrets.token_hex(8), rate > 0 and random.random() < rate)
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def _write(record: Dict[str, Any]) -> None:
+    line = json.dumps(record, default=str) + "\n"
+    try:
+        with _write_lock, open(_trace_file, "a") as f:
+            f.write(line)
+    except OSError:
+        pass
+
+
+def add_span(name: str, start: float, end: float, parent: Optional[SpanContext] = None, **attrs) -> None:
+    """Record a span that has already happened, e.g. time spent waiting in a queue."""
+    parent = parent or _current.get()
+    if parent is None or not parent.sampled:
+        return
+    _write({
+        "trace_id": parent.trace_id,
+        "span_id": secrets.token_hex(8),
+        "parent_id": parent.span_id,
+        "name": name,
+        "service": SERVICE,
+        "start": start,
+        "duration": end - start,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "attrs": attrs,
+    })
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Time the enclosed block as a child of the current span. Yields the span's
+    attribute dict (for adding results) when sampled, else None.
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    ctx = SpanContext(parent.trace_id, secrets.token_hex(8), True)
+    token = _current.set(ctx)
+    start = time.time()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        if error:
+            attrs["error"] = error
+        _write({
+            "trace_id": ctx.trace_id,
+            "span_id": ctx.span_id,
+            "parent_id": parent.span_id,
+            "name": name,
+            "service": SERVICE,
+            "start": start,
+            "duration": time.perf_counter() - started,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "attrs": attrs,
+        })
+
+
+# ---------------
+# Chrome trace conversion
+# ---------------
+
+def read_spans(paths: List[str], trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if trace_id is None or rec.get("trace_id") == trace_id:
+                    spans.append(rec)
+    return spans
+
+
+def to_chrome(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chrome trace event format: one complete ("X") event per span, a process per service."""
+    events = []
+    processes: Dict[tuple, int] = {}
+    for rec in sorted(spans, key=lambda r: r["start"]):
+        proc = (rec.get("service"), rec.get("pid"))
+        if proc not in processes:
+            processes[proc] = len(processes) + 1
+            events.append({
+                "name": "process_name", "ph": "M", "pid": processes[proc],
+                "args": {"name": f"{proc[0]} ({proc[1]})"},
+            })
+        events.append({
+            "name": rec["name"],
+            "ph": "X",
+            "ts": rec["start"] * 1e6,
+            "dur": rec["duration"] * 1e6,
+            "pid": processes[proc],
+            "tid": rec.get("tid", 0),
+            "args": {"trace_id": rec["trace_id"], **(rec.get("attrs") or {})},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert JSONL trace files to Chrome trace format")
+    sub = parser.add_subparsers(dest="command", required=True)
+    chrome = sub.add_parser("chrome", help="Write a Chrome trace (chrome://tracing, Perfetto)")
+    chrome.add_argument("files", nargs="+", help="JSONL trace files, e.g. from the backend and the MCP server")
+    chrome.add_argument("-o", "--output", default="trace.json")
+    chrome.add_argument("--trace", help="Only this trace id")
+    args = parser.parse_args()
+
+    spans = read_spans(args.files, args.trace)
+    with open(args.output, "w") as f:
+        json.dump(to_chrome(spans), f)
+    print(f"Wrote {len(spans)} spans from {len({s['trace_id'] for s in spans})} traces to {args.output}")
+
+
+if __name__ == "__main__":
+    main()